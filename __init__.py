@@ -22,12 +22,20 @@ from .common.game import (
 
     # Game functions
     deal, who_starts, value_checker, quantity_checker, play,
+    check_play, playable_cards, PLAY_ERROR_MESSAGES,
 
     # UI functions
     show_session_menu, get_session_name, get_creator_name,
-    get_player_name, show_sessions_list, init_pygame, draw_game,
+    get_player_name, show_sessions_list, init_pygame, draw_game, GameRenderer,
+    DebugOverlay, preload_assets,
 
-    # Card deck
-    deck, card_sets, unordered_set
+    # Card deck (card_sets and unordered_set load lazily, see __getattr__)
+    deck
 )
-from .common.server import CapsaGameServer, GameSession, CapsaGameState
\ No newline at end of file
+from .common.server import CapsaGameServer, GameSession, CapsaGameState
+
+def __getattr__(name):
+    # Loading the card graphics imports pygame_cards, so only on request
+    if name in ('card_sets', 'unordered_set'):
+        return getattr(common.game, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -26,13 +26,15 @@ from .game import (
     
     # Game functions
     deal, who_starts, value_checker, quantity_checker, play,
+    check_play, playable_cards, PLAY_ERROR_MESSAGES,
     
     # UI functions
     show_session_menu, get_session_name, get_creator_name,
-    get_player_name, show_sessions_list, init_pygame, draw_game,
+    get_player_name, show_sessions_list, init_pygame, draw_game, GameRenderer,
+    DebugOverlay, preload_assets,
     
-    # Card deck
-    deck, card_sets, unordered_set
+    # Card deck (card_sets and unordered_set load lazily, see __getattr__)
+    deck
 )
 
 from .server import (
@@ -51,14 +53,22 @@ __all__ = [
     
     # Game functions
     'deal', 'who_starts', 'value_checker', 'quantity_checker', 'play',
+    'check_play', 'playable_cards', 'PLAY_ERROR_MESSAGES',
     
     # UI functions
     'show_session_menu', 'get_session_name', 'get_creator_name',
-    'get_player_name', 'show_sessions_list', 'init_pygame', 'draw_game',
+    'get_player_name', 'show_sessions_list', 'init_pygame', 'draw_game', 'GameRenderer',
+    'DebugOverlay', 'preload_assets',
     
     # Server classes
     'CapsaGameServer', 'GameSession', 'CapsaGameState',
     
     # Card data
-    'deck', 'card_sets', 'unordered_set'
-]
\ No newline at end of file
+    'deck'
+]
+
+def __getattr__(name):
+    # Loading the card graphics imports pygame_cards, so only on request
+    if name in ('card_sets', 'unordered_set'):
+        return getattr(game, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
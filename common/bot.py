@@ -0,0 +1,204 @@
+"""
+Headless game clients for bots, smoke tests and load generation.
+
+BotClient is the asyncio API both transports implement (TcpBotClient in
+tcp/bot.py, HttpBotClient in custom_http/bot.py). States are the dicts
+the servers already send: my_hand, played_cards, current_player_index,
+my_player_index, game_active, players_passed, ...
+
+A policy is any callable policy(state) returning the card dicts to play,
+or an empty list to pass. run_bot() drives a client with a policy.
+"""
+import asyncio
+import logging
+import random
+
+from .game import cards_from_data, legal_combinations
+
+logger = logging.getLogger(__name__)
+
+
+class BotError(Exception):
+    """The server refused a bot request."""
+
+
+class BotClient:
+    def __init__(self):
+        self.session_id = None
+        self.player_name = None
+        self.state = None
+        self.version = 0  # local counter, bumped for every state (or refusal) delivered
+        self.seen = 0  # version last returned by wait_state
+        self.changed = asyncio.Event()
+        self.last_error = None
+        # Counted as states arrive: wait_state only returns the latest one,
+        # which may already belong to the next game
+        self.in_game = False
+        self.games_finished = 0
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def list_sessions(self):
+        raise NotImplementedError
+
+    async def create_session(self, session_name, player_name):
+        """Create a session, join it as its first player and return its id."""
+        raise NotImplementedError
+
+    async def join_session(self, session_id, player_name):
+        raise NotImplementedError
+
+    async def start_game(self):
+        raise NotImplementedError
+
+    async def play(self, cards):
+        """Play card dicts taken from state['my_hand']."""
+        raise NotImplementedError
+
+    async def pass_turn(self):
+        raise NotImplementedError
+
+    def deliver(self, state):
+        if state and state.get("game_active"):
+            self.in_game = True
+        elif self.in_game and is_game_over(state):
+            self.in_game = False
+            self.games_finished += 1
+        self.state = state
+        self.version += 1
+        self.changed.set()
+
+    def refused(self, message):
+        # Hand the unchanged state out again so run_bot sees the refusal
+        self.last_error = message
+        self.deliver(self.state)
+
+    async def wait_state(self, since=None, timeout=30.0):
+        """
+        Latest state newer than version `since` (default: the last one
+        returned). Raises asyncio.TimeoutError.
+        """
+        since = self.seen if since is None else since
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.version <= since:
+            self.changed.clear()
+            await asyncio.wait_for(self.changed.wait(), max(deadline - loop.time(), 0))
+        self.seen = self.version
+        return self.state
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def is_my_turn(state):
+    return bool(
+        state
+        and state.get("game_active")
+        and state.get("current_player_index") == state.get("my_player_index")
+    )
+
+
+def is_game_over(state):
+    if not state:
+        return False
+    # HTTP reports game_over, TCP ends with a winner on an inactive game
+    return bool(state.get("game_over") or (not state.get("game_active") and state.get("winner")))
+
+
+def legal_plays(state):
+    """Every legal play (as lists of card dicts) for state's hand against the table."""
+    hand_data = {c["number"]: c for c in state.get("my_hand") or []}
+    hand = cards_from_data(hand_data.values())
+    played = cards_from_data(state.get("played_cards") or [])
+    for combo in legal_combinations(hand, played):
+        yield [hand_data[card.number] for card in combo]
+
+
+def lowest_policy(state):
+    """Play the legal play with the lowest top card; pass if there is none."""
+    plays = list(legal_plays(state))
+    if not plays:
+        return []
+    return min(plays, key=lambda cards: (cards[-1]["number"], len(cards)))
+
+
+def passive_policy(state):
+    """Pass whenever allowed; only lead when the table is empty."""
+    if state.get("played_cards"):
+        return []
+    return lowest_policy(state)
+
+
+class RandomPolicy:
+    """Pick a random legal play, passing with probability pass_rate when allowed."""
+
+    def __init__(self, pass_rate=0.2, seed=None):
+        self.pass_rate = pass_rate
+        self.random = random.Random(seed)
+
+    def __call__(self, state):
+        if state.get("played_cards") and self.random.random() < self.pass_rate:
+            return []
+        plays = list(legal_plays(state))
+        return self.random.choice(plays) if plays else []
+
+
+POLICIES = {
+    "lowest": lowest_policy,
+    "passive": passive_policy,
+    "random": RandomPolicy,
+}
+
+
+async def run_bot(client, policy, games=1, start=False, timeout=60.0):
+    """
+    Play with `policy` until `games` games have ended. The session must
+    already be joined; with start=True this bot starts every game,
+    otherwise somebody else has to. Returns the number of moves made.
+    """
+    moves = 0
+    target = client.games_finished + games
+    finished = client.games_finished
+    fell_back = False
+    if start:
+        await client.start_game()
+    while client.games_finished < target:
+        state = await client.wait_state(timeout=timeout)
+        if client.games_finished != finished:
+            finished = client.games_finished
+            if start and finished < target:
+                await client.start_game()
+                continue
+
+        if not is_my_turn(state):
+            continue
+
+        if client.last_error:
+            # The server refused our last move (a rule the client-side check
+            # misses, or a lost race); pass so the bot doesn't get stuck
+            error, client.last_error = client.last_error, None
+            if fell_back or not state.get("played_cards"):
+                raise BotError(f"{client.player_name}: move refused: {error}")
+            logger.warning(f"{client.player_name}: {error}, passing instead")
+            fell_back = True
+            await client.pass_turn()
+            continue
+
+        fell_back = False
+
+        cards = policy(state)
+        if cards:
+            await client.play(cards)
+        else:
+            await client.pass_turn()
+        moves += 1
+    return moves
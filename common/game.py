@@ -1,8 +1,13 @@
+import csv
+import functools
+import itertools
 import random
 import sys
-from pygame_cards.classics import CardSets
+import threading
+import time
 import math
 import pygame
+from collections import deque
 from enum import Enum
 
 # Constants
@@ -26,13 +31,35 @@ HIGHLIGHT_COLOR = (255, 255, 0)
 SELECTED_COLOR = (0, 255, 255)
 PYGAME_CARDS_AVAILABLE = True
 
-unordered_set = [
-    CardSets.n52[26:39],
-    CardSets.n52[39:52],
-    CardSets.n52[13:26],
-    CardSets.n52[0:13],
-]
-card_sets = [card for group in unordered_set for card in group]
+_card_graphics = None  # (unordered_set, card_sets) once loaded
+_card_graphics_lock = threading.Lock()
+
+
+def load_card_graphics():
+    """
+    pygame_cards cards grouped by suit (unordered_set) and flattened in
+    Big Two order (card_sets). Importing pygame_cards pulls in its emoji
+    renderer, so it is left until the first card is drawn or
+    preload_assets() runs.
+    """
+    global _card_graphics
+    with _card_graphics_lock:
+        if _card_graphics is None:
+            from pygame_cards.classics import CardSets
+
+            n52 = CardSets.n52  # builds a new set on every access
+            groups = [n52[26:39], n52[39:52], n52[13:26], n52[0:13]]
+            _card_graphics = (groups, [card for group in groups for card in group])
+    return _card_graphics
+
+
+def __getattr__(name):
+    # unordered_set and card_sets used to be built at import time
+    if name == "unordered_set":
+        return load_card_graphics()[0]
+    if name == "card_sets":
+        return load_card_graphics()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class GameState(Enum):
@@ -79,19 +106,18 @@ class Card:
         else:
             self.pp_value = self.value + 3
 
-        # Use pygame_cards graphics
-        big2_value = (self.value + 1) % 13
-        self.pygame_card = card_sets[big2_value + 13 * self.suit]
         self.rect = pygame.Rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
 
+    @property
+    def pygame_card(self):
+        big2_value = (self.value + 1) % 13
+        return load_card_graphics()[1][big2_value + 13 * self.suit]
+
     def display(self, screen, left, top):
         self.rect = pygame.Rect(left, top, CARD_WIDTH, CARD_HEIGHT)
 
-        # Draw card using pygame_cards
-        card_image = pygame.transform.scale(
-            self.pygame_card.graphics.surface, (CARD_WIDTH, CARD_HEIGHT)
-        )
-        screen.blit(card_image, (left, top))
+        # Draw card using the pre-scaled pygame_cards graphics
+        screen.blit(render_cache.card(self.number), (left, top))
 
         # Highlight if selected
         if self.selected:
@@ -105,30 +131,15 @@ class CapsaClientCard:
         self.value = card_data["value"]
         self.pp_value = card_data["pp_value"]
         self.selected = card_data.get("selected", False)
-
-        try:
-            # Test if card_sets is available from game.py import
-            test_card = card_sets[0] if card_sets else None
-            PYGAME_CARDS_AVAILABLE = True
-        except (ImportError, NameError, IndexError):
-            print("pygame_cards not available, using simple card display")
-            PYGAME_CARDS_AVAILABLE = False
-
-        # Setup pygame_cards graphics seperti di game.py
-        if PYGAME_CARDS_AVAILABLE:
-            big2_value = (self.value + 1) % 13
-            self.pygame_card = card_sets[big2_value + 13 * self.suit]
-
         self.rect = pygame.Rect(0, 0, CARD_WIDTH, CARD_HEIGHT)
 
+    pygame_card = Card.pygame_card
+
     def display(self, screen, left, top, selected=False):
         self.rect = pygame.Rect(left, top, CARD_WIDTH, CARD_HEIGHT)
 
         if PYGAME_CARDS_AVAILABLE:
-            card_image = pygame.transform.scale(
-                self.pygame_card.graphics.surface, (CARD_WIDTH, CARD_HEIGHT)
-            )
-            screen.blit(card_image, (left, top))
+            screen.blit(render_cache.card(self.number), (left, top))
         else:
             # Fallback simple drawing
             pygame.draw.rect(screen, WHITE, self.rect)
@@ -138,27 +149,147 @@ class CapsaClientCard:
             suits = ["♦", "♣", "♥", "♠"]
             suit_colors = [RED, BLACK, RED, BLACK]
 
-            font = pygame.font.Font(None, 24)
-            text = font.render(f"{self.pp_value}", True, suit_colors[self.suit])
+            text = render_cache.text(f"{self.pp_value}", 24, suit_colors[self.suit])
             screen.blit(text, (left + 5, top + 5))
 
-            suit_font = pygame.font.Font(None, 36)
-            suit_text = suit_font.render(suits[self.suit], True, suit_colors[self.suit])
+            suit_text = render_cache.text(suits[self.suit], 36, suit_colors[self.suit])
             screen.blit(
                 suit_text, (left + CARD_WIDTH // 2 - 10, top + CARD_HEIGHT // 2 - 15)
             )
 
         # Better highlight for selected cards
         if selected:
-            # Draw a thick colored border around the selected card
-            pygame.draw.rect(screen, SELECTED_COLOR, self.rect, 6)
-            # Also draw a glow effect
-            glow_rect = pygame.Rect(left - 3, top - 3, CARD_WIDTH + 6, CARD_HEIGHT + 6)
-            pygame.draw.rect(screen, HIGHLIGHT_COLOR, glow_rect, 3)
+            draw_selection(screen, self.rect)
 
         return self.rect
 
 
+def draw_selection(screen, rect):
+    # Draw a thick colored border around the selected card
+    pygame.draw.rect(screen, SELECTED_COLOR, rect, 6)
+    # Also draw a glow effect
+    pygame.draw.rect(screen, HIGHLIGHT_COLOR, rect.inflate(6, 6), 3)
+
+
+class RenderCache:
+    """
+    Rendering assets that draw_game used to rebuild every frame: one
+    texture atlas with all 52 cards pre-scaled to CARD_WIDTH x CARD_HEIGHT,
+    fonts by size, rendered text and the table background.
+
+    Everything is built lazily on first use, after pygame.init() and
+    ideally after the display mode is set so surfaces can be converted to
+    the screen format and blitted without per-pixel conversion. The atlas,
+    the slow part, can be built ahead by preload_assets() and is then
+    converted on first use.
+    """
+
+    MAX_TEXTS = 512
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.atlas = None
+        self.converted = False  # atlas is in the display's pixel format
+        self.cards = {}  # card number -> subsurface of the atlas
+        self.fonts = {}  # size -> pygame.font.Font
+        self.texts = {}  # (text, size, color) -> rendered surface
+        self.backgrounds = {}  # (width, height) -> table background
+
+    def build_atlas(self):
+        """Scale every card into the atlas. Safe to run off the main thread."""
+        with self.lock:
+            if self.atlas is not None:
+                return
+            card_sets = load_card_graphics()[1]
+            pygame.font.init()  # pygame_cards renders labels with pygame.font
+            atlas = pygame.Surface((13 * CARD_WIDTH, 4 * CARD_HEIGHT), pygame.SRCALPHA)
+            for number in range(52):
+                value, suit = number // 4, number % 4
+                big2_value = (value + 1) % 13
+                card_image = pygame.transform.scale(
+                    card_sets[big2_value + 13 * suit].graphics.surface, (CARD_WIDTH, CARD_HEIGHT)
+                )
+                atlas.blit(card_image, (value * CARD_WIDTH, suit * CARD_HEIGHT))
+            self.slice_atlas(atlas)
+
+    def slice_atlas(self, atlas):
+        self.atlas = atlas
+        self.cards = {
+            number: atlas.subsurface(
+                pygame.Rect((number // 4) * CARD_WIDTH, (number % 4) * CARD_HEIGHT, CARD_WIDTH, CARD_HEIGHT)
+            )
+            for number in range(52)
+        }
+
+    def card(self, number):
+        if not self.converted:
+            if self.atlas is None:
+                self.build_atlas()
+            # A preloaded atlas is converted once the display exists
+            if pygame.display.get_surface():
+                self.slice_atlas(self.atlas.convert_alpha())
+                self.converted = True
+        return self.cards[number]
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def text(self, text, size, color):
+        key = (text, size, color)
+        surface = self.texts.get(key)
+        if surface is None:
+            if len(self.texts) >= self.MAX_TEXTS:
+                self.texts.clear()  # names and messages churn slowly, just start over
+            surface = self.texts[key] = self.font(size).render(text, True, color)
+        return surface
+
+    def shade(self):
+        """Translucent overlay for cards that cannot be played."""
+        surface = self.backgrounds.get("shade")
+        if surface is None:
+            surface = pygame.Surface((CARD_WIDTH, CARD_HEIGHT), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 110))
+            self.backgrounds["shade"] = surface
+        return surface
+
+    def background(self, width, height):
+        surface = self.backgrounds.get((width, height))
+        if surface is None:
+            surface = pygame.Surface((width, height))
+            surface.fill(DARK_GREEN)
+            table_rect = pygame.Rect(width // 6, height // 4, 2 * width // 3, height // 2)
+            pygame.draw.ellipse(surface, GREEN, table_rect)
+            pygame.draw.ellipse(surface, BLACK, table_rect, 3)
+            if pygame.display.get_surface():
+                surface = surface.convert()
+            self.backgrounds[(width, height)] = surface
+        return surface
+
+
+render_cache = RenderCache()
+
+
+def preload_assets():
+    """
+    Build the card atlas on a background thread, e.g. while the terminal
+    session menu waits for input, so the first game frame doesn't have to.
+    """
+
+    def load():
+        try:
+            render_cache.build_atlas()
+        except Exception as e:
+            # The first frame builds it again and reports the error there
+            print(f"Card graphics preload failed: {e}")
+
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    return thread
+
+
 def show_session_menu():
     print("\n" + "=" * 50)
     print("CAPSA MULTIPLAYER - SESSION SELECTION")
@@ -409,44 +540,256 @@ def play(some_cards, hand, cards):
             return 2
 
 
+PLAY_ERROR_MESSAGES = {
+    1: "You must include the 3 of diamonds in your play",
+    2: "Invalid hand, try again!",
+    3: "You must play a higher pair than the previous play!",
+    4: "A three card play must be a three of a kind!",
+    5: "You must play a higher three of a kind than the previous play!",
+    6: "There is no valid four card play!",
+    7: "Invalid hand, try again!",
+    8: "You need to play a stronger hand!",
+    9: "You need to play a higher suit!",
+    10: "You need to play a better hand!",
+}
+
+
+def cards_from_data(cards_data):
+    """Card objects for card dicts from the server, sorted as the server sorts a play."""
+    return sorted((cards_by_number[c["number"]] for c in cards_data), key=lambda card: card.number)
+
+
+def check_play(selected_data, hand_data, played_data):
+    """
+    Client-side play() on card dicts. Returns 0 if the server will accept
+    the selection, otherwise the play() error code (see PLAY_ERROR_MESSAGES).
+    """
+    return play(cards_from_data(selected_data), cards_from_data(hand_data), cards_from_data(played_data))
+
+
+def playable_cards(hand_data, played_data):
+    """Numbers of the cards in hand that are part of at least one legal play."""
+    return playable_numbers(
+        tuple(c["number"] for c in hand_data), tuple(c["number"] for c in played_data)
+    )
+
+
+def five_card_candidate(cards):
+    # Cheap shape test so play() only runs on possible straights, flushes,
+    # full houses and four of a kinds
+    values = [card.value for card in cards]
+    if len({card.suit for card in cards}) == 1:
+        return True
+    if values == list(range(values[0], values[0] + 5)):
+        return True
+    return len(set(values)) == 2
+
+
+def legal_combinations(hand, played, skip=None):
+    """
+    Yield every legal play from hand against played as a tuple of cards,
+    lowest numbers first. skip(combo) can rule out a candidate before the
+    full play() check.
+    """
+    hand = sorted(hand, key=lambda card: card.number)
+    sizes = (len(played),) if played else (1, 2, 3, 5)
+    for size in sizes:
+        for combo in itertools.combinations(hand, size):
+            if skip and skip(combo):
+                continue
+            if size in (2, 3) and combo[0].value != combo[-1].value:
+                continue
+            if size == 5 and not five_card_candidate(combo):
+                continue
+            if play(list(combo), hand, played) == 0:
+                yield combo
+
+
+@functools.lru_cache(maxsize=64)
+def playable_numbers(hand_numbers, played_numbers):
+    hand = [cards_by_number[n] for n in hand_numbers]
+    played = [cards_by_number[n] for n in sorted(played_numbers)]
+
+    playable = set()
+
+    def covered(combo):
+        # A combination made only of cards already known playable adds nothing
+        return all(card.number in playable for card in combo)
+
+    for combo in legal_combinations(hand, played, skip=covered):
+        playable.update(card.number for card in combo)
+    return frozenset(playable)
+
+
 def draw_game(screen, client, WIDTH, HEIGHT):
-    screen.fill(DARK_GREEN)
+    card_rects, button_rects = draw_scene(screen, client, WIDTH, HEIGHT)
+    overlay = getattr(client, "debug", None)
+    if overlay and overlay.enabled:
+        overlay.tick()
+        overlay.draw(screen)
+    if client.connected and client.message and client.message_timer > 0:
+        client.message_timer -= 1
+    return card_rects, button_rects
 
-    # Draw table background seperti di game.py
-    table_rect = pygame.Rect(WIDTH // 6, HEIGHT // 4, 2 * WIDTH // 3, HEIGHT // 2)
-    pygame.draw.ellipse(screen, GREEN, table_rect)
-    pygame.draw.ellipse(screen, BLACK, table_rect, 3)
 
-    font_large = pygame.font.Font(None, 36)
-    font_medium = pygame.font.Font(None, 24)
-    font_small = pygame.font.Font(None, 20)
+class DebugOverlay:
+    """
+    Lag diagnostics drawn over the table: a histogram of frame intervals,
+    draw time, the age of the last game state (and over HTTP of the last
+    poll answer, which is a 304 while nothing changed) and the network
+    round trip (request time over HTTP, PING/PONG over TCP). F3 toggles
+    it; F4 writes every sample taken while it was on to a CSV file.
+    """
+
+    TOGGLE_KEY = pygame.K_F3
+    EXPORT_KEY = pygame.K_F4
+    BUCKETS = (20, 34, 50, 100)  # frame interval histogram bounds, ms
+    MAX_SAMPLES = 100000
+    WIDTH, HEIGHT = 260, 168
+
+    def __init__(self, rtt_label="RTT"):
+        self.enabled = False
+        self.rtt_label = rtt_label
+        self.samples = deque(maxlen=self.MAX_SAMPLES)  # (unix time, kind, ms) for the CSV
+        self.frames = deque(maxlen=300)  # recent frame intervals, ms
+        self.draws = deque(maxlen=300)  # recent draw times, ms
+        self.rtts = deque(maxlen=50)
+        self.last_frame = None
+        self.last_state = None
+        self.last_poll = None  # only set by polling clients
+        self.panel = None
+
+    def handle_key(self, key):
+        """Returns True if the key was one of the overlay's."""
+        if key == self.TOGGLE_KEY:
+            self.enabled = not self.enabled
+            self.last_frame = None
+            return True
+        if key == self.EXPORT_KEY:
+            self.export_csv()
+            return True
+        return False
+
+    def record(self, kind, ms):
+        self.samples.append((time.time(), kind, ms))
+
+    def tick(self):
+        """Call once per frame."""
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            ms = (now - self.last_frame) * 1000
+            self.frames.append(ms)
+            self.record("frame", ms)
+        self.last_frame = now
+
+    def drawn(self, ms):
+        if self.enabled:
+            self.draws.append(ms)
+            self.record("draw", ms)
+
+    def state_received(self):
+        """A GAME_UPDATE or a poll response with a changed state arrived."""
+        now = time.perf_counter()
+        if self.enabled and self.last_state is not None:
+            self.record("update_gap", (now - self.last_state) * 1000)
+        self.last_state = now
+
+    def poll_answered(self, status_code):
+        # Called from the poller thread for every answer, 304s included
+        self.last_poll = time.perf_counter()
+
+    def round_trip(self, ms):
+        # May be called from network threads; deque appends are atomic
+        if self.enabled:
+            self.rtts.append(ms)
+            self.record("rtt", ms)
+
+    def rect(self, width):
+        return pygame.Rect(width - self.WIDTH - 10, 130, self.WIDTH, self.HEIGHT)
+
+    def draw(self, screen):
+        rect = self.rect(screen.get_width())
+        if self.panel is None:
+            self.panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self.panel.fill((0, 0, 0, 170))
+        screen.blit(self.panel, rect.topleft)
+        font = render_cache.font(20)  # numbers change every frame, so not render_cache.text
+
+        frames = sorted(self.frames)
+        counts = [0] * (len(self.BUCKETS) + 1)
+        for ms in frames:
+            counts[next((i for i, bound in enumerate(self.BUCKETS) if ms < bound), len(self.BUCKETS))] += 1
+        labels = [f"<{bound}" for bound in self.BUCKETS] + [f"{self.BUCKETS[-1]}+"]
+        bar_width = (rect.width - 20) // len(counts)
+        top = max(counts) or 1
+        for i, (count, label) in enumerate(zip(counts, labels)):
+            height = int(40 * count / top)
+            left = rect.x + 10 + i * bar_width
+            color = (LIGHT_BLUE, HIGHLIGHT_COLOR)[i] if i < 2 else RED  # 60 FPS, 30 FPS, worse
+            pygame.draw.rect(screen, color, (left + 2, rect.y + 50 - height, bar_width - 4, height))
+            screen.blit(font.render(label, True, LIGHT_GREY), (left + 4, rect.y + 52))
+
+        lines = []
+        if frames:
+            draw_p99 = sorted(self.draws)[int(len(self.draws) * 0.99)] if self.draws else 0
+            lines.append(
+                f"frame p50 {frames[len(frames) // 2]:.1f}  p99 {frames[int(len(frames) * 0.99)]:.1f}  draw {draw_p99:.1f} ms"
+            )
+        else:
+            lines.append("frame: collecting...")
+        if self.last_state is None:
+            lines.append("last update: none yet")
+        else:
+            lines.append(f"last update {time.perf_counter() - self.last_state:.1f} s ago")
+        if self.last_poll is not None:
+            lines.append(f"last poll answer {time.perf_counter() - self.last_poll:.1f} s ago")
+        if self.rtts:
+            lines.append(
+                f"{self.rtt_label} last {self.rtts[-1]:.0f}  avg {sum(self.rtts) / len(self.rtts):.0f} ms"
+            )
+        else:
+            lines.append(f"{self.rtt_label}: no samples yet")
+        lines.append("F3 hide   F4 export CSV")
+        for i, line in enumerate(lines):
+            screen.blit(font.render(line, True, WHITE), (rect.x + 10, rect.y + 72 + i * 18))
+        return rect
+
+    def export_csv(self, path=None):
+        path = path or time.strftime("capsa_debug_%Y%m%d_%H%M%S.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "kind", "ms"])
+            writer.writerows((f"{t:.3f}", kind, f"{ms:.2f}") for t, kind, ms in list(self.samples))
+        print(f"- Debug samples written to {path}")
+        return path
+
+
+def draw_scene(screen, client, WIDTH, HEIGHT):
+    # Fonts, text, the table and card images all come pre-rendered from render_cache
+    screen.blit(render_cache.background(WIDTH, HEIGHT), (0, 0))
+    text = render_cache.text
 
     if not client.connected:
-        error_text = font_large.render("DISCONNECTED", True, RED)
+        error_text = text("DISCONNECTED", 36, RED)
         screen.blit(error_text, (WIDTH // 2 - 100, HEIGHT // 2))
         return [], []
 
     # Title with session info
-    title = font_large.render(f"CAPSA MULTIPLAYER - {client.session_name}", True, WHITE)
+    title = text(f"CAPSA MULTIPLAYER - {client.session_name}", 36, WHITE)
     screen.blit(title, (WIDTH // 2 - title.get_width() // 2, 10))
 
     # Player info with custom names
     if client.player_name:
-        player_text = font_medium.render(
-            f"You: {client.player_name}", True, SELECTED_COLOR
-        )
+        player_text = text(f"You: {client.player_name}", 24, SELECTED_COLOR)
         screen.blit(player_text, (10, 50))
 
     # Current player with custom names
-    current_text = font_medium.render(
-        f"Turn: {client.game_data['current_player_name']}", True, WHITE
-    )
+    current_text = text(f"Turn: {client.game_data['current_player_name']}", 24, WHITE)
     screen.blit(current_text, (10, 80))
 
     # Players info with custom names and better formatting
     y_pos = 120
-    title_players = font_medium.render("Players:", True, WHITE)
-    screen.blit(title_players, (10, y_pos))
+    screen.blit(text("Players:", 24, WHITE), (10, y_pos))
     y_pos += 30
 
     # Get list of players who passed this round
@@ -480,70 +823,70 @@ def draw_game(screen, client, WIDTH, HEIGHT):
                 status_suffix = ""
 
             # Show slot number, custom name, and pass status
-            text = font_small.render(
+            slot_text = text(
                 f"{prefix}Slot {i + 1}: {name} ({count} cards){status_suffix}",
-                True,
+                20,
                 color,
             )
-            screen.blit(text, (15, y_pos))
+            screen.blit(slot_text, (15, y_pos))
             y_pos += 25
 
-    # Draw played cards in center menggunakan pygame_cards
-    if client.game_data["played_cards"]:
+    # Draw played cards in center from the card atlas
+    played_cards = client.game_data["played_cards"]
+    if played_cards:
         center_x = WIDTH // 2
         center_y = HEIGHT // 2
-
-        played_cards = [
-            CapsaClientCard(card_data) for card_data in client.game_data["played_cards"]
-        ]
         start_x = center_x - (len(played_cards) * (CARD_WIDTH + 5) // 2)
 
-        for i, card in enumerate(played_cards):
+        for i, card_data in enumerate(played_cards):
             x = start_x + i * (CARD_WIDTH + 5)
             y = center_y - CARD_HEIGHT // 2
-            card.display(screen, x, y)
+            screen.blit(render_cache.card(card_data["number"]), (x, y))
 
-    # Draw my hand menggunakan pygame_cards seperti di game.py
-    card_rects = []
-    if client.game_data["my_hand"]:
-        # Store both the card object and original data together
-        my_cards_data = client.game_data["my_hand"]
-        my_cards = [CapsaClientCard(card_data) for card_data in my_cards_data]
+    my_turn = (
+        client.game_data["game_active"]
+        and client.player_index == client.game_data["current_player_index"]
+    )
 
+    # Draw my hand, dimming cards that cannot be part of any legal play
+    card_rects = []
+    my_cards_data = client.game_data["my_hand"]
+    if my_cards_data:
+        playable = playable_cards(my_cards_data, played_cards) if my_turn else None
         start_x = 50
         start_y = HEIGHT - CARD_HEIGHT - 50
-        card_spacing = min(50, (WIDTH - 100) // len(my_cards))
+        card_spacing = min(50, (WIDTH - 100) // len(my_cards_data))
 
         temp_card = []
-        for i, (card, card_data) in enumerate(zip(my_cards, my_cards_data)):
+        for i, card_data in enumerate(my_cards_data):
             x = start_x + i * card_spacing
             selected = i in client.selected_cards
             y = start_y - (30 if selected else 0)  # Raise selected cards more
 
-            rect = card.display(screen, x, y, selected)
-            temp_card.append((rect, card_data))  # Use the paired original data
+            rect = pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+            screen.blit(render_cache.card(card_data["number"]), rect)
+            if playable is not None and card_data["number"] not in playable:
+                screen.blit(render_cache.shade(), rect)
+            if selected:
+                draw_selection(screen, rect)
+            temp_card.append((rect, card_data))
         card_rects = temp_card[::-1]
 
     # Draw buttons
     button_rects = []
-    if (
-        client.game_data["game_active"]
-        and client.player_index == client.game_data["current_player_index"]
-    ):
+    if my_turn:
         # Play button
         play_rect = pygame.Rect(WIDTH - 200, HEIGHT - 100, 80, 40)
         pygame.draw.rect(screen, GREEN, play_rect)
         pygame.draw.rect(screen, BLACK, play_rect, 2)
-        play_text = font_medium.render("PLAY", True, WHITE)
-        screen.blit(play_text, (play_rect.x + 20, play_rect.y + 12))
+        screen.blit(text("PLAY", 24, WHITE), (play_rect.x + 20, play_rect.y + 12))
         button_rects.append(("PLAY", play_rect))
 
         # Pass button
         pass_rect = pygame.Rect(WIDTH - 110, HEIGHT - 100, 80, 40)
         pygame.draw.rect(screen, RED, pass_rect)
         pygame.draw.rect(screen, BLACK, pass_rect, 2)
-        pass_text = font_medium.render("PASS", True, WHITE)
-        screen.blit(pass_text, (pass_rect.x + 20, pass_rect.y + 12))
+        screen.blit(text("PASS", 24, WHITE), (pass_rect.x + 20, pass_rect.y + 12))
         button_rects.append(("PASS", pass_rect))
 
     # Start game button
@@ -551,38 +894,143 @@ def draw_game(screen, client, WIDTH, HEIGHT):
         start_rect = pygame.Rect(WIDTH // 2 - 60, HEIGHT - 60, 120, 40)
         pygame.draw.rect(screen, BLUE, start_rect)
         pygame.draw.rect(screen, BLACK, start_rect, 2)
-        start_text = font_medium.render("START GAME", True, WHITE)
-        screen.blit(start_text, (start_rect.x + 10, start_rect.y + 12))
+        screen.blit(text("START GAME", 24, WHITE), (start_rect.x + 10, start_rect.y + 12))
         button_rects.append(("START", start_rect))
 
     # Draw message
     if client.message and client.message_timer > 0:
-        msg_text = font_medium.render(client.message, True, WHITE)
+        msg_text = text(client.message, 24, WHITE)
         msg_rect = msg_text.get_rect(center=(WIDTH // 2, 100))
         pygame.draw.rect(screen, BLACK, msg_rect.inflate(20, 10))
         pygame.draw.rect(screen, WHITE, msg_rect.inflate(20, 10), 2)
         screen.blit(msg_text, msg_rect)
-        client.message_timer -= 1
 
-    # Show selected cards count
+    # Show selected cards count, in red if the server would reject them
     if client.selected_cards:
-        selected_text = font_medium.render(
-            f"Selected: {len(client.selected_cards)} cards", True, SELECTED_COLOR
+        selected_data = [my_cards_data[i] for i in client.selected_cards if i < len(my_cards_data)]
+        valid = not my_turn or check_play(selected_data, my_cards_data, played_cards) == 0
+        selected_text = text(
+            f"Selected: {len(client.selected_cards)} cards", 24, SELECTED_COLOR if valid else RED
         )
         screen.blit(selected_text, (WIDTH - 300, HEIGHT - 150))
 
     # Show pass status summary if players have passed
     if players_passed and client.game_data["game_active"]:
         pass_count = len(players_passed)
-        pass_summary = font_small.render(
-            f"{pass_count} player(s) passed this round", True, GREY
-        )
+        pass_summary = text(f"{pass_count} player(s) passed this round", 20, GREY)
         screen.blit(pass_summary, (WIDTH - 250, HEIGHT - 200))
 
     return card_rects, button_rects
 
 
+class GameRenderer:
+    """
+    Retained-mode drawing for the client loops.
+
+    The scene is split into layers (header, players panel, table cards,
+    hand, buttons), each covering a fixed screen region. Every frame the
+    client fields a layer depends on are compared with the last drawn
+    ones; only changed layers have their regions redrawn (clipped, so
+    overlapping layers still composite correctly) and pushed with
+    pygame.display.update(dirty_rects). An idle table draws nothing.
+    """
+
+    def __init__(self, screen, width, height):
+        self.screen = screen
+        self.width = width
+        self.height = height
+        self.keys = None  # layer -> state it was last drawn with
+        self.connected = None
+        self.overlay_shown = False
+        self.card_rects = []
+        self.button_rects = []
+
+    def invalidate(self):
+        """Force a full redraw, e.g. after the window was uncovered."""
+        self.keys = None
+
+    def regions(self):
+        width, height = self.width, self.height
+        return {
+            "header": [pygame.Rect(0, 0, width, 125)],
+            "players": [pygame.Rect(0, 115, width // 2, 140)],
+            "table": [pygame.Rect(0, height // 2 - CARD_HEIGHT // 2, width, CARD_HEIGHT)],
+            "hand": [pygame.Rect(0, height - CARD_HEIGHT - 86, width, CARD_HEIGHT + 42)],
+            "controls": [
+                pygame.Rect(width - 310, height - 210, 310, 160),
+                pygame.Rect(width // 2 - 63, height - 63, 126, 46),
+            ],
+        }
+
+    def layer_keys(self, client):
+        data = client.game_data
+        passed = tuple(data.get("players_passed") or ())
+        table = tuple(card["number"] for card in data.get("played_cards") or ())
+        my_turn = data.get("game_active") and client.player_index == data.get("current_player_index")
+        return {
+            "header": (
+                client.session_name,
+                client.player_name,
+                data.get("current_player_name"),
+                client.message if client.message_timer > 0 else None,
+            ),
+            "players": (
+                tuple(data.get("players_names") or ()),
+                tuple(data.get("players_card_counts") or ()),
+                passed,
+                data.get("current_player_index"),
+                client.player_index,
+            ),
+            "table": table,
+            "hand": (
+                tuple(card["number"] for card in data.get("my_hand") or ()),
+                tuple(client.selected_cards),
+                table,
+                my_turn,
+            ),
+            "controls": (data.get("game_active"), my_turn, tuple(client.selected_cards), table, len(passed)),
+        }
+
+    def render(self, client):
+        """Redraw what changed. Returns the dirty rects to pass to pygame.display.update."""
+        keys = self.layer_keys(client)
+        full = self.keys is None or client.connected != self.connected
+        if full:
+            dirty = [self.screen.get_rect()]
+        else:
+            regions = self.regions()
+            dirty = [rect for layer, key in keys.items() if key != self.keys[layer] for rect in regions[layer]]
+        self.keys = keys
+        self.connected = client.connected
+
+        # The debug overlay changes every frame; it and the scene under it
+        # are redrawn while it is shown, and once more when it is hidden
+        overlay = getattr(client, "debug", None)
+        shown = bool(overlay and overlay.enabled)
+        if (shown or self.overlay_shown) and not full:
+            dirty.append(overlay.rect(self.width))
+        self.overlay_shown = shown
+
+        started = time.perf_counter()
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.card_rects, self.button_rects = draw_scene(self.screen, client, self.width, self.height)
+        self.screen.set_clip(None)
+        if shown:
+            overlay.tick()
+            overlay.draw(self.screen)
+            overlay.drawn((time.perf_counter() - started) * 1000)
+
+        # Counts frames like draw_game; reaching 0 changes the header key next frame
+        if client.message and client.message_timer > 0:
+            client.message_timer -= 1
+        return dirty
+
+
 # Initialize deck
 deck = []
 for i in range(52):
     deck.append(Card(i))
+
+# deal() shuffles deck in place, so look cards up by number here
+cards_by_number = {card.number: card for card in deck}
@@ -0,0 +1,161 @@
+import logging
+import queue
+import threading
+import time
+
+WINS_KEY = "leaderboard:wins"
+STATS_PREFIX = "player_stats:"
+
+logger = logging.getLogger(__name__)
+
+FIVE_CARD_HANDS = {
+    1: "straight",
+    2: "flush",
+    3: "full_house",
+    4: "four_of_a_kind",
+    5: "straight_flush",
+}
+SMALL_HANDS = {1: "single", 2: "pair", 3: "triple"}
+
+
+def hand_type(cards):
+    """Name of a valid play, using the same ranking as value_checker."""
+    if len(cards) != 5:
+        return SMALL_HANDS.get(len(cards), "other")
+
+    cards = sorted(cards, key=lambda card: card.number)
+    values = [card.value - cards[0].value for card in cards]
+    flush = len({card.suit for card in cards}) == 1
+    if values == [0, 1, 2, 3, 4]:
+        return FIVE_CARD_HANDS[5 if flush else 1]
+    if flush:
+        return FIVE_CARD_HANDS[2]
+    if values[0] == values[1] and values[3] == values[4] and values[2] in (values[1], values[3]):
+        return FIVE_CARD_HANDS[3]
+    if values[0] == values[3] or values[1] == values[4]:
+        return FIVE_CARD_HANDS[4]
+    return "other"
+
+
+class PlayerStats:
+    """
+    Per-player statistics and the wins leaderboard.
+
+    player_stats:<name> is a hash of counters (games, wins, losses,
+    cards_left at loss, hand:<type> plays) and leaderboard:wins a sorted
+    set of wins, so top-N and rank lookups are O(log n). A finished game is
+    written as one pipelined batch of HINCRBY/ZINCRBY; record_game_later()
+    leaves that batch to a background thread, so a finished game never
+    waits on Redis for statistics. Query results are cached in-process for
+    cache_ttl seconds so the lobby can show them on every refresh.
+    """
+
+    def __init__(self, redis_client, cache_ttl=5.0):
+        self.redis = redis_client
+        self.cache_ttl = cache_ttl
+        self.lock = threading.Lock()
+        self.hands = {}  # session_id -> {player_index: {hand type: count}} for the running game
+        self.cache = {}  # query -> (expires_at, result)
+        self.writes = queue.Queue()  # (session_id, players, winner_index, hands) for the writer thread
+        self.writer = None
+
+    def key(self, name):
+        return STATS_PREFIX + name
+
+    def game_started(self, session_id):
+        with self.lock:
+            self.hands[session_id] = {}
+
+    def hand_played(self, session_id, player_index, cards):
+        with self.lock:
+            counts = self.hands.setdefault(session_id, {}).setdefault(player_index, {})
+            kind = hand_type(cards)
+            counts[kind] = counts.get(kind, 0) + 1
+
+    def forget(self, session_id):
+        with self.lock:
+            self.hands.pop(session_id, None)
+
+    def record_game_later(self, session_id, players, winner_index):
+        """
+        players is a list of (player_index, name, cards_left) for the human
+        seats; AI seats are left out of the statistics. The Redis write is
+        done by a background thread.
+        """
+        with self.lock:
+            # The hand counts are taken now, the session may be forgotten before the write
+            hands = self.hands.pop(session_id, {})
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.write_loop, daemon=True)
+                self.writer.start()
+        self.writes.put((session_id, players, winner_index, hands))
+
+    def write_loop(self):
+        while True:
+            session_id, players, winner_index, hands = self.writes.get()
+            try:
+                self.write_game(players, winner_index, hands)
+            except Exception as e:
+                logger.warning(f"Failed to record stats for session {session_id}: {e}")
+
+    def write_game(self, players, winner_index, hands):
+        if not players:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for player_index, name, cards_left in players:
+            key = self.key(name)
+            won = player_index == winner_index
+            pipe.hincrby(key, "games", 1)
+            if won:
+                pipe.hincrby(key, "wins", 1)
+            else:
+                pipe.hincrby(key, "losses", 1)
+                pipe.hincrby(key, "cards_left", cards_left)
+            for kind, count in hands.get(player_index, {}).items():
+                pipe.hincrby(key, "hand:" + kind, count)
+            # Losers are added with 0 so every player has a rank
+            pipe.zincrby(WINS_KEY, 1 if won else 0, name)
+        pipe.execute()
+
+        with self.lock:
+            self.cache.clear()
+
+    def cached(self, query, compute):
+        now = time.time()
+        with self.lock:
+            hit = self.cache.get(query)
+            if hit and hit[0] > now:
+                return hit[1]
+
+        result = compute()
+        with self.lock:
+            if len(self.cache) > 1000:
+                self.cache = {q: v for q, v in self.cache.items() if v[0] > now}
+            self.cache[query] = (now + self.cache_ttl, result)
+        return result
+
+    def top(self, limit=10):
+        """[{rank, name, wins}, ...] for the best `limit` players."""
+        def compute():
+            rows = self.redis.zrevrange(WINS_KEY, 0, limit - 1, withscores=True)
+            return [
+                {"rank": i + 1, "name": name, "wins": int(score)}
+                for i, (name, score) in enumerate(rows)
+            ]
+
+        return self.cached(("top", limit), compute)
+
+    def player(self, name):
+        """Rank, wins and counters of one player, or None if they never finished a game."""
+        def compute():
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zrevrank(WINS_KEY, name)
+            pipe.hgetall(self.key(name))
+            rank, counters = pipe.execute()
+            if rank is None:
+                return None
+            stats = {field: int(value) for field, value in counters.items()}
+            return dict(stats, name=name, rank=rank + 1, wins=stats.get("wins", 0))
+
+        return self.cached(("player", name), compute)
@@ -0,0 +1,85 @@
+import os
+
+# Settings can come from the environment (REDIS_HOST, REDIS_PORT, ...) or
+# from the command line via add_redis_arguments(); CLI values win.
+DEFAULTS = {
+    "backend": "redis",  # or "memory" for the in-process stand-in
+    "host": "capsagamecache.redis.cache.windows.net",
+    "port": 6380,  # 6380 for SSL/TLS, 6379 for non-SSL
+    "password": "",
+    "db": 0,
+    "ssl": True,
+    "pool_size": 50,
+    "socket_timeout": 5.0,
+    "connect_timeout": 5.0,
+}
+
+PARSERS = {
+    "backend": str,
+    "host": str,
+    "port": int,
+    "password": str,
+    "db": int,
+    "ssl": lambda value: str(value).lower() in ("1", "true", "yes", "on"),
+    "pool_size": int,
+    "socket_timeout": float,
+    "connect_timeout": float,
+}
+
+
+def redis_config(args=None, environ=None):
+    """Merge DEFAULTS, REDIS_* environment variables and parsed CLI args."""
+    environ = os.environ if environ is None else environ
+    config = dict(DEFAULTS)
+    for name, parse in PARSERS.items():
+        value = environ.get(f"REDIS_{name.upper()}")
+        if value not in (None, ""):
+            config[name] = parse(value)
+        cli_value = getattr(args, f"redis_{name}", None)
+        if cli_value is not None:
+            config[name] = parse(cli_value)
+    return config
+
+
+def add_redis_arguments(parser):
+    group = parser.add_argument_group("redis")
+    group.add_argument("--redis-backend", choices=["redis", "memory"])
+    group.add_argument("--redis-host")
+    group.add_argument("--redis-port", type=int)
+    group.add_argument("--redis-password")
+    group.add_argument("--redis-db", type=int)
+    group.add_argument("--redis-ssl", choices=["true", "false"])
+    group.add_argument("--redis-pool-size", type=int)
+    group.add_argument("--redis-socket-timeout", type=float)
+    group.add_argument("--redis-connect-timeout", type=float)
+    return parser
+
+
+def create_redis_client(config=None):
+    """
+    Build a Redis client backed by a connection pool, or a MemoryRedis when
+    backend is "memory". Nothing connects until the first command, so call
+    ping() to fail fast at startup.
+    """
+    config = config or redis_config()
+    if config["backend"] == "memory":
+        # The stand-in emulates the TCP server's Lua scripts, so it lives there
+        from tcp.memory_redis import MemoryRedis
+
+        return MemoryRedis()
+
+    import redis
+
+    pool = redis.BlockingConnectionPool(
+        connection_class=redis.SSLConnection if config["ssl"] else redis.Connection,
+        max_connections=config["pool_size"],
+        timeout=config["connect_timeout"],
+        host=config["host"],
+        port=config["port"],
+        password=config["password"] or None,
+        db=config["db"],
+        socket_timeout=config["socket_timeout"],
+        socket_connect_timeout=config["connect_timeout"],
+        decode_responses=True,
+    )
+    return redis.Redis(connection_pool=pool)
@@ -3,7 +3,74 @@ from datetime import datetime
 import threading
 import json
 import logging
-from game import Player, deal, who_starts, play
+import select
+from game import Player, deal, who_starts, play, PLAY_ERROR_MESSAGES
+from .spectators import SpectatorFanout
+
+# Commands that act on a session; a connection in several sessions tags them with session_id
+SEAT_COMMANDS = ("PLAY_CARDS", "PASS_TURN", "START_GAME", "LEAVE_SESSION")
+
+class ClientConnection:
+    """
+    A client's socket as the server writes to it. Every seat of a
+    connection holding several sessions shares one, and so do handler and
+    AI turn threads of different sessions, so send() writes each message
+    whole under a per-connection lock.
+
+    send_nowait() is for the spectator fan-out thread, which must never
+    wait on a client: it writes only what the socket takes right away and
+    keeps the rest in unsent, which goes out before any later message.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.lock = threading.Lock()
+        self.unsent = b""  # tail of a message send_nowait() could not finish
+        self.written = 0  # bytes written so far, to tell a slow reader from a stuck one
+
+    def send(self, data):
+        with self.lock:
+            data = self.unsent + data
+            self.sock.sendall(data)
+            self.unsent = b""
+            self.written += len(data)
+        return len(data)
+
+    def send_nowait(self, data=b""):
+        """
+        Returns False, taking nothing, while another thread is writing or an
+        earlier tail is still unsent; otherwise data is taken, though part
+        of it may wait in unsent.
+        """
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            if self.unsent:
+                self.unsent = self.unsent[self.send_some(self.unsent):]
+                if self.unsent:
+                    return False
+            if data:
+                self.unsent = data[self.send_some(data):]
+            return True
+        finally:
+            self.lock.release()
+
+    def send_some(self, data):
+        # The socket has a timeout, so send() would wait for room; only call it when there is some
+        if hasattr(select, "poll"):
+            poller = select.poll()
+            poller.register(self.sock, select.POLLOUT)
+            writable = bool(poller.poll(0))
+        else:
+            writable = bool(select.select([], [self.sock], [], 0)[1])
+        if not writable:
+            return 0
+        sent = self.sock.send(data)
+        self.written += sent
+        return sent
+
+    def fileno(self):
+        return self.sock.fileno()
 
 class GameSession:  
     def __init__(self, session_id, session_name, creator_name):
@@ -49,11 +116,14 @@ class CapsaGameServer:
     def __init__(self):
         self.sessions = {}
         self.clients = {}
-        self.lock = threading.Lock()
+        self.lock = threading.RLock()  # send_to_client may call remove_client with it held
         self.running = True
         self.ai_names = ["AI Bot 1", "AI Bot 2", "AI Bot 3", "AI Bot 4"]
+        self.spectators = SpectatorFanout()
 
     def add_client(self, client_id, socket):
+        if not isinstance(socket, ClientConnection):
+            socket = ClientConnection(socket)
         with self.lock:
             print(f"Adding client {client_id}")
 
@@ -78,6 +148,21 @@ class CapsaGameServer:
     def handle_command(self, client_id, command):
         cmd_type = command.get("command")
 
+        if cmd_type in ("CREATE_SESSION", "JOIN_SESSION") and self.in_session(client_id):
+            self.join_as_seat(client_id, command)
+            return
+
+        if cmd_type in SEAT_COMMANDS:
+            seat = self.seat_for(client_id, command.get("session_id"))
+            if seat is None:
+                self.send_to_client(client_id, {
+                    "command": "ERROR",
+                    "message": "You are not in that session",
+                    "session_id": command.get("session_id"),
+                })
+                return
+            client_id = seat
+
         if cmd_type == "CREATE_SESSION":
             session_name = command.get("session_name", "Unnamed Session")
             creator_name = command.get("creator_name", "Anonymous")
@@ -101,9 +186,129 @@ class CapsaGameServer:
         elif cmd_type == "START_GAME":
             self.start_new_game(client_id)
 
+        elif cmd_type == "LEAVE_SESSION":
+            self.leave_session(client_id)
+
+        elif cmd_type == "SPECTATE_SESSION":
+            self.spectate_session(client_id, command.get("session_id"))
+
+        elif cmd_type == "STOP_SPECTATING":
+            self.spectators.remove(command.get("session_id"), client_id)
+
+        elif cmd_type == "PING":
+            # Latency probe from the client's debug overlay, echoed back as is
+            self.send_to_client(client_id, {"command": "PONG", "sent": command.get("sent")})
+
         else:
             logging.warning(f"Unknown command from {client_id}: {cmd_type}")
 
+    def in_session(self, client_id):
+        client_info = self.clients.get(client_id)
+        return bool(client_info and client_info.get("session_id"))
+
+    def seat_for(self, client_id, session_id):
+        """
+        Client id that acts in session_id for a connection: the connection
+        itself for untagged commands and for the session it joined first,
+        otherwise the seat it holds there (see join_as_seat), or None.
+        """
+        client_info = self.clients.get(client_id)
+        if not session_id or not client_info or client_info.get("session_id") == session_id:
+            return client_id
+        seat = client_info.get("seats", {}).get(session_id)
+        if seat in self.clients and self.clients[seat].get("session_id") == session_id:
+            return seat
+        return None
+
+    def join_as_seat(self, client_id, command):
+        """
+        CREATE_SESSION or JOIN_SESSION from a connection already playing in
+        a session. The new session gets a seat: an entry in self.clients
+        that shares the connection's socket, so the session code treats it
+        like any other client. Commands for it carry its session_id.
+        """
+        with self.lock:
+            client_info = self.clients[client_id]
+            seat = f"{client_id}#{uuid.uuid4().hex[:8]}"
+            self.clients[seat] = {
+                "socket": client_info["socket"],
+                "session_id": None,
+                "name": client_info["name"],
+                "player_index": -1,
+                "connection": client_id,
+            }
+
+            # Errors go through the seat: not tagged, like other replies to a join
+            target = command.get("session_id")
+            if target and command.get("command") == "JOIN_SESSION" and self.seat_for(client_id, target):
+                self.send_to_client(seat, {"command": "ERROR", "message": "Already in that session"})
+            else:
+                self.handle_command(seat, command)
+
+            seat_info = self.clients.get(seat)
+            if seat_info and seat_info.get("session_id"):
+                client_info.setdefault("seats", {})[seat_info["session_id"]] = seat
+            else:
+                self.clients.pop(seat, None)  # the create or join was refused
+
+    def leave_session(self, client_id):
+        """Give up one seat, the connection stays open for its other sessions."""
+        with self.lock:
+            client_info = self.clients.get(client_id)
+            if not client_info or not client_info.get("session_id"):
+                return
+            session_id = client_info["session_id"]
+            connection = client_info.get("connection", client_id)
+
+            self.remove_client(client_id)
+            if connection == client_id:
+                self.clients[client_id] = {
+                    "socket": client_info["socket"],
+                    "session_id": None,
+                    "name": client_info["name"],
+                    "player_index": -1,
+                    "seats": client_info.get("seats", {}),
+                }
+            self.send_to_client(connection, {"command": "SESSION_LEFT", "session_id": session_id})
+
+    def disconnect(self, client_id):
+        """The connection closed: remove it and every seat it held."""
+        with self.lock:
+            seats = [
+                seat for seat, info in self.clients.items() if info.get("connection") == client_id
+            ]
+            for seat in seats:
+                self.remove_client(seat)
+            self.spectators.remove_client(client_id)
+            self.remove_client(client_id)
+
+    def spectate_session(self, client_id, session_id):
+        """
+        Watch a table without taking a seat. Spectators are not in
+        session.clients, so they neither count towards the four players nor
+        get a turn; they receive the public view, see publish_spectator_view.
+        """
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if not session or client_id not in self.clients:
+                self.send_to_client(client_id, {"command": "ERROR", "message": "Session not found"})
+                return
+
+            self.spectators.add(session_id, client_id, self.clients[client_id]["socket"])
+            self.send_to_client(client_id, {
+                "command": "SPECTATING",
+                "session_id": session_id,
+                "session_name": session.session_name,
+                "spectators": self.spectators.count(session_id),
+            })
+            if not self.spectators.has_view(session_id):
+                self.publish_spectator_view(session)
+
+    def close_spectating(self, session_id):
+        """The session is gone: stop its spectators' view."""
+        for client_id in self.spectators.close_session(session_id):
+            self.send_to_client(client_id, {"command": "SESSION_CLOSED", "session_id": session_id})
+
     def create_session(self, client_id, session_name, creator_name):
         with self.lock:
             session_id = str(uuid.uuid4())[:8]
@@ -244,6 +449,7 @@ class CapsaGameServer:
 
                 if len(session.clients) == 0:
                     del self.sessions[session_id]
+                    self.close_spectating(session_id)
                     print(f"Empty session '{session.session_name}' removed")
                 else:
                     self.broadcast_game_state_to_session(session_id)
@@ -321,6 +527,11 @@ class CapsaGameServer:
                 session.game_state.played_cards = selected_cards
                 session.game_state.played_cards_history.append(selected_cards.copy())
                 session.game_state.last_player_to_play = player_index  # Track who played
+                self.record_move(session, {
+                    "type": "play",
+                    "player": player_index,
+                    "cards": [card.number for card in selected_cards],
+                })
 
                 # DON'T clear round passes here - only clear when 3 players have passed
                 print(f"Player {player_index} played cards - round continues")
@@ -332,24 +543,11 @@ class CapsaGameServer:
                 self.next_turn(session)
 
             else:
-                error_messages = {
-                    1: "You must include the 3 of diamonds in your play",
-                    2: "Invalid hand, try again!",
-                    3: "You must play a higher pair than the previous play!",
-                    4: "A three card play must be a three of a kind!",
-                    5: "You must play a higher three of a kind than the previous play!",
-                    6: "There is no valid four card play!",
-                    7: "Invalid hand, try again!",
-                    8: "You need to play a stronger hand!",
-                    9: "You need to play a higher suit!",
-                    10: "You need to play a better hand!",
-                }
-
                 self.send_to_client(
                     client_id,
                     {
                         "command": "ERROR",
-                        "message": error_messages.get(result, "Invalid play"),
+                        "message": PLAY_ERROR_MESSAGES.get(result, "Invalid play"),
                     },
                 )
 
@@ -370,6 +568,7 @@ class CapsaGameServer:
 
             # Add to round passes (this round only)
             session.game_state.round_passes.add(player_index)
+            self.record_pass(session, player_index)
 
             # Check if 3 players passed in this round (only 1 left)
             if len(session.game_state.round_passes) >= 3:
@@ -447,6 +646,11 @@ class CapsaGameServer:
                         c.selected_by = current_player.name
                     session.game_state.played_cards_history.append([card])
                     session.game_state.last_player_to_play = player_index  # Track AI play
+                    self.record_move(session, {
+                        "type": "play",
+                        "player": player_index,
+                        "cards": [card.number],
+                    })
 
                     # DON'T clear round passes when AI plays - only when 3 players pass
                     played = True
@@ -456,6 +660,7 @@ class CapsaGameServer:
             if not played:
                 # AI passes this round
                 session.game_state.round_passes.add(player_index)
+                self.record_pass(session, player_index)
                 print(f"❌ AI {current_player.name} passed")
                 
                 # Print detailed pass information for AI
@@ -536,6 +741,7 @@ class CapsaGameServer:
             )
 
             session.game_state.game_active = True
+            self.record_start(session)
 
             print(f"New Capsa game started in session '{session.session_name}'!")
             print(f"Players: {[p.name for p in session.game_state.players]}")
@@ -551,6 +757,33 @@ class CapsaGameServer:
             if not starting_is_human:
                 threading.Timer(2.0, lambda: self.handle_ai_turn(session)).start()
 
+    def record_move(self, session, move):
+        """
+        Hook called for every game event (start, play, pass) after it has
+        been applied to session.game_state. The in-memory server keeps no
+        history; CapsaGameServerProd appends the events to a Redis Stream.
+        """
+        pass
+
+    def record_start(self, session):
+        self.record_move(session, {
+            "type": "start",
+            "player": session.game_state.current_player_index,
+            "names": [p.name for p in session.game_state.players],
+            "hands": [[card.number for card in p.hand] for p in session.game_state.players],
+        })
+
+    def record_pass(self, session, player_index):
+        # A third pass ends the round, which the handlers below apply next
+        game_state = session.game_state
+        ends_round = len(game_state.round_passes) >= 3
+        self.record_move(session, {
+            "type": "pass",
+            "player": player_index,
+            "round_over": ends_round,
+            "leader": game_state.last_player_to_play if ends_round else None,
+        })
+
     def end_game(self, session, winner_name):
         session.game_state.game_active = False
         session.game_state.winner = winner_name
@@ -559,6 +792,7 @@ class CapsaGameServer:
         self.broadcast_message_to_session(
             session.session_id, {"command": "GAME_END", "winner": winner_name}
         )
+        self.publish_spectator_view(session)
 
         print(f"Game ended in session '{session.session_name}'! Winner: {winner_name}")
 
@@ -572,7 +806,11 @@ class CapsaGameServer:
     def send_to_client(self, client_id, message):
         try:
             if client_id in self.clients:
-                socket_obj = self.clients[client_id]["socket"]
+                client_info = self.clients[client_id]
+                if message.get("command") == "ERROR" and client_info.get("session_id"):
+                    # Tell a connection in several sessions which one refused
+                    message = dict(message, session_id=message.get("session_id", client_info["session_id"]))
+                socket_obj = client_info["socket"]
                 msg = json.dumps(message) + "\n"
                 socket_obj.send(msg.encode())
         except Exception as e:
@@ -582,7 +820,7 @@ class CapsaGameServer:
     def send_to_client_direct(self, socket, message):
         try:
             msg = json.dumps(message) + "\n"
-            socket.send(msg.encode())
+            socket.sendall(msg.encode())
         except Exception as e:
             logging.warning(f"Failed to send to socket: {e}")
 
@@ -591,7 +829,7 @@ class CapsaGameServer:
             return
 
         session = self.sessions[session_id]
-        msg = json.dumps(message) + "\n"
+        msg = json.dumps(dict(message, session_id=session_id)) + "\n"
         dead_clients = []
 
         for client_id, client_info in session.clients.items():
@@ -609,6 +847,7 @@ class CapsaGameServer:
             return
 
         session = self.sessions[session_id]
+        public_state = self.public_state(session)
 
         hands_data = {}
         for client_id, client_info in session.clients.items():
@@ -618,34 +857,18 @@ class CapsaGameServer:
                 for card in session.game_state.players[player_index].hand
             ]
 
-        played_cards_data = [
-            self.card_to_dict(card) for card in session.game_state.played_cards
-        ]
-
-        for client_id, client_info in session.clients.items():
-            state_msg = {
-                "command": "GAME_UPDATE",
-                "session_id": session_id,
-                "session_name": session.session_name,
-                "current_player_index": session.game_state.current_player_index,
-                "current_player_name": session.game_state.players[
-                    session.game_state.current_player_index
-                ].name,
-                "players_names": [p.name for p in session.game_state.players],
-                "my_hand": hands_data[client_id],
-                "my_player_index": client_info["player_index"],
-                "played_cards": played_cards_data,
-                "players_card_counts": [
-                    len(p.hand) for p in session.game_state.players
-                ],
-                "game_active": session.game_state.game_active,
-                "winner": session.game_state.winner,
-                # Send round passes only
-                "players_passed": list(session.game_state.round_passes),
-            }
-
+        # A failed send removes that client, and with it maybe others on the same connection
+        for client_id, client_info in list(session.clients.items()):
+            state_msg = dict(
+                public_state,
+                my_hand=hands_data[client_id],
+                my_player_index=client_info["player_index"],
+            )
             self.send_to_client(client_id, state_msg)
 
+        # Queued for the fan-out thread, after the players have theirs
+        self.publish_spectator_view(session, public_state)
+
         current_player_name = session.game_state.players[
             session.game_state.current_player_index
         ].name
@@ -653,6 +876,45 @@ class CapsaGameServer:
             f"Broadcasting game state to session '{session.session_name}' - Current player: {current_player_name}"
         )
 
+    def public_state(self, session):
+        """The GAME_UPDATE fields every player of the session sees alike."""
+        return {
+            "command": "GAME_UPDATE",
+            "session_id": session.session_id,
+            "session_name": session.session_name,
+            "current_player_index": session.game_state.current_player_index,
+            "current_player_name": session.game_state.players[
+                session.game_state.current_player_index
+            ].name,
+            "players_names": [p.name for p in session.game_state.players],
+            "played_cards": [
+                self.card_to_dict(card) for card in session.game_state.played_cards
+            ],
+            "players_card_counts": [
+                len(p.hand) for p in session.game_state.players
+            ],
+            "game_active": session.game_state.game_active,
+            "winner": session.game_state.winner,
+            # Send round passes only
+            "players_passed": list(session.game_state.round_passes),
+        }
+
+    def publish_spectator_view(self, session, public_state=None):
+        """
+        Encode the public view once and hand it to the fan-out thread. It
+        has no hands, but the same keys as a player's GAME_UPDATE so the
+        clients can draw it.
+        """
+        if not self.spectators.watching(session.session_id):
+            return
+        view = dict(
+            public_state or self.public_state(session),
+            my_hand=[],
+            my_player_index=-1,
+            spectator=True,
+        )
+        self.spectators.publish(session.session_id, (json.dumps(view) + "\n").encode())
+
     def card_to_dict(self, card):
         return {
             "number": card.number,
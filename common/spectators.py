@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SpectatorFanout:
+    """
+    Sends the public view of each table to its spectators from a thread of
+    its own.
+
+    publish() only stores the already encoded payload of a table and wakes
+    the fan-out thread, so the players' broadcast never waits on a
+    spectator socket. Every spectator of a table gets the same bytes, and
+    only the newest view: one a slow spectator has not received yet is
+    replaced by the next. Writes go through ClientConnection.send_nowait(),
+    so a spectator that stops reading never holds up the others, and one
+    that takes no bytes at all for STALL_TIMEOUT seconds is dropped.
+    """
+
+    STALL_TIMEOUT = 10.0
+    RETRY_INTERVAL = 0.05  # seconds between attempts while sockets are full
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.watchers = {}  # session_id -> set of spectating client_ids
+        self.sockets = {}  # client_id -> ClientConnection
+        self.latest = {}  # session_id -> (seq, payload)
+        self.sent = {}  # (client_id, session_id) -> seq of the last view sent
+        self.stalled = {}  # client_id -> when it first could not be written to
+        self.seq = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, session_id, client_id, sock):
+        with self.lock:
+            if client_id not in self.sockets:
+                self.sockets[client_id] = sock
+            self.watchers.setdefault(session_id, set()).add(client_id)
+            self.sent[(client_id, session_id)] = 0
+        # A table that already has a view sends it to the newcomer right away
+        self.wakeup.set()
+
+    def remove(self, session_id, client_id):
+        with self.lock:
+            self._remove(session_id, client_id)
+
+    def remove_client(self, client_id):
+        """Stop every view going to client_id, e.g. because it disconnected."""
+        with self.lock:
+            for session_id in [s for s, c in self.watchers.items() if client_id in c]:
+                self._remove(session_id, client_id)
+
+    def close_session(self, session_id):
+        """Drop every spectator of session_id and return their client ids."""
+        with self.lock:
+            client_ids = list(self.watchers.get(session_id, ()))
+            for client_id in client_ids:
+                self._remove(session_id, client_id)
+        return client_ids
+
+    def _remove(self, session_id, client_id):
+        watchers = self.watchers.get(session_id)
+        if watchers is None or client_id not in watchers:
+            return
+        watchers.discard(client_id)
+        self.sent.pop((client_id, session_id), None)
+        if not watchers:
+            # Nobody keeps the view up to date any more
+            del self.watchers[session_id]
+            self.latest.pop(session_id, None)
+        if not any(client_id in c for c in self.watchers.values()):
+            # A half written view stays in the connection's unsent tail and
+            # goes out ahead of its next message, so the stream stays whole
+            self.sockets.pop(client_id)
+            self.stalled.pop(client_id, None)
+
+    def watching(self, session_id):
+        return session_id in self.watchers
+
+    def has_view(self, session_id):
+        return session_id in self.latest
+
+    def count(self, session_id):
+        return len(self.watchers.get(session_id, ()))
+
+    def publish(self, session_id, payload):
+        """Make payload (bytes) the current view of session_id."""
+        with self.lock:
+            if session_id not in self.watchers:
+                return
+            self.seq += 1
+            self.latest[session_id] = (self.seq, payload)
+        self.wakeup.set()
+
+    def run(self):
+        backlog = False
+        while self.running:
+            self.wakeup.wait(self.RETRY_INTERVAL if backlog else None)
+            self.wakeup.clear()
+            backlog = self.send_due()
+
+    def send_due(self):
+        """Send each spectator the views it has not had yet. Returns True if some are left."""
+        with self.lock:
+            due = {client_id: [] for client_id, sock in self.sockets.items() if sock.unsent}
+            for session_id, (seq, payload) in self.latest.items():
+                for client_id in self.watchers.get(session_id, ()):
+                    if self.sent.get((client_id, session_id), 0) < seq:
+                        due.setdefault(client_id, []).append((session_id, seq, payload))
+            sockets = dict(self.sockets)
+
+        now = time.monotonic()
+        left = False
+        for client_id, views in due.items():
+            sock = sockets[client_id]
+            written = sock.written
+            try:
+                # An empty call only pushes out the unsent tail
+                done = sock.send_nowait() if not views else True
+                for session_id, seq, payload in views:
+                    done = sock.send_nowait(payload)
+                    if not done:
+                        break
+                    with self.lock:
+                        if (client_id, session_id) in self.sent:
+                            self.sent[(client_id, session_id)] = seq
+            except OSError as e:
+                logger.warning(f"Dropping spectator {client_id}: {e}")
+                self.remove_client(client_id)
+                continue
+            if sock.written != written:
+                self.stalled.pop(client_id, None)
+            if done and not sock.unsent:
+                continue
+            since = self.stalled.setdefault(client_id, now)
+            if now - since > self.STALL_TIMEOUT:
+                logger.warning(f"Dropping spectator {client_id}: not reading")
+                self.remove_client(client_id)
+            else:
+                left = True
+        return left
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+
+from .http_protocol import HttpServer
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE_TIMEOUT = 30.0
+
+
+class AsyncHttpServer:
+    """
+    asyncio front end for HttpServer.
+
+    Connections are served by coroutines instead of one OS thread per
+    request. HTTP keep-alive is honoured, and state requests carrying
+    ?since=<version>&wait=<seconds> are parked until the session changes
+    or the wait expires.
+    """
+
+    def __init__(self, httpserver=None):
+        self.httpserver = httpserver or HttpServer()
+        self.waiters = {}  # session_id -> set of futures parked on that session
+
+    async def handle_connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT
+                    )
+                except (
+                    asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError,
+                    asyncio.TimeoutError,
+                ):
+                    break
+
+                request_line, headers = self.parse_head(head)
+                content_length = int(headers.get("content-length", 0) or 0)
+                body = b""
+                if content_length:
+                    body = await reader.readexactly(content_length)
+
+                response = await self.dispatch(request_line, (head + body).decode())
+
+                keep_alive = self.wants_keep_alive(request_line, headers)
+                if keep_alive:
+                    response = response.replace(
+                        b"Connection: close\r\n", b"Connection: keep-alive\r\n", 1
+                    )
+                writer.write(response)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            logger.warning(f"Error handling request from {peer}: {e}")
+        finally:
+            writer.close()
+
+    async def dispatch(self, request_line, data):
+        parts = request_line.split(" ")
+        method = parts[0].upper()
+        object_address = parts[1] if len(parts) > 1 else ""
+
+        if method == "GET":
+            target = self.httpserver.long_poll_target(object_address)
+            if target:
+                session, wait = target
+                await self.park(session.session_id, wait)
+
+        # Handlers take the session locks, so they run on the default
+        # executor instead of stalling every other connection on the loop
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(None, self.httpserver.proses, data)
+        except Exception as e:
+            logger.exception(f"Error handling {request_line}: {e}")
+            return self.httpserver.response(
+                500, "Internal Server Error", {"error": "Internal server error"}
+            )
+
+        if method == "POST" and object_address.startswith("/sessions/"):
+            self.wake(object_address.split("/")[2])
+        return response
+
+    async def park(self, session_id, wait):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(session_id, set()).add(future)
+        try:
+            await asyncio.wait_for(future, wait)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters = self.waiters.get(session_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self.waiters[session_id]
+
+    def wake(self, session_id):
+        for future in self.waiters.pop(session_id, ()):
+            if not future.done():
+                future.set_result(None)
+
+    def parse_head(self, head):
+        lines = head.decode().split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        return lines[0], headers
+
+    def wants_keep_alive(self, request_line, headers):
+        connection = headers.get("connection", "").lower()
+        if request_line.endswith("HTTP/1.1"):
+            return connection != "close"
+        return connection == "keep-alive"
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info(f"Async server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
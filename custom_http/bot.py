@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+from urllib.parse import quote
+
+from common.bot import BotClient, BotError
+
+logger = logging.getLogger(__name__)
+
+LONG_POLL_WAIT = 10.0
+
+
+class HttpBotClient(BotClient):
+    """
+    Headless client for the REST API of custom_http/http_protocol.py.
+
+    Requests are plain HTTP/1.0 over asyncio streams, one connection each
+    as the servers close them. wait_state() long-polls with ?since=&wait=
+    and falls back to polling every poll_interval seconds on servers that
+    answer at once. Cards are sent as indices into the sorted hand.
+    """
+
+    def __init__(self, host="localhost", port=8886, poll_interval=0.2, timeout=15.0):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.server_version = None  # version of self.state on the server
+
+    async def request(self, method, path, body=None):
+        """(status, decoded JSON or None)"""
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.0\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "\r\n"
+        )
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(head.encode() + payload)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), self.timeout)
+        finally:
+            writer.close()
+
+        header, _, data = response.partition(b"\r\n\r\n")
+        status = int(header.split(b" ", 2)[1])
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    def error_of(self, status, data):
+        if isinstance(data, dict) and data.get("error"):
+            return data["error"]
+        return f"HTTP {status}"
+
+    async def list_sessions(self):
+        status, data = await self.request("GET", "/sessions")
+        if status != 200:
+            raise BotError(self.error_of(status, data))
+        return data
+
+    async def create_session(self, session_name, player_name):
+        status, data = await self.request(
+            "POST", "/sessions", {"session_name": session_name, "creator_name": player_name}
+        )
+        if status != 201:
+            raise BotError(self.error_of(status, data))
+        self.joined(data["session_id"], player_name)
+        return self.session_id
+
+    async def join_session(self, session_id, player_name):
+        status, data = await self.request(
+            "POST", f"/sessions/{session_id}/join", {"player_name": player_name}
+        )
+        if status != 200:
+            raise BotError(self.error_of(status, data))
+        self.joined(session_id, player_name)
+
+    def joined(self, session_id, player_name):
+        self.session_id = session_id
+        self.player_name = player_name
+        self.server_version = None
+
+    async def start_game(self):
+        status, data = await self.request("POST", f"/sessions/{self.session_id}/start", {})
+        if status != 200:
+            raise BotError(self.error_of(status, data))
+
+    async def play(self, cards):
+        hand = [card["number"] for card in self.state["my_hand"]]
+        await self.move("play", {
+            "player_name": self.player_name,
+            "cards": [hand.index(card["number"]) for card in cards],
+        })
+
+    async def pass_turn(self):
+        await self.move("pass", {"player_name": self.player_name})
+
+    async def move(self, action, body):
+        status, data = await self.request("POST", f"/sessions/{self.session_id}/{action}", body)
+        if status != 200:
+            self.refused(self.error_of(status, data))
+
+    async def fetch_state(self, wait):
+        path = f"/sessions/{self.session_id}?player_name={quote(self.player_name)}"
+        if self.server_version is not None and wait > 0:
+            path += f"&since={self.server_version}&wait={wait:.1f}"
+        status, data = await self.request("GET", path)
+        if status == 304:
+            return False
+        if status != 200 or not isinstance(data, dict) or "error" in data:
+            raise BotError(self.error_of(status, data))
+        if data.get("version") != self.server_version:
+            self.server_version = data.get("version")
+            self.deliver(data)
+            return True
+        return False
+
+    async def wait_state(self, since=None, timeout=30.0):
+        since = self.seen if since is None else since
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.version <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            started = loop.time()
+            wait = min(remaining, LONG_POLL_WAIT)
+            if not await self.fetch_state(wait):
+                # Servers without long polling answer immediately
+                if loop.time() - started < self.poll_interval:
+                    await asyncio.sleep(self.poll_interval)
+        self.seen = self.version
+        return self.state
@@ -1,7 +1,7 @@
 import pygame
 import requests
 import json
-import time
+from .transport import HttpTransport, PollScheduler
 from common.game import (
     show_session_menu,
     get_session_name,
@@ -9,11 +9,17 @@ from common.game import (
     show_sessions_list,
     get_player_name,
     init_pygame,
-    draw_game,
+    GameRenderer,
+    DebugOverlay,
+    PLAY_ERROR_MESSAGES,
+    check_play,
+    preload_assets,
 )
 
 
 class CapsaClient:
+    MAX_FAILED_POLLS = 5  # in a row before we give up on the server
+
     def __init__(self, server_address):
         self.server_address = server_address
         self.session_id = None
@@ -26,9 +32,14 @@ class CapsaClient:
         self.player_index = -1
         self.game_data = self._get_default_game_data()
         self.connected = False
+        self.failed_polls = 0
         self.message = ""
         self.message_timer = 0
         self.selected_cards = []
+        self.transport = HttpTransport(server_address)
+        self.debug = DebugOverlay("HTTP RTT")
+        self.transport.on_round_trip = self.debug.round_trip
+        self.transport.on_poll = self.debug.poll_answered
 
     def _get_default_game_data(self):
         return {
@@ -46,17 +57,17 @@ class CapsaClient:
 
     def get_sessions(self):
         try:
-            response = requests.get(f"{self.server_address}/sessions")
+            response = self.transport.get("/sessions")
             if response.status_code == 200:
                 return response.json()
             return []
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.RequestException:
             return None
 
     def create_session(self, session_name, creator_name):
         try:
-            response = requests.post(
-                f"{self.server_address}/sessions",
+            response = self.transport.post(
+                "/sessions",
                 json={"session_name": session_name, "creator_name": creator_name},
             )
             if response.status_code == 201:
@@ -67,13 +78,13 @@ class CapsaClient:
                 self.connected = True
                 return True
             return False
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.RequestException:
             return False
 
     def join_session(self, session_id, player_name):
         try:
-            response = requests.post(
-                f"{self.server_address}/sessions/{session_id}/join",
+            response = self.transport.post(
+                f"/sessions/{session_id}/join",
                 json={"player_name": player_name},
             )
             if response.status_code == 200:
@@ -84,48 +95,79 @@ class CapsaClient:
                 self.connected = True
                 return True
             return False
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.RequestException:
             return False
 
+    # start_game, play_cards and pass_turn are called from the pygame loop;
+    # they only queue the request, the transport worker thread sends it.
+    # The _send_* methods run on that thread and must not touch client
+    # state: they return a result that update_from_poll() applies.
+
     def start_game(self):
+        self.transport.submit(self._send_start_game)
+
+    def play_cards(self, card_indices):
+        # Catch illegal plays locally instead of waiting for a 400
+        my_hand = self.game_data.get("my_hand", [])
+        selected = [my_hand[i] for i in card_indices if i < len(my_hand)]
+        result = check_play(selected, my_hand, self.game_data.get("played_cards", []))
+        if result != 0:
+            self.show_message(PLAY_ERROR_MESSAGES.get(result, "Invalid move"), 2)
+            return
+        self.transport.submit(self._send_play_cards, list(card_indices))
+
+    def pass_turn(self):
+        self.transport.submit(self._send_pass_turn)
+
+    def _send_start_game(self):
         try:
-            response = requests.post(
-                f"{self.server_address}/sessions/{self.session_id}/start",
+            response = self.transport.post(
+                f"/sessions/{self.session_id}/start",
                 json={},  # Ensure proper JSON body
-                headers={'Content-Type': 'application/json'}  # Explicit content type
             )
-            if response.status_code == 200:
-                return True
-            else:
-                self.show_message(f"Failed to start game: {response.status_code}", 3)
-                return False
-        except requests.exceptions.ConnectionError:
-            self.show_message("Connection error", 2)
-            return False
+            if response.status_code != 200:
+                return {"message": f"Failed to start game: {response.status_code}", "duration": 3}
+        except requests.exceptions.RequestException:
+            return {"message": "Connection error", "duration": 2}
 
-    def get_game_state(self):
+    def state_path(self):
         if not self.session_id or not self.player_name:
+            return None
+        return f"/sessions/{self.session_id}?player_name={self.player_name}"
+
+    def start_polling(self):
+        # Paced by turn order instead of a fixed interval, see PollScheduler
+        self.transport.start(self.state_path, PollScheduler())
+
+    def update_from_poll(self):
+        """Apply command results and the latest state fetched by the transport threads."""
+        for command_result in self.transport.take_results():
+            self.apply_command_result(command_result)
+
+        result = self.transport.take_state()
+        if result is None:
             return
-        try:
-            response = requests.get(
-                f"{self.server_address}/sessions/{self.session_id}?player_name={self.player_name}"
-            )
-            if response.status_code == 200:
-                new_game_data = self._get_default_game_data()
-                new_game_data.update(response.json())
-                self.game_data = new_game_data
-                self.player_index = self.game_data.get("my_player_index", -1)
-            else:
-                self.connected = False  # Assume disconnected if we can't get state
-                self.game_data = self._get_default_game_data()
-        except requests.exceptions.ConnectionError:
+        self.debug.state_received()
+        status_code, data = result
+        if status_code == 200 and data is not None:
+            self.failed_polls = 0
+            new_game_data = self._get_default_game_data()
+            new_game_data.update(data)
+            self.game_data = new_game_data
+            self.player_index = self.game_data.get("my_player_index", -1)
+            return
+
+        # Timeouts and 5xx are retried with backoff by PollScheduler; only a
+        # session that is gone or a server that keeps failing ends the game
+        self.failed_polls += 1
+        if status_code == 404 or self.failed_polls >= self.MAX_FAILED_POLLS:
             self.connected = False
             self.game_data = self._get_default_game_data()
 
-    def play_cards(self, card_indices):
+    def _send_play_cards(self, card_indices):
         try:
-            response = requests.post(
-                f"{self.server_address}/sessions/{self.session_id}/play",
+            response = self.transport.post(
+                f"/sessions/{self.session_id}/play",
                 json={"player_name": self.player_name, "cards": card_indices},
             )
             if response.status_code != 200:
@@ -134,24 +176,25 @@ class CapsaClient:
                     error_msg = response.json().get("error", "Invalid move")
                 except (ValueError, requests.exceptions.JSONDecodeError):
                     error_msg = f"Invalid move (HTTP {response.status_code})"
-                self.show_message(error_msg, 2)
-            else:
-                self.selected_cards = []  # Clear selection after successful play
-                 # Check for win notification
-                try:
-                    response_data = response.json()
-                    if "winner_notification" in response_data:
-                        # Show win notification for longer duration
-                        self.show_message(response_data["winner_notification"], 5)
-                except (ValueError, requests.exceptions.JSONDecodeError):
-                    pass  # No JSON response, that's okay
-        except requests.exceptions.ConnectionError:
-            self.show_message("Connection error", 2)
+                return {"message": error_msg, "duration": 2}
 
-    def pass_turn(self):
+            result = {"played": True}  # Clear selection after successful play
+            # Check for win notification
+            try:
+                response_data = response.json()
+                if "winner_notification" in response_data:
+                    # Show win notification for longer duration
+                    result.update(message=response_data["winner_notification"], duration=5)
+            except (ValueError, requests.exceptions.JSONDecodeError):
+                pass  # No JSON response, that's okay
+            return result
+        except requests.exceptions.RequestException:
+            return {"message": "Connection error", "duration": 2}
+
+    def _send_pass_turn(self):
         try:
-            response = requests.post(
-                f"{self.server_address}/sessions/{self.session_id}/pass",
+            response = self.transport.post(
+                f"/sessions/{self.session_id}/pass",
                 json={"player_name": self.player_name},
             )
             if response.status_code != 200:
@@ -160,9 +203,15 @@ class CapsaClient:
                     error_msg = response.json().get("error", "Cannot pass")
                 except (ValueError, requests.exceptions.JSONDecodeError):
                     error_msg = f"Cannot pass (HTTP {response.status_code})"
-                self.show_message(error_msg, 2)
-        except requests.exceptions.ConnectionError:
-            self.show_message("Connection error", 2)
+                return {"message": error_msg, "duration": 2}
+        except requests.exceptions.RequestException:
+            return {"message": "Connection error", "duration": 2}
+
+    def apply_command_result(self, result):
+        if result.get("played"):
+            self.selected_cards = []
+        if "message" in result:
+            self.show_message(result["message"], result["duration"])
 
     def show_message(self, text, duration=3):
         self.message = text
@@ -171,6 +220,8 @@ class CapsaClient:
 
 def main():
     server_address = "http://127.0.0.1:8886"
+    # Card graphics load while the terminal menu waits for input
+    preload_assets()
     client = CapsaClient(server_address)
 
     print("--- Capsa Banting Client ---")
@@ -222,18 +273,11 @@ def main():
     print("Starting game UI...")
     screen, clock, WIDTH, HEIGHT, FPS = init_pygame()
     running = True
-    card_rects, button_rects = [], []
-    last_update_time = 0
+    renderer = GameRenderer(screen, WIDTH, HEIGHT)
+    client.start_polling()
     while running:
-        # Throttle game state updates
-        is_game_active = client.game_data.get("game_active", False)
-        now = time.time()
-        # Update every 3 seconds in menu, or more frequently when game is active
-        update_interval = 0.5 if is_game_active else 3.0
-
-        if now - last_update_time > update_interval:
-            client.get_game_state()
-            last_update_time = now
+        # State is fetched by the transport's poller thread
+        client.update_from_poll()
 
         if not client.connected:
             print("Lost connection to server.")
@@ -243,7 +287,12 @@ def main():
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            if event.type == pygame.VIDEOEXPOSE:
+                renderer.invalidate()
+            if event.type == pygame.KEYDOWN:
+                client.debug.handle_key(event.key)
             if event.type == pygame.MOUSEBUTTONDOWN:
+                card_rects, button_rects = renderer.card_rects, renderer.button_rects
                 
                 # Card selection logic
                 if client.game_data.get("my_hand"):
@@ -278,10 +327,13 @@ def main():
                             client.start_game()
                         break
 
-        card_rects, button_rects = draw_game(screen, client, WIDTH, HEIGHT)
-        pygame.display.flip()
+        # Redraw only what changed since the last frame
+        dirty_rects = renderer.render(client)
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
         clock.tick(FPS)
 
+    client.transport.stop()
     pygame.quit()
     print("Game has been closed.")
 
@@ -2,30 +2,27 @@ import logging
 import uuid
 from datetime import datetime
 import json
+import threading
+from urllib.parse import parse_qsl
 from common.game import (
     GameState,
     Player,
     deal,
     who_starts,
     play,
+    PLAY_ERROR_MESSAGES,
 )
+from .lobby import SessionListing
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-ERROR_MESSAGES = {
-    1: "You must include the 3 of diamonds in your play",
-    2: "Invalid hand, try again!",
-    3: "You must play a higher pair than the previous play!",
-    4: "A three card play must be a three of a kind!",
-    5: "You must play a higher three of a kind than the previous play!",
-    6: "There is no valid four card play!",
-    7: "Invalid hand, try again!",
-    8: "You need to play a stronger hand!",
-    9: "You need to play a higher suit!",
-    10: "You need to play a better hand!",
-}
+MAX_LONG_POLL_WAIT = 30.0
+
+# Retry-After seconds sent with 304 replies while a table is not in play
+IDLE_RETRY_AFTER = {GameState.MENU: 2, GameState.GAME_OVER: 5}
 
 
 class GameSession:
@@ -41,6 +38,10 @@ class GameSession:
         self.last_player_to_play = None
         self.passed_players = []
         self.winners = []
+        self.human_count = 1  # players before AI seats were added
+        self.lock = threading.RLock()
+        self.version = 0  # bumped on every mutation, used by long-polling clients
+        self.deferred_stats = None  # list while a batch runs, see HttpServer.run_batch
 
     def add_player(self, player_name):
         if len(self.players) < 4:
@@ -51,6 +52,7 @@ class GameSession:
     def start_game(self):
         # Fill with AI players if there are 2 or 3 players
         num_players = len(self.players)
+        self.human_count = num_players
         if 1 < num_players < 4:
             for i in range(num_players, 4):
                 self.add_player(f"AI Player {i - num_players + 1}")
@@ -70,6 +72,24 @@ class GameSession:
             return True
         return False
 
+    def snapshot(self):
+        """Copy of the game state for restore(); cards are shared, not copied."""
+        state = {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in ("lock", "deferred_stats")
+        }
+        for key in ("players", "last_played_cards", "passed_players", "winners"):
+            state[key] = list(state[key])
+        state["hands"] = [list(p.hand) for p in self.players]
+        return state
+
+    def restore(self, state):
+        state = dict(state)
+        for player, hand in zip(state["players"], state.pop("hands")):
+            player.hand = hand
+        self.__dict__.update(state)
+
     def get_player(self, player_name):
         for p in self.players:
             if p.name == player_name:
@@ -127,12 +147,13 @@ class GameSession:
             "my_player_index": player_index,
             "game_active": self.game_state == GameState.PLAYING,
             "game_over": self.game_state == GameState.GAME_OVER,
-            "winners": self.winners,
-            "players_passed": self.passed_players,
+            "winners": list(self.winners),
+            "players_passed": list(self.passed_players),
             "players_card_counts": [
                 len(p.hand) for p in self.players
             ],  # Fix: Array format
             "last_player_to_play": self.last_player_to_play,  # Add missing field
+            "version": self.version,
         }
 
 
@@ -140,6 +161,9 @@ class HttpServer:
     def __init__(self):
         self.sessions = {}
         self.game_sessions = {}  # session_id -> GameSession
+        self.sessions_lock = threading.Lock()
+        self.lobby = SessionListing()
+        self.stats = None  # PlayerStats, set up by server.main()
         self.types = {}
         self.types[".pdf"] = "application/pdf"
         self.types[".jpg"] = "image/jpeg"
@@ -204,11 +228,74 @@ class HttpServer:
         except IndexError:
             return self.response(400, "Bad Request", "", {})
 
-    def http_get(self, object_address, headers):
-        if object_address == "/sessions":
+    def list_sessions(self, query):
+        params = dict(parse_qsl(query))
+        status = params.get("status")
+        try:
+            open_slots = int(params.get("open_slots", 0))
+            cursor = int(params["cursor"]) if "cursor" in params else None
+            limit = int(params["limit"]) if "limit" in params else None
+        except ValueError:
             return self.response(
-                200, "OK", [s.to_json() for s in self.game_sessions.values()]
+                400,
+                "Bad Request",
+                {"error": "open_slots, cursor and limit must be integers"},
             )
+        if limit is not None and limit < 1:
+            return self.response(400, "Bad Request", {"error": "limit must be at least 1"})
+
+        body, next_cursor = self.lobby.query(
+            status=status.upper() if status else None,
+            open_slots=open_slots,
+            cursor=cursor,
+            limit=limit,
+        )
+        headers = {"Content-type": "application/json"}
+        if next_cursor is not None:
+            headers["X-Next-Cursor"] = next_cursor
+        return self.response(200, "OK", body, headers)
+
+    def leaderboard(self, query):
+        if self.stats is None:
+            return self.response(503, "Service Unavailable", {"error": "Statistics are not enabled"})
+        params = dict(parse_qsl(query))
+        try:
+            limit = max(1, min(int(params.get("limit", 10)), 100))
+        except ValueError:
+            return self.response(400, "Bad Request", {"error": "limit must be an integer"})
+
+        player_name = params.get("player")
+        return self.response(200, "OK", {
+            "top": self.stats.top(limit),
+            "player": self.stats.player(player_name) if player_name else None,
+        })
+
+    def record_results(self, session):
+        if self.stats is None:
+            return
+        winner_index = session.get_player_index(session.winners[0])
+        humans = [
+            (i, p.name, len(p.hand))
+            for i, p in enumerate(session.players[:session.human_count])
+        ]
+        self.update_stats(session, self.save_results, session.session_id, humans, winner_index)
+
+    def save_results(self, session_id, humans, winner_index):
+        self.stats.record_game_later(session_id, humans, winner_index)
+
+    def update_stats(self, session, func, *args):
+        # Inside a batch the update waits until the whole batch succeeded
+        if session.deferred_stats is not None:
+            session.deferred_stats.append((func, args))
+        else:
+            func(*args)
+
+    def http_get(self, object_address, headers):
+        path, _, query = object_address.partition("?")
+        if path == "/sessions":
+            return self.list_sessions(query)
+        if path == "/leaderboard":
+            return self.leaderboard(query)
 
         if object_address.startswith("/sessions/"):
             parts = object_address.split("/")
@@ -216,17 +303,21 @@ class HttpServer:
                 return self.response(404, "Not Found", "")
             session_id = parts[2]
             player_name = None
+            since = None
             # check for player_name in query params
             if "?" in session_id:
                 session_id, query = session_id.split("?", 1)
-                params = dict(p.split("=") for p in query.split("&"))
+                params = dict(parse_qsl(query))
                 player_name = params.get("player_name")
+                since = params.get("since")
 
-            session = self.game_sessions.get(session_id)
+            session = self.get_session(session_id)
             if session and player_name:
-                return self.response(
-                    200, "OK", session.get_game_state_for_player(player_name)
-                )
+                with session.lock:
+                    if since == str(session.version):
+                        return self.not_modified(session)
+                    state = session.get_game_state_for_player(player_name)
+                return self.response(200, "OK", state)
             return self.response(404, "Not Found", "")
         else:
             return self.response(404, "Not Found", "")
@@ -260,18 +351,64 @@ class HttpServer:
         # headers["Content-type"] =
         # return self.response(200, "OK", isi, headers)
 
+    def not_modified(self, session):
+        """
+        Answer a state poll whose ?since=<version> is still current without
+        building the state. Sessions that are not being played also tell
+        the client how long it may wait before asking again.
+        """
+        headers = {"X-Version": session.version}
+        retry_after = IDLE_RETRY_AFTER.get(session.game_state)
+        if retry_after:
+            headers["Retry-After"] = retry_after
+        return self.response(304, "Not Modified", b"", headers)
+
+    def long_poll_target(self, object_address):
+        """
+        Return (session, wait_seconds) when a GET for game state carries
+        ?since=<version>&wait=<seconds> and that version is still current,
+        i.e. the request may be parked until the session changes.
+        """
+        path, _, query = object_address.partition("?")
+        parts = path.split("/")
+        if len(parts) != 3 or parts[1] != "sessions" or not query:
+            return None
+
+        params = dict(parse_qsl(query))
+        try:
+            since = int(params["since"])
+            wait = min(float(params.get("wait", 0)), MAX_LONG_POLL_WAIT)
+        except (KeyError, ValueError):
+            return None
+
+        session = self.get_session(parts[2])
+        if session is None or wait <= 0 or session.version != since:
+            return None
+        return session, wait
+
+    def get_session(self, session_id):
+        with self.sessions_lock:
+            return self.game_sessions.get(session_id)
+
+    def add_session(self, session):
+        with self.sessions_lock:
+            self.game_sessions[session.session_id] = session
+            self.lobby.update(session)
+
     def http_post(self, object_address, headers, body):
         try:
             data = json.loads(body) if body else {}
         except json.JSONDecodeError:
             data = {}
+        if not isinstance(data, dict):
+            data = {}
 
         if object_address == "/sessions":
             session_name = data.get("session_name")
             creator_name = data.get("creator_name")
             if session_name and creator_name:
                 new_session = GameSession(session_name, creator_name)
-                self.game_sessions[new_session.session_id] = new_session
+                self.add_session(new_session)
                 return self.response(201, "Created", new_session.to_json())
             return self.response(
                 400,
@@ -280,220 +417,324 @@ class HttpServer:
             )
 
         if object_address.startswith("/sessions/") and object_address.endswith("/join"):
-            session_id = object_address.split("/")[2]
-            session = self.game_sessions.get(session_id)
-            player_name = data.get("player_name")
-            if session and player_name:
-                if session.add_player(player_name):
-                    return self.response(200, "OK", session.to_json())
-                else:
-                    return self.response(
-                        400, "Bad Request", {"error": "Session is full"}
-                    )
+            session = self.get_session(object_address.split("/")[2])
+            if session and data.get("player_name"):
+                with session.lock:
+                    result = self.join_session(session, data)
+                return self.response(*result)
             return self.response(404, "Not Found", "")
 
         if object_address.startswith("/sessions/") and object_address.endswith(
             "/start"
         ):
-            session_id = object_address.split("/")[2]
-            session = self.game_sessions.get(session_id)
+            session = self.get_session(object_address.split("/")[2])
             if session:
-                logger.info(f"Attempting to start game for session {session_id}")
-                logger.info(f"Current players: {len(session.players)}")
-                logger.info(f"Game state: {session.game_state}")
-
-                if session.start_game():
-                    return self.response(200, "OK", {"message": "Game started"})
-                else:
-                    error_msg = f"Cannot start game: {len(session.players)} players, state: {session.game_state.name}"
-                    logger.info(error_msg)
-                    return self.response(400, "Bad Request", {"error": error_msg})
+                with session.lock:
+                    result = self.start_session(session)
+                return self.response(*result)
             return self.response(404, "Not Found", {"error": "Session not found"})
 
         if object_address.startswith("/sessions/") and object_address.endswith("/play"):
-            session_id = object_address.split("/")[2]
-            session = self.game_sessions.get(session_id)
-            player_name = data.get("player_name")
             card_indices = data.get("cards", [])
-
             if not isinstance(card_indices, list) or not all(
                 isinstance(x, int) for x in card_indices
             ):
                 return self.response(400, "Bad Request", {"error": "Invalid card data"})
 
-            if session and player_name is not None and card_indices is not None:
-                player = session.get_player(player_name)
-                player_index = session.get_player_index(player_name)
+            session = self.get_session(object_address.split("/")[2])
+            if session and data.get("player_name") is not None:
+                with session.lock:
+                    result = self.play_cards(session, data)
+                return self.response(*result)
+            return self.response(404, "Not Found", "")
 
-                if not player:
-                    return self.response(
-                        404, "Not Found", {"error": "Player not found"}
-                    )
+        if object_address.startswith("/sessions/") and object_address.endswith("/pass"):
+            session = self.get_session(object_address.split("/")[2])
+            if session and data.get("player_name"):
+                with session.lock:
+                    result = self.pass_turn(session, data)
+                return self.response(*result)
+            return self.response(404, "Not Found", "")
 
-                if player_index != session.current_player_index:
-                    return self.response(403, "Forbidden", {"error": "Not your turn"})
+        if object_address.startswith("/sessions/") and object_address.endswith(
+            "/batch"
+        ):
+            operations = data.get("operations")
+            if not isinstance(operations, list) or not all(
+                isinstance(op, dict) for op in operations
+            ):
+                return self.response(
+                    400, "Bad Request", {"error": "operations must be a list of objects"}
+                )
 
-                try:
-                    played_cards = [player.hand[i] for i in card_indices]
-                except IndexError:
-                    return self.response(
-                        400, "Bad Request", {"error": "Invalid card index"}
+            session = self.get_session(object_address.split("/")[2])
+            if session:
+                with session.lock:
+                    result = self.run_batch(
+                        session, data.get("player_name"), operations
                     )
+                return self.response(*result)
+            return self.response(404, "Not Found", {"error": "Session not found"})
 
-                # Use the play() function for comprehensive validation
-                play_result = play(played_cards, player.hand, session.last_played_cards)
-
-                if play_result != 0:
-                    # Get the appropriate error message
-                    error_message = ERROR_MESSAGES.get(play_result, "Invalid move")
-                    return self.response(400, "Bad Request", {"error": error_message})
-
-                # Remove played cards from hand
-                for card in played_cards:
-                    player.hand.remove(card)
-
-                session.last_played_cards = played_cards
-                session.last_player_to_play = player_index
-
-                # Check for winner and send congratulations message
-                winner_message = None
-                if len(player.hand) == 0:
-                    session.winners.append(player.name)
-                    winner_position = len(session.winners)
-
-                    if winner_position == 1:
-                        winner_message = (
-                            f"🎉 Congratulations {player_name}! You WON! 🎉"
-                        )
-                    elif winner_position == 2:
-                        winner_message = (
-                            f"🥈 Great job {player_name}! You finished 2nd place!"
-                        )
-                    elif winner_position == 3:
-                        winner_message = (
-                            f"🥉 Well done {player_name}! You finished 3rd place!"
-                        )
-
-                    # Check if game is over
-                    if len(session.winners) >= len(session.players) - 1:
-                        session.game_state = GameState.GAME_OVER
-                        # Find the last player (4th place)
-                        for p in session.players:
-                            if p.name not in session.winners:
-                                session.winners.append(p.name)
-                                break
-
-                # Move to next player
-                session.current_player_index = (session.current_player_index + 1) % len(
-                    session.players
-                )
-                while (
-                    session.players[session.current_player_index].name
-                    in session.winners or session.current_player_index in session.passed_players
-                ):
-                    session.current_player_index = (
-                        session.current_player_index + 1
-                    ) % len(session.players)
-
-                # Return success message with win notification if applicable
-                response_data = {"message": "Move successful"}
-                if winner_message:
-                    response_data["winner_notification"] = winner_message
-                    response_data["final_position"] = len(session.winners)
-
-                return self.response(200, "OK", response_data)
+        return self.response(404, "Not Found", "")
 
-            return self.response(404, "Not Found", "")
+    # The handlers below return (kode, message, body) and must be called
+    # while holding session.lock.
+
+    def run_batch(self, session, player_name, operations):
+        """
+        Run operations in order without releasing the session lock, all or
+        nothing. Execution stops at the first operation that fails and the
+        session is rolled back to its state before the batch, so e.g. a
+        join followed by an illegal play leaves the player unseated.
+        Statistics are only recorded once every operation succeeded. The
+        response carries every result so far, whether the batch completed,
+        and the final (after a failure: unchanged) state.
+        """
+        results = []
+        completed = True
+        snapshot = session.snapshot()
+        session.deferred_stats = []
+        try:
+            for operation in operations:
+                op = operation.get("op")
+                data = dict(operation)
+                data.setdefault("player_name", player_name)
+                result = self.run_batch_operation(session, op, data)
+
+                results.append({"op": op, "status": result[0], "body": result[2]})
+                if result[0] >= 400:
+                    completed = False
+                    break
+        except Exception:
+            completed = False
+            raise
+        finally:
+            deferred, session.deferred_stats = session.deferred_stats, None
+            if not completed:
+                session.restore(snapshot)
+                self.lobby.update(session)
+
+        if completed:
+            for func, args in deferred:
+                func(*args)
+
+        final_state = None
+        if player_name and session.get_player(player_name):
+            final_state = session.get_game_state_for_player(player_name)
+
+        return 200, "OK", {"results": results, "completed": completed, "state": final_state}
+
+    def run_batch_operation(self, session, op, data):
+        if op == "start":
+            return self.start_session(session)
+        if not data.get("player_name"):
+            return 400, "Bad Request", {"error": "player_name is required"}
+
+        if op == "join":
+            return self.join_session(session, data)
+        if op == "play":
+            cards = data.get("cards", [])
+            if not isinstance(cards, list) or not all(isinstance(x, int) for x in cards):
+                return 400, "Bad Request", {"error": "Invalid card data"}
+            return self.play_cards(session, data)
+        if op == "pass":
+            return self.pass_turn(session, data)
+        if op == "state":
+            return 200, "OK", session.get_game_state_for_player(data["player_name"])
+        return 400, "Bad Request", {"error": f"Unknown op: {op}"}
+
+    def join_session(self, session, data):
+        if session.add_player(data.get("player_name")):
+            session.version += 1
+            self.lobby.update(session)
+            return 200, "OK", session.to_json()
+        return 400, "Bad Request", {"error": "Session is full"}
+
+    def start_session(self, session):
+        logger.info(f"Attempting to start game for session {session.session_id}")
+        logger.info(f"Current players: {len(session.players)}")
+        logger.info(f"Game state: {session.game_state}")
+
+        if session.start_game():
+            session.version += 1
+            self.lobby.update(session)
+            return 200, "OK", {"message": "Game started"}
+
+        error_msg = f"Cannot start game: {len(session.players)} players, state: {session.game_state.name}"
+        logger.info(error_msg)
+        return 400, "Bad Request", {"error": error_msg}
+
+    def play_cards(self, session, data):
+        player_name = data.get("player_name")
+        card_indices = data.get("cards", [])
+
+        player = session.get_player(player_name)
+        player_index = session.get_player_index(player_name)
 
-        if object_address.startswith("/sessions/") and object_address.endswith("/pass"):
-            session_id = object_address.split("/")[2]
-            session = self.game_sessions.get(session_id)
-            player_name = data.get("player_name")
+        if not player:
+            return 404, "Not Found", {"error": "Player not found"}
 
-            if session and player_name:
-                player_index = session.get_player_index(player_name)
-                if player_index != session.current_player_index:
-                    return self.response(403, "Forbidden", {"error": "Not your turn"})
-
-                if session.last_player_to_play == session.current_player_index:
-                    return self.response(
-                        400,
-                        "Bad Request",
-                        {"error": "You cannot pass, you must play a card."},
-                    )
+        if player_index != session.current_player_index:
+            return 403, "Forbidden", {"error": "Not your turn"}
 
-                # Fix: Prevent passing if you're the last player to play and no one else has played
-                if (
-                    session.last_player_to_play == session.current_player_index
-                    and not session.last_played_cards
-                ):
-                    return self.response(
-                        400,
-                        "Bad Request",
-                        {"error": "You cannot pass, you must play a card."},
-                    )
+        try:
+            played_cards = [player.hand[i] for i in card_indices]
+        except IndexError:
+            return 400, "Bad Request", {"error": "Invalid card index"}
 
-                # Add player to passed list if not already there
-                if player_index not in session.passed_players:
-                    session.passed_players.append(player_index)
+        # Use the play() function for comprehensive validation
+        play_result = play(played_cards, player.hand, session.last_played_cards)
 
-                # Move to next player, skipping winners AND passed players
-                session.current_player_index = (session.current_player_index + 1) % len(
-                    session.players
-                )
-                while (
-                    session.players[session.current_player_index].name
-                    in session.winners
-                    or session.current_player_index in session.passed_players
-                ):
-                    session.current_player_index = (
-                        session.current_player_index + 1
-                    ) % len(session.players)
-
-                    # Safety check to prevent infinite loop
-                    active_non_passed = [
-                        i
-                        for i, p in enumerate(session.players)
-                        if p.name not in session.winners
-                        and i not in session.passed_players
-                    ]
-                    if not active_non_passed:
-                        # All active players have passed, trigger round reset immediately
+        if play_result != 0:
+            # Get the appropriate error message
+            error_message = PLAY_ERROR_MESSAGES.get(play_result, "Invalid move")
+            return 400, "Bad Request", {"error": error_message}
+
+        # Remove played cards from hand
+        for card in played_cards:
+            player.hand.remove(card)
+
+        session.last_played_cards = played_cards
+        session.last_player_to_play = player_index
+        if self.stats:
+            self.update_stats(
+                session, self.stats.hand_played, session.session_id, player_index, played_cards
+            )
+
+        # Check for winner and send congratulations message
+        winner_message = None
+        if len(player.hand) == 0:
+            session.winners.append(player.name)
+            winner_position = len(session.winners)
+
+            if winner_position == 1:
+                winner_message = f"🎉 Congratulations {player_name}! You WON! 🎉"
+            elif winner_position == 2:
+                winner_message = f"🥈 Great job {player_name}! You finished 2nd place!"
+            elif winner_position == 3:
+                winner_message = f"🥉 Well done {player_name}! You finished 3rd place!"
+
+            # Check if game is over
+            if len(session.winners) >= len(session.players) - 1:
+                session.game_state = GameState.GAME_OVER
+                # Find the last player (4th place)
+                for p in session.players:
+                    if p.name not in session.winners:
+                        session.winners.append(p.name)
                         break
+                self.lobby.update(session)
+                self.record_results(session)
+
+        # If everyone still holding cards has passed, the table is cleared so
+        # the turn search below cannot spin forever while holding the lock
+        active_non_passed = [
+            i
+            for i, p in enumerate(session.players)
+            if p.name not in session.winners and i not in session.passed_players
+        ]
+        # Likewise when only the player who just played is left: they lead
+        # the new round instead of having to beat their own cards
+        keeps_lead = active_non_passed == [player_index]
+        if not active_non_passed or keeps_lead:
+            session.passed_players = []
+            session.last_played_cards = []
+
+        # Move to next player
+        while session.game_state != GameState.GAME_OVER and not keeps_lead:
+            session.current_player_index = (session.current_player_index + 1) % len(
+                session.players
+            )
+            if (
+                session.players[session.current_player_index].name not in session.winners
+                and session.current_player_index not in session.passed_players
+            ):
+                break
 
-                # Check if all other active players have passed (NEW ROUND LOGIC)
-                active_player_indices = [
-                    i
-                    for i, p in enumerate(session.players)
-                    if p.name not in session.winners
-                ]
+        session.version += 1
 
-                # Count how many active players have passed
-                active_passed_count = len(
-                    [p for p in session.passed_players if p in active_player_indices]
-                )
+        # Return success message with win notification if applicable
+        response_data = {"message": "Move successful"}
+        if winner_message:
+            response_data["winner_notification"] = winner_message
+            response_data["final_position"] = len(session.winners)
 
-                # If all active players except the last player to play have passed, start new round
-                if (
-                    active_passed_count >= len(active_player_indices) - 1
-                    and session.last_player_to_play is not None
-                    and session.last_player_to_play not in session.passed_players
-                ):
-                    logger.info(
-                        f"New round starting: {active_passed_count}/{len(active_player_indices)} players passed"
-                    )
-                    session.current_player_index = session.last_player_to_play
-                    session.last_played_cards = []
-                    session.passed_players = []
-                    logger.info(
-                        f"Round reset - next player: {session.players[session.current_player_index].name}"
-                    )
+        return 200, "OK", response_data
 
-                return self.response(200, "OK", {"message": "Pass successful"})
+    def pass_turn(self, session, data):
+        player_index = session.get_player_index(data.get("player_name"))
+        if player_index != session.current_player_index:
+            return 403, "Forbidden", {"error": "Not your turn"}
 
-            return self.response(404, "Not Found", "")
+        if session.last_player_to_play == session.current_player_index:
+            return 400, "Bad Request", {"error": "You cannot pass, you must play a card."}
 
-        return self.response(404, "Not Found", "")
+        # Fix: Prevent passing if you're the last player to play and no one else has played
+        if (
+            session.last_player_to_play == session.current_player_index
+            and not session.last_played_cards
+        ):
+            return 400, "Bad Request", {"error": "You cannot pass, you must play a card."}
+
+        # Add player to passed list if not already there
+        if player_index not in session.passed_players:
+            session.passed_players.append(player_index)
+
+        # Move to next player, skipping winners AND passed players
+        session.current_player_index = (session.current_player_index + 1) % len(
+            session.players
+        )
+        while (
+            session.players[session.current_player_index].name in session.winners
+            or session.current_player_index in session.passed_players
+        ):
+            session.current_player_index = (session.current_player_index + 1) % len(
+                session.players
+            )
+
+            # Safety check to prevent infinite loop
+            active_non_passed = [
+                i
+                for i, p in enumerate(session.players)
+                if p.name not in session.winners and i not in session.passed_players
+            ]
+            if not active_non_passed:
+                # All active players have passed, trigger round reset immediately
+                break
+
+        # Check if all other active players have passed (NEW ROUND LOGIC)
+        active_player_indices = [
+            i for i, p in enumerate(session.players) if p.name not in session.winners
+        ]
+
+        # Count how many active players have passed
+        active_passed_count = len(
+            [p for p in session.passed_players if p in active_player_indices]
+        )
+
+        # If all active players except the last player to play have passed, start new round
+        if (
+            active_passed_count >= len(active_player_indices) - 1
+            and session.last_player_to_play is not None
+            and session.last_player_to_play not in session.passed_players
+        ):
+            logger.info(
+                f"New round starting: {active_passed_count}/{len(active_player_indices)} players passed"
+            )
+            session.current_player_index = session.last_player_to_play
+            session.last_played_cards = []
+            session.passed_players = []
+            # If the last player to play went out, the lead passes on
+            while session.players[session.current_player_index].name in session.winners:
+                session.current_player_index = (session.current_player_index + 1) % len(
+                    session.players
+                )
+            logger.info(
+                f"Round reset - next player: {session.players[session.current_player_index].name}"
+            )
+
+        session.version += 1
+        return 200, "OK", {"message": "Pass successful"}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+import bisect
+import heapq
+import json
+import threading
+
+MAX_PLAYERS = 4
+
+
+class SessionListing:
+    """
+    Pre-encoded lobby listing served by GET /sessions.
+
+    Each session is encoded once when it is created, joined, started or
+    finished. Sessions are numbered in creation order and indexed by
+    (status, player_count) so filtered and paginated queries only touch
+    the entries that end up on the page.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}  # session_id -> (seq, status, player_count, encoded)
+        self.encoded_by_seq = {}  # seq -> encoded session json
+        self.index = {}  # (status, player_count) -> sorted list of seq
+        self.next_seq = 0
+        self.full_listing = None
+
+    def update(self, session):
+        status = session.game_state.name
+        player_count = len(session.players)
+        encoded = json.dumps(session.to_json()).encode()
+
+        with self.lock:
+            entry = self.entries.get(session.session_id)
+            if entry:
+                seq, old_status, old_count, _ = entry
+                old_seqs = self.index[(old_status, old_count)]
+                del old_seqs[bisect.bisect_left(old_seqs, seq)]
+            else:
+                seq = self.next_seq
+                self.next_seq += 1
+
+            bisect.insort(self.index.setdefault((status, player_count), []), seq)
+            self.entries[session.session_id] = (seq, status, player_count, encoded)
+            self.encoded_by_seq[seq] = encoded
+            self.full_listing = None
+
+    def query(self, status=None, open_slots=0, cursor=None, limit=None):
+        """Return (json_bytes, next_cursor) for the requested page."""
+        with self.lock:
+            if status is None and open_slots <= 0 and cursor is None and limit is None:
+                if self.full_listing is None:
+                    self.full_listing = self._encode(sorted(self.encoded_by_seq))
+                return self.full_listing, None
+
+            max_count = MAX_PLAYERS - max(open_slots, 0)
+            seq_lists = [
+                seqs
+                for (entry_status, count), seqs in self.index.items()
+                if (status is None or entry_status == status) and count <= max_count
+            ]
+
+            page = []
+            has_more = False
+            for seq in heapq.merge(*[self._after(seqs, cursor) for seqs in seq_lists]):
+                if limit is not None and len(page) >= limit:
+                    has_more = True
+                    break
+                page.append(seq)
+
+            next_cursor = str(page[-1]) if has_more else None
+            return self._encode(page), next_cursor
+
+    def _after(self, seqs, cursor):
+        start = 0 if cursor is None else bisect.bisect_right(seqs, cursor)
+        for i in range(start, len(seqs)):
+            yield seqs[i]
+
+    def _encode(self, seqs):
+        return b"[" + b",".join(self.encoded_by_seq[seq] for seq in seqs) + b"]"
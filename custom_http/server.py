@@ -1,8 +1,13 @@
 from socket import *
+import argparse
+import asyncio
 import logging
 import threading
 import socketserver
 from .http_protocol import HttpServer
+from .async_server import AsyncHttpServer
+from common.redis_backend import add_redis_arguments, create_redis_client, redis_config
+from common.player_stats import PlayerStats
 
 # A single, shared instance of the HttpServer to maintain game state
 httpserver = HttpServer()
@@ -44,11 +49,36 @@ class MyTCPHandler(socketserver.BaseRequestHandler):
 
 
 def main():
-    HOST, PORT = "0.0.0.0", 8886
+    parser = argparse.ArgumentParser(description="Capsa HTTP game server")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="serve with asyncio streams instead of a thread per request",
+    )
+    parser.add_argument("--port", type=int, default=8886)
+    parser.add_argument(
+        "--redis",
+        action="store_true",
+        help="keep player statistics in Redis instead of in process memory",
+    )
+    add_redis_arguments(parser)
+    args = parser.parse_args()
+
+    stats_config = redis_config(args)
+    if not args.redis:
+        stats_config["backend"] = "memory"
+    httpserver.stats = PlayerStats(create_redis_client(stats_config))
+
+    HOST, PORT = "0.0.0.0", args.port
 
     logging.basicConfig(level=logging.INFO)
     logger.info(f"Server starting on {HOST}:{PORT}")
 
+    if args.use_async:
+        asyncio.run(AsyncHttpServer(httpserver).serve(HOST, PORT))
+        return
+
     # Create the server, binding to localhost on port 8886
     with socketserver.ThreadingTCPServer((HOST, PORT), MyTCPHandler) as server:
         server.serve_forever()
@@ -0,0 +1,282 @@
+import logging
+import queue
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def pooled_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PollScheduler:
+    """
+    Decides when the poller asks for the game state next, from the last
+    state it saw.
+
+    Right after our own action and while we are next in turn order it polls
+    quickly; while our turn is further away, or while the state is not
+    changing, it backs off exponentially. A Retry-After from the server
+    sets the minimum wait. Each poll sends the last seen version as
+    ?since=, so unchanged polls cost the server a 304 instead of a full
+    state. When we are next and the server holds such requests until the
+    version changes (the async server), it long-polls instead. Every delay
+    is jittered so the clients at one table do not poll in lockstep.
+    """
+
+    FAST = 0.25  # seconds, right after our own action
+    NEXT_MAX = 0.5  # we are next, as often as the old fixed interval
+    FAR_BASE = 0.5  # per turn we are away from playing
+    PLAYING_MAX = 4.0
+    IDLE_BASE = 1.0  # lobby and finished games
+    IDLE_MAX = 5.0
+    LOBBY_MAX = 3.0  # the old fixed lobby interval, so a START is seen as soon as before
+    AFTER_ACTION = 2.0  # seconds of fast polling after we acted
+    JITTER = 0.2
+    LONG_POLL_WAIT = 3.0  # below HttpTransport.timeout
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.state = None
+        self.version = None
+        self.unchanged = 0
+        self.retry_after = None
+        self.fast_until = 0.0
+        self.server_parks = None  # unknown until a long poll comes back
+        self.waited = 0.0
+
+    def kick(self):
+        """Called after we sent a command: the state is about to change."""
+        self.fast_until = time.monotonic() + self.AFTER_ACTION
+
+    def query(self):
+        """Extra query string for the next state request."""
+        self.waited = 0.0
+        if self.version is None:
+            return ""
+        if self.server_parks is not False and self.turns_away() == 1:
+            self.waited = self.LONG_POLL_WAIT
+            return f"&since={self.version}&wait={self.waited:.0f}"
+        return f"&since={self.version}"
+
+    def observe(self, status_code, data, headers, elapsed):
+        if self.waited and status_code == 304:
+            # A server without long polling answers at once
+            self.server_parks = elapsed >= self.waited / 2
+        if status_code == 200 and isinstance(data, dict):
+            version = data.get("version")
+            self.unchanged = 0 if version != self.version else self.unchanged + 1
+            self.version = version
+            self.state = data
+        else:
+            # 304, errors and timeouts all back off
+            self.unchanged += 1
+        self.retry_after = parse_retry_after(headers.get("Retry-After"))
+
+    def turns_away(self):
+        """
+        How many turns until ours: 0 while it is our turn, 1 when we are
+        next. None outside a game or once we are out of cards.
+        """
+        state = self.state
+        if not state or not state.get("game_active"):
+            return None
+        me = state.get("my_player_index", -1)
+        current = state.get("current_player_index", -1)
+        counts = state.get("players_card_counts") or []
+        passed = state.get("players_passed") or []
+        if not 0 <= me < len(counts) or not 0 <= current < len(counts) or counts[me] == 0:
+            return None
+
+        # Count the seats that will still play before us this round
+        away, seat = 0, current
+        while seat != me:
+            seat = (seat + 1) % len(counts)
+            if seat == me or (counts[seat] > 0 and seat not in passed):
+                away += 1
+        return away
+
+    def next_delay(self):
+        """Seconds to wait before the next poll."""
+        backoff = 2 ** min(self.unchanged, 6)
+        away = self.turns_away()
+        if time.monotonic() < self.fast_until:
+            delay = self.FAST
+        elif not self.state or not self.state.get("game_active"):
+            delay = min(self.IDLE_MAX, self.IDLE_BASE * backoff)
+        elif away is None:
+            delay = min(self.PLAYING_MAX, self.FAR_BASE * backoff)
+        elif away == 0:
+            # Nothing changes until we act, and acting calls kick()
+            delay = self.PLAYING_MAX
+        elif away == 1:
+            delay = self.FAST if self.server_parks else min(self.NEXT_MAX, self.FAST * backoff)
+        else:
+            delay = min(self.PLAYING_MAX, self.FAR_BASE * 2 ** (away - 1) * backoff)
+
+        if self.retry_after is not None:
+            # Never earlier than the server asked, only spread out later
+            delay = max(delay, self.retry_after) * self.rng.uniform(1.0, 1.0 + self.JITTER)
+        else:
+            delay *= self.rng.uniform(1.0 - self.JITTER, 1.0 + self.JITTER)
+        if self.in_lobby():
+            # Waiting for the creator to start: never slower than the old poll
+            delay = min(delay, self.LOBBY_MAX)
+        return delay
+
+    def in_lobby(self):
+        state = self.state
+        return not state or not (state.get("game_active") or state.get("game_over"))
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header; HTTP dates are not used here."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpTransport:
+    """
+    Keep-alive HTTP transport for the pygame client.
+
+    Game state is fetched by a background poller thread, paced by a
+    PollScheduler, and published to the UI thread via take_state().
+    Commands are queued with submit() and sent by a worker thread, so the
+    frame loop never waits on the network; what a command returns is
+    handed back to the UI thread via take_results(). The poller and the
+    worker each own a pooled requests.Session.
+    """
+
+    def __init__(self, server_address, pool_size=2, timeout=5.0):
+        self.server_address = server_address
+        self.timeout = timeout
+        self.session = pooled_session(pool_size)
+        self.poll_session = pooled_session(pool_size)
+        self.commands = queue.Queue()
+        self.results = queue.Queue()
+        self.state_lock = threading.Lock()
+        self.latest_state = None
+        self.poll_now = threading.Event()
+        self.running = False
+        self.threads = []
+        self.scheduler = None
+        self.on_round_trip = None  # called with each request's time in ms, from any thread
+        self.on_poll = None  # called with the status code of every poll, from the poller thread
+
+    def get(self, path, session=None, timed=True):
+        started = time.perf_counter()
+        response = (session or self.session).get(
+            f"{self.server_address}{path}", timeout=self.timeout
+        )
+        if timed:
+            self.timed(started)
+        return response
+
+    def post(self, path, json=None, session=None):
+        started = time.perf_counter()
+        response = (session or self.session).post(
+            f"{self.server_address}{path}", json=json, timeout=self.timeout
+        )
+        self.timed(started)
+        return response
+
+    def timed(self, started):
+        if self.on_round_trip:
+            self.on_round_trip((time.perf_counter() - started) * 1000)
+
+    def start(self, poll_path, scheduler=None):
+        """
+        Start the poller and command worker. poll_path() returns the state
+        URL path (or None to skip a poll); scheduler paces the polls.
+        """
+        self.scheduler = scheduler or PollScheduler()
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.poll_loop, args=(poll_path,), daemon=True),
+            threading.Thread(target=self.command_loop, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self.poll_now.set()
+        self.commands.put(None)
+
+    def poll_loop(self, poll_path):
+        scheduler = self.scheduler
+        while self.running:
+            path = poll_path()
+            # A poll_now.set() from here on, even during this poll, skips the next wait
+            self.poll_now.clear()
+            if path:
+                query = scheduler.query()
+                started = time.perf_counter()
+                headers = {}
+                try:
+                    # Long polls are held by the server, keep them out of the RTT numbers
+                    response = self.get(
+                        path + query, session=self.poll_session, timed=not scheduler.waited
+                    )
+                    headers = response.headers
+                    try:
+                        result = (response.status_code, response.json())
+                    except ValueError:
+                        result = (response.status_code, None)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"Poll failed: {e}")
+                    result = (None, None)
+                scheduler.observe(*result, headers, time.perf_counter() - started)
+                if self.on_poll and result[0] is not None:
+                    self.on_poll(result[0])
+                if result[0] != 304:
+                    with self.state_lock:
+                        self.latest_state = result
+
+            self.poll_now.wait(scheduler.next_delay())
+
+    def take_state(self):
+        """Return the newest (status_code, data) published by the poller, once."""
+        with self.state_lock:
+            result, self.latest_state = self.latest_state, None
+        return result
+
+    def take_results(self):
+        """Return what the commands sent since the last call returned, in order."""
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def submit(self, func, *args):
+        self.commands.put((func, args))
+
+    def command_loop(self):
+        while self.running:
+            item = self.commands.get()
+            if item is None:
+                break
+            func, args = item
+            try:
+                result = func(*args)
+                if result is not None:
+                    self.results.put(result)
+            except Exception as e:
+                logger.warning(f"Command {func.__name__} failed: {e}")
+            # Refresh state right after our own action
+            if self.scheduler:
+                self.scheduler.kick()
+            self.poll_now.set()
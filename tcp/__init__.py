@@ -30,8 +30,13 @@ try:
 except ImportError:
     CapsaGameServerProd = None
 
-# Make common imports available
-from ..common import *
+# Make common imports available when the repo is imported as a package;
+# run from the repo root (python -m tcp.server) tcp is top-level and
+# there is nothing above it to import from
+try:
+    from ..common import *
+except ImportError:
+    pass
 
 __all__ = [
     'TCPCapsaClient',
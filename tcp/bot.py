@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+
+from common.bot import BotClient, BotError
+
+logger = logging.getLogger(__name__)
+
+
+class TcpConnection:
+    """
+    A connection to tcp/server.py that can carry several sessions.
+
+    The server tags GAME_UPDATE, GAME_END, ERROR and the other session
+    messages with their session_id; the reader task hands them to the
+    TcpBotClient playing that session. Replies that requests wait for
+    (SESSION_MENU, SESSION_JOINED, SPECTATING and untagged ERRORs)
+    resolve the request's future instead.
+    """
+
+    def __init__(self, host="localhost", port=55556):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.reader_task = None
+        self.waiters = []  # (commands, future, client) for replies a request waits on
+        self.clients = {}  # session_id -> TcpBotClient
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, limit=1 << 20
+        )
+        self.reader_task = asyncio.create_task(self.listen())
+
+    async def close(self):
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send(self, command):
+        self.writer.write((json.dumps(command) + "\n").encode())
+        await self.writer.drain()
+
+    async def request(self, command, *replies, client=None, timeout=10.0):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.append((replies + ("ERROR",), future, client))
+        await self.send(command)
+        message = await asyncio.wait_for(future, timeout)
+        if message["command"] == "ERROR":
+            raise BotError(message.get("message", "Request refused"))
+        return message
+
+    async def listen(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    self.handle_message(json.loads(line))
+        except (ConnectionError, json.JSONDecodeError) as e:
+            logger.warning(f"{self.host}:{self.port}: connection lost: {e}")
+        finally:
+            for _, future, _ in self.waiters:
+                if not future.done():
+                    future.set_exception(BotError("Connection closed"))
+            self.waiters = []
+
+    def handle_message(self, message):
+        command = message.get("command")
+        # A tagged ERROR answers a game command of that session, not a request
+        if command != "ERROR" or message.get("session_id") not in self.clients:
+            for waiter in self.waiters:
+                if command in waiter[0] and not waiter[1].done():
+                    self.waiters.remove(waiter)
+                    if command in ("SESSION_JOINED", "SPECTATING") and waiter[2] is not None:
+                        # Registered before the GAME_UPDATE that follows is read
+                        self.clients[message["session_id"]] = waiter[2]
+                    waiter[1].set_result(message)
+                    return
+
+        client = self.clients.get(message.get("session_id"))
+        if client is None and "session_id" not in message and len(self.clients) == 1:
+            client = next(iter(self.clients.values()))
+        if client is not None:
+            client.handle_message(message)
+
+
+class TcpBotClient(BotClient):
+    """
+    Headless client for the line-delimited JSON protocol of tcp/server.py.
+
+    Each client plays one session. By default it opens its own connection;
+    clients given the same TcpConnection share it, one session each, and
+    tag their game commands with their session_id.
+    """
+
+    def __init__(self, host="localhost", port=55556, connection=None):
+        super().__init__()
+        self.connection = connection or TcpConnection(host, port)
+        self.owns_connection = connection is None
+        self.player_index = -1
+        self.spectating = False
+        self.sessions = []
+
+    async def connect(self):
+        # A shared connection is connected by whoever created it
+        if self.owns_connection:
+            await self.connection.connect()
+
+    async def close(self):
+        self.connection.clients.pop(self.session_id, None)
+        if self.owns_connection:
+            await self.connection.close()
+
+    async def send(self, command):
+        if self.session_id:
+            command = dict(command, session_id=self.session_id)
+        await self.connection.send(command)
+
+    def handle_message(self, message):
+        command = message.get("command")
+        if command == "GAME_UPDATE":
+            self.deliver(message)
+        elif command == "GAME_END":
+            self.deliver(dict(self.state or {}, game_active=False, game_over=True,
+                              winner=message.get("winner")))
+        elif command == "ERROR":
+            self.refused(message.get("message", "Invalid play"))
+
+    async def list_sessions(self):
+        message = await self.connection.request({"command": "LIST_SESSIONS"}, "SESSION_MENU")
+        self.sessions = message.get("sessions", [])
+        return self.sessions
+
+    async def create_session(self, session_name, player_name):
+        await self.join_reply(
+            {"command": "CREATE_SESSION", "session_name": session_name, "creator_name": player_name}
+        )
+        return self.session_id
+
+    async def join_session(self, session_id, player_name):
+        await self.join_reply(
+            {"command": "JOIN_SESSION", "session_id": session_id, "player_name": player_name}
+        )
+
+    async def join_reply(self, command):
+        message = await self.connection.request(command, "SESSION_JOINED", client=self)
+        self.session_id = message["session_id"]
+        self.player_index = message["player_index"]
+        self.player_name = message["player_name"]
+
+    async def spectate_session(self, session_id):
+        """Watch a table: states arrive as usual, with an empty my_hand."""
+        message = await self.connection.request(
+            {"command": "SPECTATE_SESSION", "session_id": session_id}, "SPECTATING", client=self
+        )
+        self.session_id = message["session_id"]
+        self.player_index = -1
+        self.spectating = True
+
+    async def leave_session(self):
+        await self.send({"command": "STOP_SPECTATING" if self.spectating else "LEAVE_SESSION"})
+        self.spectating = False
+        self.connection.clients.pop(self.session_id, None)
+        self.session_id = None
+
+    async def start_game(self):
+        await self.send({"command": "START_GAME"})
+
+    async def play(self, cards):
+        await self.send({"command": "PLAY_CARDS", "cards": [card["number"] for card in cards]})
+
+    async def pass_turn(self):
+        await self.send({"command": "PASS_TURN"})
@@ -6,17 +6,24 @@ import threading
 import logging
 import time
 import math
+import queue
 
 from common.game import (
     get_session_name, 
     get_creator_name, 
     get_player_name,
-    draw_game,
+    GameRenderer,
+    DebugOverlay,
+    PLAY_ERROR_MESSAGES,
+    check_play,
     show_session_menu,
     show_sessions_list,
-    init_pygame
+    init_pygame,
+    preload_assets
 )
 
+PING_INTERVAL = 2.0  # seconds between latency probes while the debug overlay is on
+
 class CapsaClient:
     def __init__(self):
         self.socket = None
@@ -38,10 +45,15 @@ class CapsaClient:
         }
         # self.server_address = ('localhost', 55556) #IP LoadBalancer
         self.server_address = ('57.155.178.71', 55556) #IP LoadBalancer
-        self.selected_cards = []
+        self.selected_cards = []  # indices into game_data['my_hand'], as draw_game expects
         self.message = ""
         self.message_timer = 0
         self.in_session = False
+        # Filled by the receive thread, drained by the UI thread in process_messages()
+        self.inbox = queue.Queue()
+        self.coalesced_updates = 0
+        self.debug = DebugOverlay("PING")
+        self.last_ping = 0.0
         
     def connect_to_server(self):
         try:
@@ -61,22 +73,33 @@ class CapsaClient:
             return False
     
     def listen_server(self):
-        buffer = ""
+        # Only reads and parses; game state is touched by the UI thread alone.
+        # Bytes are buffered so a multi-byte character split across reads is not lost.
+        buffer = b""
         while self.connected:
             try:
-                data = self.socket.recv(1024)
+                data = self.socket.recv(65536)
                 if data:
-                    buffer += data.decode()
+                    buffer += data
                     
-                    # Process complete messages
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
+                    # Queue complete messages
+                    *lines, buffer = buffer.split(b'\n')
+                    for line in lines:
                         if line.strip():
                             try:
-                                message = json.loads(line.strip())
-                                self.handle_server_message(message)
-                            except json.JSONDecodeError as e:
+                                message = json.loads(line)
+                            except (json.JSONDecodeError, UnicodeDecodeError) as e:
                                 logging.warning(f"Invalid JSON: {line}")
+                                continue
+                            # Timed on arrival so the numbers exclude UI frame latency
+                            if message.get('command') == 'PONG':
+                                sent = message.get('sent')
+                                if isinstance(sent, (int, float)):
+                                    self.debug.round_trip((time.perf_counter() - sent) * 1000)
+                                continue
+                            if message.get('command') == 'GAME_UPDATE':
+                                self.debug.state_received()
+                            self.inbox.put(message)
                 else:
                     break
                     
@@ -88,11 +111,39 @@ class CapsaClient:
         self.connected = False
         print("- Disconnected from server")
     
+    def process_messages(self):
+        """
+        Apply everything received since the last call, on the calling (UI)
+        thread. GAME_UPDATE carries the whole state, so only the newest one
+        in a batch is applied; other messages keep their order.
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.inbox.get_nowait())
+            except queue.Empty:
+                break
+
+        last_update = max(
+            (i for i, m in enumerate(messages) if m.get('command') == 'GAME_UPDATE'), default=-1
+        )
+        for i, message in enumerate(messages):
+            if message.get('command') == 'GAME_UPDATE' and i != last_update:
+                self.coalesced_updates += 1
+                continue
+            self.handle_server_message(message)
+        return len(messages)
+
     def handle_server_message(self, message):
         cmd = message.get('command')
         
         if cmd == 'SESSION_MENU':
+            if message.get('leaderboard'):
+                self.print_leaderboard(message['leaderboard'])
             self.handle_session_menu(message.get('sessions', []))
+
+        elif cmd == 'LEADERBOARD':
+            self.print_leaderboard(message.get('top', []), message.get('player'))
             
         elif cmd == 'SESSION_JOINED':
             self.session_id = message.get('session_id')
@@ -122,7 +173,17 @@ class CapsaClient:
             error_msg = message.get('message', 'Error')
             print(f"- Error: {error_msg}")
             self.show_message(error_msg)
+            if not self.in_session:
+                # A failed create/join: fetch the list again to bring the menu back
+                self.send_command({'command': 'LIST_SESSIONS'})
     
+    def print_leaderboard(self, top, player=None):
+        print("\nLEADERBOARD:")
+        for row in top:
+            print(f"{row['rank']:>3}. {row['name']:<20} {row['wins']} wins")
+        if player:
+            print(f"You: #{player['rank']} with {player['wins']} wins in {player.get('games', 0)} games")
+
     def handle_session_menu(self, sessions):
         while True:
             choice = show_session_menu()
@@ -138,7 +199,6 @@ class CapsaClient:
                 })
                 
                 print(f"- Creating session '{session_name}'...")
-                time.sleep(1)  # Wait for server response
                 return  # Exit menu loop
                 
             elif choice == 2:  # Join existing session
@@ -155,12 +215,11 @@ class CapsaClient:
                     })
                     
                     print(f"- Joining session as '{player_name}'...")
-                    time.sleep(1)  # Wait for server response
                     return  # Exit menu loop
                 else:
-                    # Request updated session list
+                    # Request updated session list, the reply brings the menu back
                     self.send_command({'command': 'LIST_SESSIONS'})
-                    time.sleep(0.5)  # Wait for server response
+                    return
                     
             elif choice == 3:  # Exit
                 print("- Goodbye!")
@@ -179,60 +238,98 @@ class CapsaClient:
                 return False
         return False
     
+    def ping_if_due(self):
+        now = time.perf_counter()
+        if self.debug.enabled and now - self.last_ping >= PING_INTERVAL:
+            self.last_ping = now
+            self.send_command({'command': 'PING', 'sent': now})
+
+    def play_selected_cards(self):
+        """Send the selection, unless the same rules the server runs reject it."""
+        my_hand = self.game_data['my_hand']
+        selected = [my_hand[i] for i in self.selected_cards if i < len(my_hand)]
+        result = check_play(selected, my_hand, self.game_data['played_cards'])
+        if result != 0:
+            self.show_message(PLAY_ERROR_MESSAGES.get(result, "Invalid play"))
+            return False
+
+        card_numbers = [card['number'] for card in selected]
+        print(f"Playing cards: {card_numbers}")
+        self.send_command({
+            'command': 'PLAY_CARDS',
+            'cards': card_numbers
+        })
+        self.selected_cards.clear()
+        return True
+
     def show_message(self, message, duration=180):
         self.message = message
         self.message_timer = duration
 
 def main():
-    # Terminal session selection first
+    # Terminal session selection first; card graphics load meanwhile
+    preload_assets()
     client = CapsaClient()
     
     if not client.connect_to_server():
         print("- Failed to connect to server")
         return
     
-    # Wait for session selection to complete
+    # Session selection runs in the terminal on this thread, driven by
+    # the messages the receive thread queues
     print("- Waiting for session selection...")
     while not client.in_session:
-        time.sleep(0.1)
+        if not client.connected:
+            print("- Failed to connect to server")
+            return
+        client.process_messages()
+        time.sleep(0.05)
     
     # Initialize pygame after session is joined
     screen, clock, WIDTH, HEIGHT, FPS = init_pygame()
     
     print("- Starting game UI...")
+    renderer = GameRenderer(screen, WIDTH, HEIGHT)
     
     running = True
     while running:
+        client.process_messages()
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+
+            elif event.type == pygame.VIDEOEXPOSE:
+                renderer.invalidate()
+
+            elif event.type == pygame.KEYDOWN:
+                client.debug.handle_key(event.key)
             
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                card_rects, button_rects = draw_game(screen, client, WIDTH, HEIGHT)
-                
+                # Hit rects from the last frame the renderer drew
+                my_hand = client.game_data['my_hand']
+
                 # Handle card clicks
-                for rect, card in card_rects:
+                for rect, card in renderer.card_rects:
                     if rect.collidepoint(event.pos):
-                        if card in client.selected_cards:
-                            client.selected_cards.remove(card)
+                        i = next((i for i, c in enumerate(my_hand) if c['number'] == card['number']), None)
+                        if i is None:
+                            break  # hand changed since that frame
+                        if i in client.selected_cards:
+                            client.selected_cards.remove(i)
                             print(f"Card deselected: {card['pp_value']} of suit {card['suit']}")
                         else:
-                            client.selected_cards.append(card)
+                            client.selected_cards.append(i)
+                            client.selected_cards.sort()
                             print(f"Card selected: {card['pp_value']} of suit {card['suit']}")
                         break
                 
                 # Handle button clicks
-                for button_type, rect in button_rects:
+                for button_type, rect in renderer.button_rects:
                     if rect.collidepoint(event.pos):
                         print(f"Button clicked: {button_type}")
                         if button_type == 'PLAY' and client.selected_cards:
-                            card_numbers = [card['number'] for card in client.selected_cards]
-                            print(f"Playing cards: {card_numbers}")
-                            client.send_command({
-                                'command': 'PLAY_CARDS',
-                                'cards': card_numbers
-                            })
-                            client.selected_cards.clear()
+                            client.play_selected_cards()
                         elif button_type == 'PASS':
                             print("Passing turn")
                             client.send_command({'command': 'PASS_TURN'})
@@ -242,9 +339,12 @@ def main():
                             client.send_command({'command': 'START_GAME'})
                         break
         
-        # Draw everything
-        draw_game(screen, client, WIDTH, HEIGHT)
-        pygame.display.flip()
+        client.ping_if_due()
+
+        # Redraw only what changed since the last frame
+        dirty_rects = renderer.render(client)
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
         clock.tick(FPS)
     
     # Cleanup
@@ -0,0 +1,587 @@
+import fnmatch
+import json
+import queue
+import threading
+import time
+
+from .session_events import PUBLISH_SCRIPT
+from .session_lease import ACQUIRE_SCRIPT, RELEASE_SCRIPT, RENEW_SCRIPT
+from .session_scripts import JOIN_SCRIPT, LEAVE_SCRIPT, START_SCRIPT
+from .state_snapshot import FENCED_SET_SCRIPT
+
+
+class MemoryRedis:
+    """
+    In-process stand-in for the subset of redis-py the Redis server uses:
+    strings, hashes, sets, sorted sets, streams with consumer groups, TTLs,
+    pipelines, pub/sub and our Lua scripts.
+
+    Values are stored as str like a decode_responses=True client. Lua
+    scripts are not interpreted; each script source we register is mapped
+    to a Python twin in SCRIPTS and run under the store lock, so it is just
+    as atomic. Good enough for local runs, load tests and benchmarks, not a
+    full Redis.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.stream_added = threading.Condition(self.lock)
+        self.data = {}
+        self.expires = {}  # key -> unix time
+        self.subscribers = []
+
+    # -- keys -------------------------------------------------------------
+
+    def live(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def typed(self, key, kind):
+        value = self.live(key)
+        if value is None:
+            value = kind()
+            self.data[key] = value
+        elif not isinstance(value, kind):
+            raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def ping(self):
+        return True
+
+    def scan_iter(self, match=None, count=None):
+        with self.lock:
+            keys = [key for key in list(self.data) if self.live(key) is not None]
+        return iter([key for key in keys if match is None or fnmatch.fnmatchcase(key, match)])
+
+    def exists(self, *keys):
+        with self.lock:
+            return sum(1 for key in keys if self.live(key) is not None)
+
+    def delete(self, *keys):
+        with self.lock:
+            removed = 0
+            for key in keys:
+                if self.live(key) is not None:
+                    removed += 1
+                self.data.pop(key, None)
+                self.expires.pop(key, None)
+            return removed
+
+    def expire(self, key, seconds):
+        with self.lock:
+            if self.live(key) is None:
+                return False
+            self.expires[key] = time.time() + int(seconds)
+            return True
+
+    def pexpire(self, key, milliseconds):
+        with self.lock:
+            if self.live(key) is None:
+                return False
+            self.expires[key] = time.time() + int(milliseconds) / 1000
+            return True
+
+    def persist(self, key):
+        with self.lock:
+            return self.live(key) is not None and self.expires.pop(key, None) is not None
+
+    def ttl(self, key):
+        with self.lock:
+            if self.live(key) is None:
+                return -2
+            if key not in self.expires:
+                return -1
+            return int(round(self.expires[key] - time.time()))
+
+    # -- strings ----------------------------------------------------------
+
+    def get(self, key):
+        with self.lock:
+            value = self.live(key)
+            return value if isinstance(value, str) or value is None else None
+
+    def set(self, key, value, ex=None, px=None, nx=False, xx=False):
+        with self.lock:
+            present = self.live(key) is not None
+            if (nx and present) or (xx and not present):
+                return None
+            self.data[key] = str(value)
+            self.expires.pop(key, None)
+            if ex is not None:
+                self.expires[key] = time.time() + int(ex)
+            elif px is not None:
+                self.expires[key] = time.time() + int(px) / 1000
+            return True
+
+    def incr(self, key, amount=1):
+        with self.lock:
+            value = int(self.live(key) or 0) + amount
+            self.data[key] = str(value)
+            return value
+
+    # -- hashes -----------------------------------------------------------
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        with self.lock:
+            h = self.typed(key, dict)
+            items = dict(mapping or {})
+            if field is not None:
+                items[field] = value
+            added = sum(1 for f in items if f not in h)
+            h.update({f: str(v) for f, v in items.items()})
+            return added
+
+    def hget(self, key, field):
+        with self.lock:
+            return (self.live(key) or {}).get(field)
+
+    def hgetall(self, key):
+        with self.lock:
+            return dict(self.live(key) or {})
+
+    def hmget(self, key, keys, *args):
+        fields = [keys, *args] if isinstance(keys, str) else list(keys) + list(args)
+        with self.lock:
+            h = self.live(key) or {}
+            return [h.get(f) for f in fields]
+
+    def hdel(self, key, *fields):
+        with self.lock:
+            h = self.live(key)
+            if not h:
+                return 0
+            removed = sum(1 for f in fields if h.pop(f, None) is not None)
+            if not h:
+                self.delete(key)
+            return removed
+
+    def hincrby(self, key, field, amount=1):
+        with self.lock:
+            h = self.typed(key, dict)
+            value = int(h.get(field, 0)) + amount
+            h[field] = str(value)
+            return value
+
+    # -- sets -------------------------------------------------------------
+
+    def sadd(self, key, *members):
+        with self.lock:
+            s = self.typed(key, set)
+            added = sum(1 for m in members if str(m) not in s)
+            s.update(str(m) for m in members)
+            return added
+
+    def srem(self, key, *members):
+        with self.lock:
+            s = self.live(key)
+            if not s:
+                return 0
+            removed = sum(1 for m in members if str(m) in s)
+            s.difference_update(str(m) for m in members)
+            if not s:
+                self.delete(key)
+            return removed
+
+    def smembers(self, key):
+        with self.lock:
+            return set(self.live(key) or ())
+
+    def sismember(self, key, member):
+        with self.lock:
+            return str(member) in (self.live(key) or ())
+
+    def scard(self, key):
+        with self.lock:
+            return len(self.live(key) or ())
+
+    # -- sorted sets ------------------------------------------------------
+
+    def zincrby(self, key, amount, member):
+        with self.lock:
+            z = self.typed(key, SortedSet)
+            z[str(member)] = z.get(str(member), 0.0) + float(amount)
+            return z[str(member)]
+
+    def zscore(self, key, member):
+        with self.lock:
+            return (self.live(key) or {}).get(str(member))
+
+    def zcard(self, key):
+        with self.lock:
+            return len(self.live(key) or ())
+
+    def zrevrank(self, key, member):
+        with self.lock:
+            z = self.live(key) or SortedSet()
+            if str(member) not in z:
+                return None
+            return z.descending().index(str(member))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        with self.lock:
+            z = self.live(key) or SortedSet()
+            members = z.descending()
+            members = members[start:None if end == -1 else end + 1]
+            if withscores:
+                return [(m, z[m]) for m in members]
+            return members
+
+    # -- streams ----------------------------------------------------------
+
+    def xadd(self, name, fields, id="*", maxlen=None, approximate=True):
+        with self.lock:
+            stream = self.typed(name, MemoryStream)
+            entry_id = stream.add({f: str(v) for f, v in fields.items()})
+            if maxlen is not None:
+                stream.trim(maxlen)
+            self.stream_added.notify_all()
+            return entry_id
+
+    def xlen(self, name):
+        with self.lock:
+            return len((self.live(name) or MemoryStream()).entries)
+
+    def xrange(self, name, min="-", max="+", count=None):
+        with self.lock:
+            stream = self.live(name) or MemoryStream()
+            entries = [(i, dict(f)) for i, f in stream.entries if stream.in_range(i, min, max)]
+            return entries[:count] if count else entries
+
+    def xtrim(self, name, maxlen, approximate=True):
+        with self.lock:
+            stream = self.live(name)
+            return stream.trim(maxlen) if stream else 0
+
+    def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        with self.lock:
+            stream = self.live(name)
+            if stream is None:
+                if not mkstream:
+                    raise KeyError("ERR The XGROUP subcommand requires the key to exist")
+                stream = self.typed(name, MemoryStream)
+            if groupname in stream.groups:
+                raise ValueError("BUSYGROUP Consumer Group name already exists")
+            last = stream.last_id if id == "$" else id
+            stream.groups[groupname] = {"last": stream_id(last), "pending": {}}
+            return True
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None, noack=False):
+        deadline = time.time() + (block or 0) / 1000
+        with self.lock:
+            while True:
+                result = []
+                for name, start in streams.items():
+                    stream = self.live(name)
+                    if stream is None or groupname not in stream.groups:
+                        raise KeyError(f"NOGROUP No such key '{name}' or consumer group '{groupname}'")
+                    group = stream.groups[groupname]
+                    if start == ">":
+                        entries = [(i, f) for i, f in stream.entries if stream_id(i) > group["last"]]
+                        entries = entries[:count] if count else entries
+                        if entries:
+                            group["last"] = stream_id(entries[-1][0])
+                            if not noack:
+                                group["pending"].update((i, consumername) for i, _ in entries)
+                            result.append([name, [(i, dict(f)) for i, f in entries]])
+                    else:
+                        entries = [
+                            (i, dict(f)) for i, f in stream.entries
+                            if group["pending"].get(i) == consumername and stream_id(i) > stream_id(start)
+                        ]
+                        result.append([name, entries[:count] if count else entries])
+                history = any(start != ">" for start in streams.values())
+                remaining = deadline - time.time()
+                if result or history or not block or remaining <= 0:
+                    return result
+                self.stream_added.wait(remaining)
+
+    def xack(self, name, groupname, *ids):
+        with self.lock:
+            stream = self.live(name)
+            if stream is None or groupname not in stream.groups:
+                return 0
+            pending = stream.groups[groupname]["pending"]
+            return sum(1 for i in ids if pending.pop(i, None) is not None)
+
+    # -- pipelines and scripts --------------------------------------------
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+    def register_script(self, source):
+        if source not in SCRIPTS:
+            raise NotImplementedError("MemoryRedis has no Python twin for this script")
+        return MemoryScript(self, SCRIPTS[source])
+
+    # -- pub/sub ----------------------------------------------------------
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        return sum(1 for pubsub in subscribers if pubsub.deliver(channel, str(message)))
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        pubsub = MemoryPubSub(self, ignore_subscribe_messages)
+        with self.lock:
+            self.subscribers.append(pubsub)
+        return pubsub
+
+
+class SortedSet(dict):
+    """member -> score. Sorted on read, which is fine at stand-in sizes."""
+
+    def descending(self):
+        # ZREVRANGE order: score high to low, ties by member high to low
+        return sorted(self, key=lambda m: (self[m], m), reverse=True)
+
+
+def stream_id(text):
+    if text in ("-", "0"):
+        return (0, 0)
+    if text == "+":
+        return (float("inf"), 0)
+    ms, _, seq = str(text).partition("-")
+    return (int(ms), int(seq or 0))
+
+
+class MemoryStream:
+    def __init__(self):
+        self.entries = []  # (id, fields)
+        self.last_id = "0-0"
+        self.groups = {}
+
+    def add(self, fields):
+        ms = int(time.time() * 1000)
+        last_ms, last_seq = stream_id(self.last_id)
+        seq = last_seq + 1 if ms <= last_ms else 0
+        self.last_id = f"{max(ms, last_ms)}-{seq}"
+        self.entries.append((self.last_id, fields))
+        return self.last_id
+
+    def trim(self, maxlen):
+        removed = max(0, len(self.entries) - maxlen)
+        del self.entries[:removed]
+        return removed
+
+    def in_range(self, entry_id, low, high):
+        current = stream_id(entry_id)
+        if str(low).startswith("("):
+            above = current > stream_id(low[1:])
+        else:
+            above = current >= stream_id(low)
+        if str(high).startswith("("):
+            below = current < stream_id(high[1:])
+        else:
+            below = current <= stream_id(high)
+        return above and below
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class MemoryPipeline:
+    """Buffers commands and runs them back to back under the store lock."""
+
+    def __init__(self, store):
+        self.store = store
+        self.commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self.store, name)
+
+        def queue_command(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue_command
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        with self.store.lock:
+            return [method(*args, **kwargs) for method, args, kwargs in commands]
+
+    def reset(self):
+        self.commands = []
+
+
+class MemoryScript:
+    def __init__(self, store, func):
+        self.store = store
+        self.func = func
+
+    def __call__(self, keys=(), args=(), client=None):
+        if isinstance(client, MemoryPipeline):
+            client.commands.append((self, (), {"keys": keys, "args": args}))
+            return client
+        with self.store.lock:
+            return self.func(self.store, list(keys), [str(a) for a in args])
+
+
+class MemoryPubSub:
+    def __init__(self, store, ignore_subscribe_messages):
+        self.store = store
+        self.ignore_subscribe_messages = ignore_subscribe_messages
+        self.channels = set()
+        self.patterns = set()
+        self.messages = queue.Queue()
+
+    def subscribe(self, *channels):
+        for channel in channels:
+            self.channels.add(channel)
+            self.notify("subscribe", channel)
+
+    def psubscribe(self, *patterns):
+        for pattern in patterns:
+            self.patterns.add(pattern)
+            self.notify("psubscribe", pattern)
+
+    def unsubscribe(self, *channels):
+        self.channels.difference_update(channels or set(self.channels))
+
+    def punsubscribe(self, *patterns):
+        self.patterns.difference_update(patterns or set(self.patterns))
+
+    def notify(self, kind, channel):
+        if not self.ignore_subscribe_messages:
+            self.messages.put({"type": kind, "pattern": None, "channel": channel, "data": 1})
+
+    def deliver(self, channel, data):
+        delivered = False
+        if channel in self.channels:
+            self.messages.put({"type": "message", "pattern": None, "channel": channel, "data": data})
+            delivered = True
+        for pattern in self.patterns:
+            if fnmatch.fnmatchcase(channel, pattern):
+                self.messages.put({"type": "pmessage", "pattern": pattern, "channel": channel, "data": data})
+                delivered = True
+        return delivered
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout) if timeout else self.messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def listen(self):
+        while self.channels or self.patterns:
+            message = self.get_message(timeout=1.0)
+            if message:
+                yield message
+
+    def close(self):
+        self.channels.clear()
+        self.patterns.clear()
+        with self.store.lock:
+            if self in self.store.subscribers:
+                self.store.subscribers.remove(self)
+
+
+# -- Python twins of the Lua scripts ---------------------------------------
+
+def publish_event(r, keys, args):
+    seq = r.incr(keys[0])
+    r.expire(keys[0], args[2])
+    r.publish(args[0], f"{seq}|{args[1]}")
+    return seq
+
+
+def players_names(r, key):
+    return json.loads(r.hget(key, "players_names_json") or '["","","",""]')
+
+
+def join_session(r, keys, args):
+    if not r.sismember(keys[1], args[0]):
+        return [-1, "Session not found or no longer active"]
+    if not r.exists(keys[0]):
+        r.srem(keys[1], args[0])
+        return [-1, "Session not found or no longer active"]
+
+    count = int(r.hget(keys[0], "player_count") or 0)
+    if count >= 4:
+        return [-1, "Session is full (4 players max)"]
+
+    names = players_names(r, keys[0])
+    for i in range(4):
+        if names[i] == "":
+            names[i] = args[1] or f"Player {i + 1}"
+            r.hset(keys[0], mapping={
+                "player_count": count + 1,
+                "players_names_json": json.dumps(names, separators=(",", ":")),
+            })
+            return [i, names[i]]
+    return [-1, "No available player slots in session."]
+
+
+def leave_session(r, keys, args):
+    if not r.exists(keys[0]):
+        return -1
+    names = players_names(r, keys[0])
+    names[int(args[1])] = ""
+    count = r.hincrby(keys[0], "player_count", -1)
+    if count <= 0:
+        r.delete(keys[0], keys[2])
+        r.srem(keys[1], args[0])
+        return 0
+    r.hset(keys[0], "players_names_json", json.dumps(names, separators=(",", ":")))
+    return count
+
+
+def start_session(r, keys, args):
+    if not r.exists(keys[0]) or r.hget(keys[0], "status") == "playing":
+        return None
+    names = [name or args[i + 2] for i, name in enumerate(players_names(r, keys[0]))]
+    names_json = json.dumps(names, separators=(",", ":"))
+    r.hset(keys[0], mapping={
+        "status": "playing",
+        "players_names_json": names_json,
+        "game_state_json": args[0],
+        "current_player_index": args[1],
+    })
+    return names_json
+
+
+def acquire_lease(r, keys, args):
+    owner = r.get(keys[0])
+    if owner:
+        node, _, token = owner.rpartition(":")
+        if node == args[0]:
+            r.pexpire(keys[0], args[1])
+            return [int(token), node]
+        return [0, node]
+    token = r.incr(keys[1])
+    r.set(keys[0], f"{args[0]}:{token}", px=args[1], nx=True)
+    return [token, args[0]]
+
+
+def renew_lease(r, keys, args):
+    if r.get(keys[0]) == args[0]:
+        return int(r.pexpire(keys[0], args[1]))
+    return 0
+
+
+def release_lease(r, keys, args):
+    if r.get(keys[0]) == args[0]:
+        return r.delete(keys[0])
+    return 0
+
+
+def fenced_set(r, keys, args):
+    if int(r.get(keys[1]) or 0) > int(args[2]):
+        return 0
+    r.set(keys[0], args[0], ex=args[1])
+    return 1
+
+
+SCRIPTS = {
+    PUBLISH_SCRIPT: publish_event,
+    JOIN_SCRIPT: join_session,
+    LEAVE_SCRIPT: leave_session,
+    START_SCRIPT: start_session,
+    ACQUIRE_SCRIPT: acquire_lease,
+    RENEW_SCRIPT: renew_lease,
+    RELEASE_SCRIPT: release_lease,
+    FENCED_SET_SCRIPT: fenced_set,
+}
@@ -0,0 +1,230 @@
+import logging
+import threading
+import time
+import uuid
+
+from common.server import CapsaGameState
+from .state_snapshot import cards_by_number, cards_to_mask, mask_to_cards
+
+STREAM_PREFIX = "session_moves:"
+REPLAY_GROUP = "replayers"
+
+# Stream entries are tiny flat maps: t = event type, p = player index and
+# c/h = card bitmasks in hex, so a play costs ~30 bytes instead of JSON card dicts.
+EVENT_CODES = {"start": "S", "play": "P", "pass": "X"}
+EVENT_TYPES = {code: name for name, code in EVENT_CODES.items()}
+
+
+def encode_move(move):
+    fields = {"t": EVENT_CODES[move["type"]], "p": move["player"]}
+    if move["type"] == "start":
+        fields["h"] = ",".join(format(cards_to_mask(numbers_to_cards(hand)), "x") for hand in move["hands"])
+        fields["n"] = "\x1f".join(move["names"])
+    elif move["type"] == "play":
+        fields["c"] = format(cards_to_mask(numbers_to_cards(move["cards"])), "x")
+    elif move["round_over"]:
+        fields["r"] = -1 if move["leader"] is None else move["leader"]
+    return fields
+
+
+def decode_move(fields):
+    move = {"type": EVENT_TYPES[fields["t"]], "player": int(fields["p"])}
+    if move["type"] == "start":
+        move["hands"] = [[c.number for c in mask_to_cards(int(h, 16))] for h in fields["h"].split(",")]
+        move["names"] = fields.get("n", "").split("\x1f")
+    elif move["type"] == "play":
+        move["cards"] = [c.number for c in mask_to_cards(int(fields["c"], 16))]
+    else:
+        move["round_over"] = "r" in fields
+        leader = int(fields.get("r", -1))
+        move["leader"] = None if leader < 0 else leader
+    return move
+
+
+def numbers_to_cards(numbers):
+    return [cards_by_number[n] for n in numbers]
+
+
+def advance_turn(game_state):
+    # Same rule as CapsaGameServer.next_turn
+    game_state.current_player_index = (game_state.current_player_index + 1) % 4
+    attempts = 0
+    while game_state.current_player_index in game_state.round_passes and attempts < 4:
+        game_state.current_player_index = (game_state.current_player_index + 1) % 4
+        attempts += 1
+
+
+def apply_move(game_state, move):
+    """Apply one decoded event to a CapsaGameState, the way the server handlers do."""
+    player_index = move["player"]
+    if move["type"] == "start":
+        game_state.reset_game()
+        for i, player in enumerate(game_state.players):
+            player.hand = numbers_to_cards(move["hands"][i])
+            if i < len(move["names"]) and move["names"][i]:
+                player.name = move["names"][i]
+                game_state.players_names[i] = player.name
+        game_state.current_player_index = player_index
+        game_state.game_active = True
+
+    elif move["type"] == "play":
+        player = game_state.players[player_index]
+        cards = numbers_to_cards(move["cards"])
+        player.hand = [card for card in player.hand if card.number not in move["cards"]]
+        game_state.played_cards = cards
+        game_state.played_cards_history.append(list(cards))
+        game_state.last_player_to_play = player_index
+        if not player.hand:
+            game_state.game_active = False
+            game_state.winner = player.name
+        else:
+            advance_turn(game_state)
+
+    elif move["type"] == "pass":
+        game_state.round_passes.add(player_index)
+        if move["round_over"]:
+            game_state.played_cards = []
+            game_state.played_cards_history.clear()
+            game_state.round_passes.clear()
+            if move["leader"] is not None:
+                game_state.current_player_index = move["leader"]
+                return
+        advance_turn(game_state)
+
+
+class MoveLog:
+    """
+    Append-only per-session move log on Redis Streams (session_moves:<id>).
+
+    Each append is one pipelined XADD + EXPIRE written right away, so a
+    node crash cannot lose moves that were already played. Each stream is
+    capped at roughly maxlen entries (XADD MAXLEN ~) and expires ttl
+    seconds after its last append.
+    """
+
+    def __init__(self, redis_client, maxlen=2000, ttl=7 * 86400):
+        self.redis = redis_client
+        self.maxlen = maxlen
+        self.ttl = ttl
+
+    def key(self, session_id):
+        return STREAM_PREFIX + session_id
+
+    def append(self, session_id, move):
+        fields = encode_move(move)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xadd(self.key(session_id), fields, maxlen=self.maxlen, approximate=True)
+        pipe.expire(self.key(session_id), self.ttl)
+        pipe.execute()
+
+    def read(self, session_id, start="-", end="+", count=None):
+        """Decoded (entry_id, move) pairs, oldest first."""
+        entries = self.redis.xrange(self.key(session_id), min=start, max=end, count=count)
+        return [(entry_id, decode_move(fields)) for entry_id, fields in entries]
+
+    def rebuild(self, session_id, until="+", moves=None):
+        """
+        Replay a session up to and including entry id `until`, or its first
+        `moves` entries. Returns (game_state, last_entry_id).
+        """
+        game_state = CapsaGameState()
+        last_id = None
+        for entry_id, move in self.read(session_id, end=until, count=moves):
+            apply_move(game_state, move)
+            last_id = entry_id
+        return game_state, last_id
+
+    def trim(self, session_id, maxlen=None):
+        return self.redis.xtrim(self.key(session_id), maxlen=maxlen or self.maxlen, approximate=False)
+
+
+class MoveLogReplayer:
+    """
+    Follows every session move log through a Redis consumer group and keeps
+    a replayed CapsaGameState per session, calling
+    handler(session_id, entry_id, move, game_state) for each entry.
+
+    The group stores progress in Redis, so a restarted replayer resumes
+    where it stopped: it first re-reads its unacknowledged entries and
+    rebuilds a session's state from the stream the first time it sees it.
+    Entries of a session must all reach the same consumer, so run one
+    consumer per group and use separate groups for separate analyses.
+    """
+
+    def __init__(self, redis_client, handler, group=REPLAY_GROUP, consumer=None,
+                 block_ms=1000, scan_interval=5.0):
+        self.redis = redis_client
+        self.move_log = MoveLog(redis_client)
+        self.handler = handler
+        self.group = group
+        self.consumer = consumer or uuid.uuid4().hex[:8]
+        self.block_ms = block_ms
+        self.scan_interval = scan_interval
+        self.states = {}  # session_id -> replayed CapsaGameState
+        self.streams = {}  # stream key -> id to read from ("0" for our pending entries, then ">")
+        self.last_scan = 0.0
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            try:
+                self.poll()
+            except Exception as e:
+                logging.warning(f"Move log replayer error: {e}")
+                # A stream may have expired under us, so rediscover from scratch
+                self.streams.clear()
+                self.last_scan = 0.0
+                time.sleep(1.0)
+
+    def discover(self):
+        for key in self.redis.scan_iter(match=STREAM_PREFIX + "*"):
+            if key in self.streams:
+                continue
+            try:
+                self.redis.xgroup_create(key, self.group, id="0")
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self.streams[key] = "0"
+        self.last_scan = time.time()
+
+    def poll(self):
+        if time.time() - self.last_scan >= self.scan_interval:
+            self.discover()
+        if not self.streams:
+            time.sleep(self.block_ms / 1000)
+            return 0
+
+        handled = 0
+        response = self.redis.xreadgroup(
+            self.group, self.consumer, dict(self.streams), count=100, block=self.block_ms
+        )
+        for key, entries in response or []:
+            if not entries and self.streams[key] == "0":
+                self.streams[key] = ">"  # pending entries drained
+            for entry_id, fields in entries:
+                self.apply(key[len(STREAM_PREFIX):], entry_id, fields)
+                self.redis.xack(key, self.group, entry_id)
+                handled += 1
+        return handled
+
+    def apply(self, session_id, entry_id, fields):
+        move = decode_move(fields)
+        game_state = self.states.get(session_id)
+        if game_state is None:
+            # First sight of this session in this process: catch up from the log
+            game_state, _ = self.move_log.rebuild(session_id, until="(" + entry_id)
+            self.states[session_id] = game_state
+        apply_move(game_state, move)
+        self.handler(session_id, entry_id, move, game_state)
+
+    def forget(self, session_id):
+        self.states.pop(session_id, None)
+        self.streams.pop(STREAM_PREFIX + session_id, None)
@@ -3,18 +3,26 @@ import socket
 import time
 import logging
 import json
+import argparse
 from concurrent.futures import ThreadPoolExecutor
-from common.server import CapsaGameServer
+from common.server import CapsaGameServer, ClientConnection
+from common.redis_backend import add_redis_arguments, create_redis_client, redis_config
 
 game_server = CapsaGameServer()
 
+# One worker thread per connection; a bot process multiplexing tables or
+# watching them still needs one per socket
+MAX_CLIENTS = 100
+
 
 def ProcessTheClient(connection, address):
     client_id = f"{address[0]}:{address[1]}:{int(time.time() * 1000) % 10000}"
 
     print(f"New client connected: {client_id} from {address}")
 
-    game_server.add_client(client_id, connection)
+    # Writes from other threads (AI turns, other sessions' seats) share its lock
+    writer = ClientConnection(connection)
+    game_server.add_client(client_id, writer)
 
     rcv = ""
     try:
@@ -45,7 +53,7 @@ def ProcessTheClient(connection, address):
             except socket.timeout:
                 try:
                     ping_msg = json.dumps({"command": "PING"}) + "\n"
-                    connection.send(ping_msg.encode())
+                    writer.send(ping_msg.encode())
                     print(f"Ping sent to {client_id}")
                 except:
                     print(f"Client {client_id} ping failed - disconnecting")
@@ -62,31 +70,31 @@ def ProcessTheClient(connection, address):
         logging.warning(f"Error handling client {client_id}: {e}")
     finally:
         print(f"Cleaning up client {client_id}")
-        game_server.remove_client(client_id)
+        game_server.disconnect(client_id)
         try:
             connection.close()
         except:
             pass
 
 
-def Server():
+def Server(port=55556, max_clients=MAX_CLIENTS):
     active_clients = []
     my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
     try:
-        my_socket.bind(("0.0.0.0", 55556))
+        my_socket.bind(("0.0.0.0", port))
         my_socket.listen(20)
 
         print("=" * 50)
         print("CAPSA MULTIPLAYER GAME SERVER STARTED")
         print("=" * 50)
-        print(f"Listening on port 55556")
-        print(f"Connect clients to: localhost:55556")
+        print(f"Listening on port {port}")
+        print(f"Connect clients to: localhost:{port}")
         print(f"Supports 1-4 players (AI fills empty slots)")
         print("=" * 50)
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
+        with ThreadPoolExecutor(max_workers=max_clients) as executor:
             client_counter = 0
 
             while True:
@@ -94,6 +102,16 @@ def Server():
                     connection, client_address = my_socket.accept()
                     client_counter += 1
 
+                    active_clients = [f for f in active_clients if not f.done()]
+                    if len(active_clients) >= max_clients:
+                        # Queued behind busy workers it would get no reply at all
+                        print(f"Refusing {client_address}: {max_clients} clients connected")
+                        game_server.send_to_client_direct(
+                            connection, {"command": "ERROR", "message": "Server is full, try again later"}
+                        )
+                        connection.close()
+                        continue
+
                     print(f"Client #{client_counter} connected from {client_address}")
 
                     future = executor.submit(
@@ -101,7 +119,7 @@ def Server():
                     )
                     active_clients.append(future)
 
-                    active_clients = [f for f in active_clients if f.running()]
+                    active_clients = [f for f in active_clients if not f.done()]
 
                     active_count = len(active_clients)
                     human_players = len(game_server.clients)
@@ -123,12 +141,41 @@ def Server():
 
 
 def main():
+    global game_server
+
     logging.basicConfig(
         level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
     )
 
+    parser = argparse.ArgumentParser(description="Capsa TCP server")
+    parser.add_argument("--port", type=int, default=55556)
+    parser.add_argument(
+        "--max-clients",
+        type=int,
+        default=MAX_CLIENTS,
+        help="Concurrent connections served; more are refused",
+    )
+    parser.add_argument(
+        "--redis", action="store_true", help="Keep sessions in Redis (multi-node mode)"
+    )
+    add_redis_arguments(parser)
+    args = parser.parse_args()
+
+    if args.redis:
+        from tcp.server_redis import CapsaGameServerProd
+
+        config = redis_config(args)
+        redis_client = create_redis_client(config)
+        try:
+            redis_client.ping()
+        except Exception as e:
+            print(f"ERROR: Could not connect to Redis at {config['host']}:{config['port']}: {e}")
+            return
+        print(f"Using {config['backend']} Redis backend")
+        game_server = CapsaGameServerProd(redis_client)
+
     try:
-        Server()
+        Server(args.port, args.max_clients)
     except KeyboardInterrupt:
         print("\nServer stopped by user")
     except Exception as e:
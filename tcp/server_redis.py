@@ -1,63 +1,257 @@
-import sys
-import os.path
 import uuid
-from glob import glob
 from datetime import datetime
 import threading
+import time
 import json
 import logging
-import redis
 
 from common.server import CapsaGameServer, GameSession, CapsaGameState
+from common.spectators import SpectatorFanout
 from common.game import deal, who_starts
+from .session_cache import SessionMetadataCache
+from .session_events import SessionEventBus
+from .state_snapshot import GameStateStore
+from .session_scripts import SessionScripts
+from .write_behind import WriteBehindQueue
+from common.redis_backend import create_redis_client
+from .move_log import MoveLog, numbers_to_cards
+from common.player_stats import PlayerStats
+from .session_lease import SessionLeases, fence_key
+
+LOBBY_FIELDS = ('session_name', 'creator_name', 'created_at', 'player_count', 'status')
+LOBBY_CACHE_TTL = 2.0 # seconds a lobby listing is reused before reloading
+LOBBY_PAGE_SIZE = 20
+LOBBY_MAX_PAGE_SIZE = 100
+LOBBY_LEADERBOARD_SIZE = 5 # top players shown with the lobby
+LEADERBOARD_MAX_SIZE = 100
+
+# Commands that change game state and must run on the session's owner node
+OWNER_COMMANDS = ('PLAY_CARDS', 'PASS_TURN', 'START_GAME')
+
+class RemoteClientSocket:
+    """
+    Stands in for the socket of a player connected to another node. The
+    owner keeps one in session.clients for every remote seat, so turn and
+    AI logic see the player, and anything sent to it is delivered through
+    the event bus to the node holding the real connection.
+    """
+
+    def __init__(self, event_bus, session_id, node_id, client_id):
+        self.event_bus = event_bus
+        self.session_id = session_id
+        self.node_id = node_id
+        self.client_id = client_id
+
+    def send(self, data):
+        for line in data.decode().splitlines():
+            if line.strip():
+                self.event_bus.publish(self.session_id, {
+                    'type': 'DELIVER',
+                    'target': self.node_id,
+                    'client_id': self.client_id,
+                    'message': json.loads(line)
+                })
+        return len(data)
+
+def remote_client_id(node_id, client_id):
+    return f"{node_id}/{client_id}"
 
-REDIS_HOST = 'capsagamecache.redis.cache.windows.net'
-REDIS_PORT = 6380 # 6380 for SSL/TLS, 6379 for non-SSL
-REDIS_PASSWORD = ''
-REDIS_DB = 0 # Default Redis database
-
-try:
-    redis_client = redis.StrictRedis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        # username='default',
-        password=REDIS_PASSWORD,
-        db=REDIS_DB,
-        ssl=True, 
-        decode_responses=True 
-    )
-    redis_client.ping()
-    print("Successfully connected to Azure Cache for Redis.")
-except redis.exceptions.ConnectionError as e:
-    print(f"ERROR: Could not connect to Redis: {e}")
-    sys.exit(1) # Exit if Redis connection fails at startup
+def int_option(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
 
 class CapsaGameServerProd(CapsaGameServer):
-    def __init__(self):
+    def __init__(self, redis_client=None):
+        # Defaults to a client configured from the REDIS_* environment
+        self.redis = redis_client or create_redis_client()
         self.sessions = {}
         self.clients = {}
-        self.lock = threading.Lock()
+        self.lock = threading.RLock()
         self.running = True
         self.ai_names = ["AI Bot 1", "AI Bot 2", "AI Bot 3", "AI Bot 4"]
+        self.owned_sessions = set()  # sessions whose authoritative state lives on this VM
+        self.persistence = WriteBehindQueue(self.redis)
+        self.persistence.start()
+        self.session_cache = SessionMetadataCache(self.redis, writer=self.persistence)
+        self.session_cache.start()
+        self.event_bus = SessionEventBus(
+            self.redis, self.session_cache.node_id, self.handle_remote_event
+        )
+        self.event_bus.start()
+        self.node_id = self.session_cache.node_id
+        self.leases = SessionLeases(self.redis, self.node_id, on_lost=self.lose_ownership)
+        self.leases.start()
+        self.fences = {}  # session_id -> highest fencing token seen on GAME_UPDATE events
+        # Snapshots and the move log are what failover resumes from, so they
+        # are written inline; only metadata goes through persistence, and
+        # stats are written by PlayerStats' own thread
+        self.state_store = GameStateStore(self.redis)
+        self.session_scripts = SessionScripts(self.redis, writer=self.persistence)
+        self.move_log = MoveLog(self.redis)
+        self.stats = PlayerStats(self.redis)
+        self.lobby_lock = threading.Lock()
+        self.lobby_listing = None
+        self.lobby_loaded_at = 0.0
+        self.spectators = SpectatorFanout()
+
+    def handle_command(self, client_id, command):
+        if command.get('command') == 'LIST_SESSIONS':
+            self.send_session_menu(
+                client_id,
+                open_slots=command.get('open_slots', 0),
+                cursor=command.get('cursor', 0),
+                limit=command.get('limit', LOBBY_PAGE_SIZE),
+            )
+        elif command.get('command') == 'LEADERBOARD':
+            self.send_leaderboard(client_id, command.get('limit', 10), command.get('player'))
+        elif command.get('command') in OWNER_COMMANDS and self.forward_to_owner(
+            self.seat_for(client_id, command.get('session_id')), command
+        ):
+            return
+        else:
+            super().handle_command(client_id, command)
 
-    def send_session_menu(self, client_id):
-        sessions_list = []
-        active_session_ids = redis_client.smembers("active_sessions")
+    def forward_to_owner(self, client_id, command):
+        """Send a game command to the owning node. Returns False if it should run here."""
+        client_info = self.clients.get(client_id) or {}
+        session_id = client_info.get('session_id')
+        if session_id not in self.sessions:
+            return False
 
-        for sid in active_session_ids:
-            session_data = redis_client.hgetall(f"session:{sid}")
-            if session_data:
-                session_data['session_id'] = sid
-                session_data['player_count'] = int(session_data.get('player_count', '0'))
-                sessions_list.append(session_data)
-            else:
-                redis_client.srem("active_sessions", sid) 
+        with self.lock:
+            owner = self.resolve_owner(session_id)
+        if owner is None or owner == self.node_id:
+            return False
+
+        self.event_bus.publish(session_id, {
+            'type': 'COMMAND',
+            'target': owner,
+            'client_id': remote_client_id(self.node_id, client_id),
+            'command': command
+        })
+        return True
+
+    def resolve_owner(self, session_id):
+        """
+        Node id that runs commands for session_id. Takes over the session if
+        its lease has expired, e.g. because the owning VM went away.
+        """
+        if session_id in self.owned_sessions and self.leases.holds(session_id):
+            return self.node_id
+
+        owner = self.leases.owner(session_id)
+        if owner and owner != self.node_id:
+            self.owned_sessions.discard(session_id)
+            return owner
+        if self.take_ownership(self.sessions[session_id]):
+            return self.node_id
+        return self.leases.owner(session_id)
+
+    def take_ownership(self, session):
+        session_id = session.session_id
+        token, owner = self.leases.acquire(session_id)
+        if not token:
+            return False
+        if session_id in self.owned_sessions:
+            return True
+
+        # Resume from the last snapshot the previous owner managed to write
+        game_state = self.state_store.load(session_id)
+        if game_state:
+            session.game_state = game_state
+        self.owned_sessions.add(session_id)
+        self.fences[session_id] = token
+        print(f"Took ownership of session '{session.session_name}' (ID: {session_id}), fence {token}.")
+
+        # Other nodes re-register their players with us when they see this
+        self.event_bus.publish(session_id, {'type': 'OWNER_CHANGED', 'owner': self.node_id, 'fence': token})
+        if session.game_state.game_active and not self.seat_is_human(session, session.game_state.current_player_index):
+            threading.Timer(2.0, lambda: self.handle_ai_turn(session)).start()
+        return True
+
+    def lose_ownership(self, session_id):
+        """Called by the lease heartbeat when another node may have taken over."""
+        with self.lock:
+            self.owned_sessions.discard(session_id)
+
+    def seat_is_human(self, session, player_index):
+        return any(info['player_index'] == player_index for info in session.clients.values())
+
+    def handle_ai_turn(self, session):
+        # Timers scheduled before a takeover, or for a seat a remote player
+        # has since re-registered, must not play
+        if session.session_id not in self.owned_sessions:
+            return
+        if self.seat_is_human(session, session.game_state.current_player_index):
+            return
+        super().handle_ai_turn(session)
+
+    def send_session_menu(self, client_id, open_slots=0, cursor=0, limit=LOBBY_PAGE_SIZE):
+        open_slots = int_option(open_slots, 0)
+        cursor = max(0, int_option(cursor, 0))
+        limit = max(1, min(int_option(limit, LOBBY_PAGE_SIZE), LOBBY_MAX_PAGE_SIZE))
+
+        sessions_list = [s for s in self.get_lobby_listing() if 4 - s['player_count'] >= open_slots]
+        page = sessions_list[cursor:cursor + limit]
+        next_cursor = cursor + limit if cursor + limit < len(sessions_list) else None
 
         self.send_to_client(client_id, {
             'command': 'SESSION_MENU',
-            'sessions': sessions_list
+            'sessions': page,
+            'total': len(sessions_list),
+            'next_cursor': next_cursor,
+            'leaderboard': self.stats.top(LOBBY_LEADERBOARD_SIZE)
         })
 
+    def send_leaderboard(self, client_id, limit=10, player_name=None):
+        limit = max(1, min(int_option(limit, 10), LEADERBOARD_MAX_SIZE))
+        self.send_to_client(client_id, {
+            'command': 'LEADERBOARD',
+            'top': self.stats.top(limit),
+            'player': self.stats.player(player_name) if player_name else None
+        })
+
+    def get_lobby_listing(self):
+        """
+        Summaries of every active session, newest first. Built with one
+        pipelined batch of HMGETs and reused for LOBBY_CACHE_TTL seconds,
+        so a burst of lobby views costs two round trips instead of N+1.
+        """
+        with self.lobby_lock:
+            if self.lobby_listing is not None and time.time() - self.lobby_loaded_at < LOBBY_CACHE_TTL:
+                return self.lobby_listing
+
+        session_ids = list(self.redis.smembers("active_sessions"))
+        pipe = self.redis.pipeline(transaction=False)
+        for sid in session_ids:
+            pipe.hmget(f"session:{sid}", LOBBY_FIELDS)
+        rows = pipe.execute() if session_ids else []
+
+        listing = []
+        stale = []
+        for sid, values in zip(session_ids, rows):
+            if values[0] is None:
+                stale.append(sid)
+                continue
+            summary = dict(zip(LOBBY_FIELDS, values))
+            summary['session_id'] = sid
+            summary['player_count'] = int(summary['player_count'] or 0)
+            listing.append(summary)
+        if stale:
+            self.redis.srem("active_sessions", *stale)
+        listing.sort(key=lambda s: s['created_at'] or '', reverse=True)
+
+        with self.lobby_lock:
+            self.lobby_listing = listing
+            self.lobby_loaded_at = time.time()
+        return listing
+
+    def invalidate_lobby(self):
+        with self.lobby_lock:
+            self.lobby_listing = None
+
     # In CapsaGameServer class
     def create_session(self, client_id, session_name, creator_name):
         with self.lock:
@@ -65,6 +259,8 @@ class CapsaGameServerProd(CapsaGameServer):
             
             session = GameSession(session_id, session_name, creator_name)
             self.sessions[session_id] = session # Store locally as this VM is managing it initially
+            self.owned_sessions.add(session_id)
+            self.fences[session_id] = self.leases.acquire(session_id)[0]
             
             client_info = self.clients[client_id]
             client_info['session_id'] = session_id
@@ -85,8 +281,9 @@ class CapsaGameServerProd(CapsaGameServer):
                 "players_names_json": json.dumps([creator_name, "", "", ""]),
                 "game_state_json": json.dumps(self._get_initial_game_state_json())
             }
-            redis_client.hmset(f"session:{session_id}", session_data)
-            redis_client.sadd("active_sessions", session_id)
+            self.session_cache.set(session_id, session_data)
+            self.redis.sadd("active_sessions", session_id)
+            self.invalidate_lobby()
 
             print(f"Session '{session_name}' created by {creator_name} (ID: {session_id}) and stored in Redis.")
 
@@ -116,66 +313,20 @@ class CapsaGameServerProd(CapsaGameServer):
     # In CapsaGameServer class
     def join_session(self, client_id, session_id, player_name):
         with self.lock:
-            if not redis_client.sismember("active_sessions", session_id):
-                self.send_to_client(client_id, {
-                    'command': 'ERROR',
-                    'message': 'Session not found or no longer active'
-                })
-                return
-
-            pipe = redis_client.pipeline()
-            pipe.watch(f"session:{session_id}")
-
-            session_data_from_redis = pipe.hgetall(f"session:{session_id}")
-            if not session_data_from_redis:
-                pipe.unwatch()
-                self.send_to_client(client_id, {'command': 'ERROR', 'message': 'Session not found (race condition)'})
-                return
-
-            current_player_count = int(session_data_from_redis.get('player_count', '0'))
-            if current_player_count >= 4:
-                pipe.unwatch()
-                self.send_to_client(client_id, {'command': 'ERROR', 'message': 'Session is full (4 players max)'})
+            final_player_name = player_name.strip()[:20]
+            player_index, result = self.session_scripts.join(session_id, final_player_name)
+            if player_index < 0:
+                self.send_to_client(client_id, {'command': 'ERROR', 'message': result})
                 return
+            final_player_name = result
+            self.session_cache.changed(session_id)
+            self.invalidate_lobby()
 
             session_obj = self.sessions.get(session_id)
             if not session_obj:
-                session_obj = GameSession(
-                    session_id,
-                    session_data_from_redis.get('session_name'),
-                    session_data_from_redis.get('creator_name')
-                )
+                session_obj = self.restore_session(session_id, self.session_cache.get(session_id))
                 self.sessions[session_id] = session_obj
 
-            taken_slots = [c.get('player_index') for c in session_obj.clients.values()]
-            global_players_names = json.loads(session_data_from_redis.get('players_names_json', '["", "", "", ""]'))
-            
-            player_index = -1
-            for i in range(4):
-                if global_players_names[i] == "":
-                    player_index = i
-                    break
-            
-            if player_index == -1:
-                pipe.unwatch()
-                self.send_to_client(client_id, {'command': 'ERROR', 'message': 'No available player slots in session.'})
-                return
-
-            final_player_name = player_name.strip()[:20]
-            if not final_player_name:
-                final_player_name = f"Player {player_index + 1}"
-
-            pipe.multi()
-            pipe.hincrby(f"session:{session_id}", "player_count", 1)
-            global_players_names[player_index] = final_player_name
-            pipe.hset(f"session:{session_id}", "players_names_json", json.dumps(global_players_names))
-
-            try:
-                pipe.execute()
-            except redis.exceptions.WatchError:
-                self.send_to_client(client_id, {'command': 'ERROR', 'message': 'Failed to join: Session state changed. Try again.'})
-                return
-
             # Update local state for the client that just joined this VM
             client_info = self.clients[client_id]
             client_info['session_id'] = session_id
@@ -188,6 +339,10 @@ class CapsaGameServerProd(CapsaGameServer):
 
             print(f"{final_player_name} joined session '{session_obj.session_name}' (ID: {session_id}) as Player {player_index + 1}.")
 
+            owner = self.resolve_owner(session_id)
+            if owner != self.node_id:
+                self.register_with_owner(session_id, owner, client_id, client_info)
+
             self.send_to_client(client_id, {
                 'command': 'SESSION_JOINED',
                 'session_id': session_id,
@@ -206,6 +361,34 @@ class CapsaGameServerProd(CapsaGameServer):
             # Fetch updated game state from Redis and then broadcast it
             self.broadcast_game_state_to_session(session_id)
 
+    def spectate_session(self, client_id, session_id):
+        with self.lock:
+            if session_id not in self.sessions:
+                session_data = self.session_cache.get(session_id)
+                if session_data:
+                    self.sessions[session_id] = self.restore_session(session_id, session_data)
+            if session_id in self.sessions and session_id not in self.owned_sessions:
+                # Our copy may be stale, the owner's next GAME_UPDATE event refreshes the view
+                self.event_bus.publish(session_id, {'type': 'RESYNC'})
+        super().spectate_session(client_id, session_id)
+
+    def restore_session(self, session_id, session_data):
+        """
+        Build a local GameSession from Redis: metadata from the session hash
+        and, if one was saved, the full game state snapshot. Any node can use
+        this to resume a table whose owning VM went away.
+        """
+        session_obj = GameSession(
+            session_id,
+            session_data.get('session_name'),
+            session_data.get('creator_name')
+        )
+        session_obj.status = session_data.get('status', 'waiting')
+        game_state = self.state_store.load(session_id)
+        if game_state:
+            session_obj.game_state = game_state
+        return session_obj
+
     # In CapsaGameServer class
     def remove_client(self, client_id):
         with self.lock:
@@ -223,37 +406,39 @@ class CapsaGameServerProd(CapsaGameServer):
                 if client_id in session.clients:
                     del session.clients[client_id]
 
+                session_removed = False
+                if session_id not in self.owned_sessions:
+                    owner = self.leases.owner(session_id)
+                    if owner:
+                        self.event_bus.publish(session_id, {
+                            'type': 'REMOTE_LEAVE',
+                            'target': owner,
+                            'client_id': remote_client_id(self.node_id, client_id)
+                        })
+
                 if player_index >= 0:
-                    pipe = redis_client.pipeline()
-                    pipe.watch(f"session:{session_id}")
-                    
-                    session_data_from_redis = pipe.hgetall(f"session:{session_id}")
-                    if session_data_from_redis:
-                        global_players_names = json.loads(session_data_from_redis.get('players_names_json', '["", "", "", ""]'))
-                        global_players_names[player_index] = ""
-
-                        pipe.multi()
-                        pipe.hincrby(f"session:{session_id}", "player_count", -1)
-                        pipe.hset(f"session:{session_id}", "players_names_json", json.dumps(global_players_names))
-                        try:
-                            pipe.execute()
-                        except redis.exceptions.WatchError:
-                            logging.warning(f"Redis transaction failed for client removal: {client_id}")
-
-                        updated_count = int(redis_client.hget(f"session:{session_id}", "player_count") or 0)
-                        if updated_count <= 0:
-                            redis_client.srem("active_sessions", session_id)
-                            redis_client.delete(f"session:{session_id}")
-                            print(f"Session '{session.session_name}' (ID: {session_id}) empty and removed from Redis.")
-                    
+                    remaining = self.session_scripts.leave(session_id, player_index)
+                    self.session_cache.changed(session_id)
+                    self.invalidate_lobby()
+                    if remaining <= 0:
+                        session_removed = True
+                        self.state_store.forget(session_id)
+                        self.leases.release(session_id)
+                    if remaining == 0:
+                        print(f"Session '{session.session_name}' (ID: {session_id}) empty and removed from Redis.")
+
                     session.game_state.players[player_index].name = self.ai_names[player_index]
                     session.game_state.players_names[player_index] = self.ai_names[player_index]
 
 
                 print(f"{player_name} left session '{session.session_name}', replaced with {self.ai_names[player_index]}.")
 
-                if len(session.clients) == 0 and not session_id in redis_client.smembers("active_sessions"):
+                if len(session.clients) == 0 and (session_removed or not self.redis.sismember("active_sessions", session_id)):
                     del self.sessions[session_id] # Clean up local session if no clients left on this VM AND not globally active
+                    self.owned_sessions.discard(session_id)
+                    self.event_bus.forget(session_id)
+                    self.stats.forget(session_id)
+                    self.close_spectating(session_id)
                     print(f"Local session '{session.session_name}' removed.")
                 else:
                     self.broadcast_game_state_to_session(session_id)
@@ -278,50 +463,40 @@ class CapsaGameServerProd(CapsaGameServer):
             if len(session.clients) == 0:
                 return
 
-            session.game_state.reset_game()
-            session.status = "playing"
+            game_state = CapsaGameState()
+            deal(game_state.players)
 
-            redis_client.hset(f"session:{session.session_id}", "status", "playing")
-            
-            players_names_to_redis = ["", "", "", ""]
-            for i in range(4):
-                human_in_slot = False
-                for client_id, client_info in session.clients.items():
-                    if client_info['player_index'] == i:
-                        session.game_state.players[i].name = client_info['name']
-                        session.game_state.players_names[i] = client_info['name']
-                        players_names_to_redis[i] = client_info['name']
-                        human_in_slot = True
-                        break
-                
-                if not human_in_slot:
-                    session.game_state.players[i].name = self.ai_names[i]
-                    session.game_state.players_names[i] = self.ai_names[i]
-                    players_names_to_redis[i] = self.ai_names[i]
-            
-            redis_client.hset(f"session:{session.session_id}", "players_names_json", json.dumps(players_names_to_redis))
-
-            deal(session.game_state.players)
-
-            starting_player = who_starts(session.game_state.players)
-            session.game_state.current_player_index = session.game_state.players.index(starting_player)
-
-            session.game_state.game_active = True
+            starting_player = who_starts(game_state.players)
+            game_state.current_player_index = game_state.players.index(starting_player)
+            game_state.game_active = True
 
             game_state_data = {
-                'current_player_index': session.game_state.current_player_index,
+                'current_player_index': game_state.current_player_index,
                 'game_active': True,
                 'winner': None,
                 'played_cards': [],
                 'played_cards_history': [],
                 'players_passed': [],
                 'round_passes': [],
-                'players_card_counts': [len(p.hand) for p in session.game_state.players]
+                'players_card_counts': [len(p.hand) for p in game_state.players]
             }
-            
-            redis_client.hset(f"session:{session.session_id}", "game_state_json", json.dumps(game_state_data))
-            
-            redis_client.hset(f"session:{session.session_id}", "current_player_index", session.game_state.current_player_index)
+
+            # Empty seats are filled with AI names in the same round trip
+            players_names = self.session_scripts.start(
+                session.session_id, game_state_data, game_state.current_player_index, self.ai_names
+            )
+            if players_names is None:
+                logging.warning(f"Session {session.session_id} already started or no longer exists.")
+                return
+            self.session_cache.changed(session.session_id)
+            self.invalidate_lobby()
+
+            for i, name in enumerate(players_names):
+                game_state.players[i].name = name
+                game_state.players_names[i] = name
+            session.game_state = game_state
+            session.status = "playing"
+            self.record_start(session)
 
             print(f"New Capsa game started in session '{session.session_name}'!")
             print(f"Players: {[p.name for p in session.game_state.players]}")
@@ -339,15 +514,18 @@ class CapsaGameServerProd(CapsaGameServer):
 
             # For HTTP server: return {'success': 'Game started'}
 
+    def record_move(self, session, move):
+        self.move_log.append(session.session_id, move)
+        if move['type'] == 'start':
+            self.stats.game_started(session.session_id)
+        elif move['type'] == 'play':
+            self.stats.hand_played(session.session_id, move['player'], numbers_to_cards(move['cards']))
+
     def end_game(self, session, winner_name):
         session.game_state.game_active = False
         session.game_state.winner = winner_name
         session.status = "finished"
 
-        redis_client.hset(f"session:{session.session_id}", "status", "finished")
-        
-        redis_client.hset(f"session:{session.session_id}", "winner", winner_name)
-        
         game_state_data = {
             'current_player_index': session.game_state.current_player_index,
             'game_active': False,
@@ -358,12 +536,21 @@ class CapsaGameServerProd(CapsaGameServer):
             'round_passes': list(session.game_state.round_passes),
             'players_card_counts': [len(p.hand) for p in session.game_state.players]
         }
-        redis_client.hset(f"session:{session.session_id}", "game_state_json", json.dumps(game_state_data))
-        
         game_end_time = datetime.now().isoformat()
-        redis_client.hset(f"session:{session.session_id}", "game_end_time", game_end_time)
-        
-        redis_client.expire(f"session:{session.session_id}", 3600)
+        self.session_cache.set_later(session.session_id, {
+            "status": "finished",
+            "winner": winner_name,
+            "game_state_json": json.dumps(game_state_data),
+            "game_end_time": game_end_time,
+        })
+
+        self.persistence.expire(f"session:{session.session_id}", 3600)
+        self.invalidate_lobby()
+        fence = self.leases.token(session.session_id)
+        self.state_store.save(
+            session.session_id, session.game_state, fence=(fence_key(session.session_id), fence)
+        )
+        self.record_results(session, winner_name)
 
         # Broadcast game end message to all clients
         self.broadcast_message_to_session(session.session_id, {
@@ -371,6 +558,7 @@ class CapsaGameServerProd(CapsaGameServer):
             'winner': winner_name,
             'game_end_time': game_end_time
         })
+        self.publish_spectator_view(session)
 
         print(f"Game ended in session '{session.session_name}'! Winner: {winner_name}")
         print(f"Session data will expire in 1 hour for cleanup")
@@ -378,16 +566,24 @@ class CapsaGameServerProd(CapsaGameServer):
         # Schedule auto restart after 5 seconds
         threading.Timer(5.0, lambda: self.auto_restart_game(session)).start()
 
+    def record_results(self, session, winner_name):
+        players = session.game_state.players
+        humans = [
+            (info['player_index'], info['name'], len(players[info['player_index']].hand))
+            for info in session.clients.values()
+        ]
+        winner_index = next((i for i, p in enumerate(players) if p.name == winner_name and not p.hand), -1)
+        # Written by the stats thread, GAME_END does not wait on Redis for it
+        self.stats.record_game_later(session.session_id, humans, winner_index)
+
     def auto_restart_game(self, session):
         if len(session.clients) > 0:
             session.status = "waiting"
             session.game_state.reset_game()
             
-            redis_client.hset(f"session:{session.session_id}", "status", "waiting")
+            self.persistence.sadd("active_sessions", session.session_id, on_flush=self.invalidate_lobby)
             
-            redis_client.sadd("active_sessions", session.session_id)
-            
-            redis_client.hdel(f"session:{session.session_id}", "winner", "game_end_time")
+            self.session_cache.delete_fields_later(session.session_id, "winner", "game_end_time")
             
             initial_game_state = {
                 'current_player_index': 0,
@@ -399,11 +595,14 @@ class CapsaGameServerProd(CapsaGameServer):
                 'round_passes': [],
                 'players_card_counts': [0, 0, 0, 0]
             }
-            redis_client.hset(f"session:{session.session_id}", "game_state_json", json.dumps(initial_game_state))
-            
-            redis_client.hset(f"session:{session.session_id}", "current_player_index", 0)
+            self.session_cache.set_later(session.session_id, {
+                "status": "waiting",
+                "game_state_json": json.dumps(initial_game_state),
+                "current_player_index": 0,
+            })
             
-            redis_client.persist(f"session:{session.session_id}")
+            self.persistence.persist(f"session:{session.session_id}")
+            self.invalidate_lobby()
             
             print(f"Session '{session.session_name}' auto-restarted and set to waiting state")
             
@@ -415,16 +614,22 @@ class CapsaGameServerProd(CapsaGameServer):
             })
         else:
             print(f"Session '{session.session_name}' has no clients, cleaning up...")
-            redis_client.srem("active_sessions", session.session_id)
-            redis_client.delete(f"session:{session.session_id}")
+            self.persistence.srem("active_sessions", session.session_id, on_flush=self.invalidate_lobby)
+            self.session_cache.delete(session.session_id)
+            self.state_store.delete(session.session_id)
+            self.leases.release(session.session_id)
             
             if session.session_id in self.sessions:
                 del self.sessions[session.session_id]
+            self.owned_sessions.discard(session.session_id)
+            self.event_bus.forget(session.session_id)
+            self.stats.forget(session.session_id)
+            self.close_spectating(session.session_id)
 
     # In CapsaGameServer class
     def broadcast_game_state_to_session(self, session_id):
         try:
-            session_data_from_redis = redis_client.hgetall(f"session:{session_id}")
+            session_data_from_redis = self.session_cache.get(session_id)
             if not session_data_from_redis:
                 logging.warning(f"Session {session_id} not found in Redis during broadcast.")
                 return
@@ -446,45 +651,50 @@ class CapsaGameServerProd(CapsaGameServer):
             for i in range(4):
                 session.game_state.players_names[i] = global_players_names[i]
 
-            hands_data = {}
-            for client_id, client_info in session.clients.items():
-                player_index = client_info['player_index']
-                if 0 <= player_index < len(session.game_state.players):
-                    hands_data[client_id] = [self.card_to_dict(card) for card in session.game_state.players[player_index].hand]
-                else:
-                    hands_data[client_id] = []
-
-            played_cards_data = [self.card_to_dict(card) for card in session.game_state.played_cards]
-
-            for client_id, client_info in session.clients.items():
-                # Safely get current player name
-                current_player_name = ""
-                if (0 <= session.game_state.current_player_index < len(session.game_state.players) and 
-                    session.game_state.players[session.game_state.current_player_index]):
-                    current_player_name = session.game_state.players[session.game_state.current_player_index].name
-                
-                state_msg = {
-                    'command': 'GAME_UPDATE',
-                    'session_id': session_id,
-                    'session_name': session_data_from_redis.get('session_name', 'Unknown Session'),
-                    'current_player_index': session.game_state.current_player_index,
-                    'current_player_name': current_player_name,
-                    'players_names': global_players_names,
-                    'my_hand': hands_data[client_id],
-                    'my_player_index': client_info['player_index'],
-                    'played_cards': played_cards_data,
-                    'players_card_counts': [len(p.hand) for p in session.game_state.players],
-                    'game_active': session.game_state.game_active,
-                    'winner': session.game_state.winner,
-                    'players_passed': list(session.game_state.round_passes)
-                }
-                self.send_to_client(client_id, state_msg)
-
+            # Safely get current player name
             current_player_name = ""
             if (0 <= session.game_state.current_player_index < len(session.game_state.players) and 
                 session.game_state.players[session.game_state.current_player_index]):
                 current_player_name = session.game_state.players[session.game_state.current_player_index].name
-                
+
+            public_state = {
+                'command': 'GAME_UPDATE',
+                'session_id': session_id,
+                'session_name': session_data_from_redis.get('session_name', 'Unknown Session'),
+                'current_player_index': session.game_state.current_player_index,
+                'current_player_name': current_player_name,
+                'players_names': global_players_names,
+                'played_cards': [self.card_to_dict(card) for card in session.game_state.played_cards],
+                'players_card_counts': [len(p.hand) for p in session.game_state.players],
+                'game_active': session.game_state.game_active,
+                'winner': session.game_state.winner,
+                'players_passed': list(session.game_state.round_passes)
+            }
+            hands_by_index = {
+                str(i): [self.card_to_dict(card) for card in player.hand]
+                for i, player in enumerate(session.game_state.players)
+            }
+
+            if session_id not in self.owned_sessions:
+                # Our copy is only a shell without hands, ask the owning node to rebroadcast
+                self.event_bus.publish(session_id, {'type': 'RESYNC'})
+                return
+
+            # Every state change ends in a broadcast, so persist the snapshot here.
+            # The fence makes Redis drop it if a newer owner has taken over.
+            fence = self.leases.token(session_id)
+            self.state_store.save(session_id, session.game_state, fence=(fence_key(session_id), fence))
+
+            self.send_state_to_local_clients(session, public_state, hands_by_index)
+
+            # Forward to players of this session connected to other nodes
+            self.event_bus.publish(session_id, {
+                'type': 'GAME_UPDATE',
+                'fence': fence,
+                'state': public_state,
+                'hands': hands_by_index
+            })
+
             print(f"Broadcasting game state to session '{session.session_name}' - Current player: {current_player_name}")
             
         except Exception as e:
@@ -492,98 +702,142 @@ class CapsaGameServerProd(CapsaGameServer):
             import traceback
             traceback.print_exc()
 
-    def card_to_dict(self, card):
-        return {
-            'number': card.number,
-            'suit': card.suit,
-            'value': card.value,
-            'pp_value': card.pp_value,
-            'selected': getattr(card, 'selected', False)
-        }
+    def send_state_to_local_clients(self, session, public_state, hands_by_index):
+        for client_id, client_info in list(session.clients.items()):
+            if client_info.get('remote'):
+                continue  # their node sends it from the GAME_UPDATE event
+            player_index = client_info['player_index']
+            state_msg = dict(public_state)
+            state_msg['my_hand'] = hands_by_index.get(str(player_index), [])
+            state_msg['my_player_index'] = player_index
+            self.send_to_client(client_id, state_msg)
+        # Owners and the nodes receiving GAME_UPDATE events both get here
+        self.publish_spectator_view(session, public_state)
+
+    def broadcast_message_to_session(self, session_id, message):
+        message = dict(message, session_id=session_id)
+        session = self.sessions.get(session_id)
+        if session:
+            for client_id, client_info in list(session.clients.items()):
+                if not client_info.get('remote'):
+                    self.send_to_client(client_id, message)
+        self.event_bus.publish(session_id, {'type': 'MESSAGE', 'message': message})
+
+    def register_with_owner(self, session_id, owner, client_id, client_info):
+        self.event_bus.publish(session_id, {
+            'type': 'REMOTE_JOIN',
+            'target': owner,
+            'client_id': remote_client_id(self.node_id, client_id),
+            'local_client_id': client_id,
+            'player_index': client_info['player_index'],
+            'name': client_info['name']
+        })
 
-class HttpServer:
-    def __init__(self):
-        self.sessions = {}
-        self.types = {}
-
-    def response(self, kode=404, message="Not Found", messagebody=bytes(), headers={}):
-        tanggal = datetime.now().strftime("%c")
-        resp = []
-        resp.append("HTTP/1.0 {} {}\r\n".format(kode, message))
-        resp.append("Date: {}\r\n".format(tanggal))
-        resp.append("Connection: close\r\n")
-        resp.append("Server: myserver/1.0\r\n")
-        resp.append("Content-Length: {}\r\n".format(len(messagebody)))
-        for kk in headers:
-            resp.append("{}:{}\r\n".format(kk, headers[kk]))
-        resp.append("\r\n")
-
-        response_headers = ""
-        for i in resp:
-            response_headers = "{}{}".format(response_headers, i)
-        
-        if type(messagebody) is not bytes:
-            messagebody = messagebody.encode()
+    def add_remote_client(self, session, event):
+        client_info = {
+            'socket': RemoteClientSocket(self.event_bus, session.session_id, event['origin'], event['local_client_id']),
+            'session_id': session.session_id,
+            'player_index': event['player_index'],
+            'name': event['name'],
+            'remote': True
+        }
+        self.clients[event['client_id']] = client_info
+        session.clients[event['client_id']] = client_info
+        session.game_state.players[event['player_index']].name = event['name']
+        session.game_state.players_names[event['player_index']] = event['name']
+        self.broadcast_game_state_to_session(session.session_id)
+
+    def remove_remote_client(self, session, remote_id):
+        client_info = self.clients.pop(remote_id, None)
+        session.clients.pop(remote_id, None)
+        if not client_info:
+            return
+        player_index = client_info['player_index']
+        session.game_state.players[player_index].name = self.ai_names[player_index]
+        session.game_state.players_names[player_index] = self.ai_names[player_index]
+        if not session.clients and not self.redis.sismember("active_sessions", session.session_id):
+            self.sessions.pop(session.session_id, None)
+            self.owned_sessions.discard(session.session_id)
+            self.leases.release(session.session_id)
+            self.event_bus.forget(session.session_id)
+            self.stats.forget(session.session_id)
+            self.close_spectating(session.session_id)
+            return
+        self.broadcast_game_state_to_session(session.session_id)
+        if session.game_state.game_active and session.game_state.current_player_index == player_index:
+            threading.Timer(2.0, lambda: self.handle_ai_turn(session)).start()
 
-        response = response_headers.encode() + messagebody
-        return response
+    def handle_remote_event(self, session_id, event):
+        """Called from the event bus thread for events published by other nodes."""
+        session = self.sessions.get(session_id)
+        if not session:
+            return
 
-    def proses(self, data):
-        requests = data.split("\r\n")
-        baris = requests[0]
-        all_headers = [n for n in requests[1:] if n != ""]
+        event_type = event.get('type')
+        if event.get('target', self.node_id) != self.node_id:
+            return
 
-        j = baris.split(" ")
-        try:
-            method = j[0].upper().strip()
-            if method == "GET":
-                object_address = j[1].strip()
-                return self.http_get(object_address, all_headers)
-            if method == "POST":
-                object_address = j[1].strip()
-                return self.http_post(object_address, all_headers)
+        if event_type == 'GAME_UPDATE' and session_id not in self.owned_sessions:
+            # Fencing: ignore anything from an owner older than one we've heard from
+            fence = event.get('fence', 0)
+            if fence < self.fences.get(session_id, 0):
+                logging.warning(f"Dropping update for {session_id} from stale owner (fence {fence})")
+                return
+            self.fences[session_id] = fence
+            self.send_state_to_local_clients(session, event['state'], event['hands'])
+
+        elif event_type == 'DELIVER':
+            self.send_to_client(event['client_id'], event['message'])
+
+        elif event_type == 'OWNER_CHANGED':
+            with self.lock:
+                self.fences[session_id] = max(self.fences.get(session_id, 0), event['fence'])
+                if session_id in self.owned_sessions:
+                    self.owned_sessions.discard(session_id)
+                    logging.warning(f"Session {session_id} was taken over by node {event['owner']}")
+                for client_id, client_info in list(session.clients.items()):
+                    if client_info.get('remote'):
+                        # The new owner tracks them now, their nodes re-register there
+                        session.clients.pop(client_id, None)
+                        self.clients.pop(client_id, None)
+                    else:
+                        self.register_with_owner(session_id, event['owner'], client_id, client_info)
+
+        elif event_type == 'REMOTE_JOIN' and session_id in self.owned_sessions:
+            with self.lock:
+                self.add_remote_client(session, event)
+
+        elif event_type == 'REMOTE_LEAVE' and session_id in self.owned_sessions:
+            with self.lock:
+                self.remove_remote_client(session, event['client_id'])
+
+        elif event_type == 'COMMAND':
+            if session_id in self.owned_sessions and event['client_id'] in self.clients:
+                CapsaGameServer.handle_command(self, event['client_id'], event['command'])
             else:
-                return self.response(400, "Bad Request", "", {})
-        except IndexError:
-            return self.response(400, "Bad Request", "", {})
-
-    def http_get(self, object_address, headers):
-        files = glob("./*")
-        thedir = "./"
-        if object_address == "/":
-            return self.response(200, "OK", "Ini Adalah web Server percobaan", dict())
-
-        if object_address == "/video":
-            return self.response(
-                302, "Found", "", dict(location="https://youtu.be/katoxpnTf04")
-            )
-        if object_address == "/santai":
-            return self.response(200, "OK", "santai saja", dict())
-
-        object_address = object_address[1:]
-        if thedir + object_address not in files:
-            return self.response(404, "Not Found", "", {})
-        fp = open(thedir + object_address, "rb")
-        isi = fp.read()
-
-        fext = os.path.splitext(thedir + object_address)[1]
-        content_type = self.types[fext]
-
-        headers = {}
-        headers["Content-type"] = content_type
-
-        return self.response(200, "OK", isi, headers)
+                self.event_bus.publish(session_id, {
+                    'type': 'DELIVER',
+                    'target': event['origin'],
+                    'client_id': event['client_id'].partition('/')[2],
+                    'message': {'command': 'ERROR', 'message': 'Session owner changed, please try again.'}
+                })
 
-    def http_post(self, object_address, headers):
-        headers = {}
-        isi = "kosong"
-        return self.response(200, "OK", isi, headers)
+        elif event_type == 'MESSAGE':
+            for client_id, client_info in list(session.clients.items()):
+                if not client_info.get('remote'):
+                    self.send_to_client(client_id, event['message'])
 
+        elif event_type == 'RESYNC' and session_id in self.owned_sessions:
+            # A remote join may have changed names we hold in the cache
+            self.session_cache.invalidate(session_id)
+            with self.lock:
+                self.broadcast_game_state_to_session(session_id)
 
-if __name__ == "__main__":
-    httpserver = HttpServer()
-    d = httpserver.proses("GET testing.txt HTTP/1.0")
-    print(d)
-    d = httpserver.proses("GET donalbebek.jpg HTTP/1.0")
-    print(d)
-    
\ No newline at end of file
+    def card_to_dict(self, card):
+        return {
+            'number': card.number,
+            'suit': card.suit,
+            'value': card.value,
+            'pp_value': card.pp_value,
+            'selected': getattr(card, 'selected', False)
+        }
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+import uuid
+
+INVALIDATION_CHANNEL = "session_invalidations"
+
+
+class SessionMetadataCache:
+    """
+    Read-through cache of the session:<id> hashes kept in Redis.
+
+    Writes go through the cache to Redis and are announced on
+    INVALIDATION_CHANNEL so every other node drops its copy. Reads are
+    served locally once a session has been loaded, so a broadcast does not
+    need a Redis round trip in the common case.
+    """
+
+    def __init__(self, redis_client, node_id=None, max_age=60.0, writer=None):
+        self.redis = redis_client
+        self.writer = writer  # optional WriteBehindQueue for set_later()
+        self.node_id = node_id or uuid.uuid4().hex[:8]
+        self.max_age = max_age  # safety net in case an invalidation is lost
+        self.lock = threading.Lock()
+        self.entries = {}  # session_id -> (loaded_at, dict)
+        self.generations = {}  # session_id -> invalidation counter
+        self.epoch = 0  # bumped when the whole cache is dropped
+        self.running = False
+
+    def key(self, session_id):
+        return f"session:{session_id}"
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.listen_invalidations, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def listen_invalidations(self):
+        while self.running:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything cached before (re)subscribing may have missed an invalidation
+                self.clear()
+                for message in pubsub.listen():
+                    if not self.running:
+                        break
+                    node_id, _, session_id = str(message["data"]).partition(":")
+                    if node_id != self.node_id:
+                        self.invalidate(session_id)
+            except Exception as e:
+                logging.warning(f"Session cache subscriber error: {e}")
+                time.sleep(1.0)
+
+    def get(self, session_id):
+        """Return a copy of the session hash, loading it from Redis on a miss."""
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry and time.time() - entry[0] < self.max_age:
+                return dict(entry[1])
+            generation = (self.epoch, self.generations.get(session_id, 0))
+
+        data = self.redis.hgetall(self.key(session_id))
+
+        with self.lock:
+            # Only keep what we read if nobody invalidated it meanwhile
+            current = (self.epoch, self.generations.get(session_id, 0))
+            if data and current == generation:
+                self.entries[session_id] = (time.time(), data)
+        return dict(data)
+
+    def set(self, session_id, mapping):
+        mapping = {field: str(value) for field, value in mapping.items()}
+        self.redis.hset(self.key(session_id), mapping=mapping)
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry:
+                entry[1].update(mapping)
+        self.publish(session_id)
+
+    def delete_fields(self, session_id, *fields):
+        self.redis.hdel(self.key(session_id), *fields)
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry:
+                for field in fields:
+                    entry[1].pop(field, None)
+        self.publish(session_id)
+
+    def set_later(self, session_id, mapping):
+        """Like set(), but the Redis write goes through the write-behind queue."""
+        mapping = {field: str(value) for field, value in mapping.items()}
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry:
+                entry[1].update(mapping)
+        self.writer.hset(self.key(session_id), mapping, on_flush=lambda: self.changed(session_id))
+
+    def delete_fields_later(self, session_id, *fields):
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry:
+                for field in fields:
+                    entry[1].pop(field, None)
+        self.writer.hdel(self.key(session_id), *fields, on_flush=lambda: self.changed(session_id))
+
+    def delete(self, session_id):
+        if self.writer:
+            self.writer.discard(self.key(session_id))
+        self.redis.delete(self.key(session_id))
+        self.changed(session_id)
+
+    def changed(self, session_id):
+        """Call after writing session:<id> directly, e.g. in a transaction."""
+        self.invalidate(session_id)
+        self.publish(session_id)
+
+    def invalidate(self, session_id):
+        with self.lock:
+            self.entries.pop(session_id, None)
+            self.generations[session_id] = self.generations.get(session_id, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.epoch += 1
+            self.entries.clear()
+
+    def publish(self, session_id):
+        try:
+            self.redis.publish(INVALIDATION_CHANNEL, f"{self.node_id}:{session_id}")
+        except Exception as e:
+            logging.warning(f"Failed to publish invalidation for {session_id}: {e}")
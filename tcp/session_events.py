@@ -0,0 +1,111 @@
+import json
+import logging
+import threading
+import time
+
+CHANNEL_PREFIX = "session_events:"
+SEQUENCE_TTL = 86400
+
+# INCR and PUBLISH in one script so sequence numbers follow publish order
+PUBLISH_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', ARGV[1], seq .. '|' .. ARGV[2])
+return seq
+"""
+
+
+class SessionEventBus:
+    """
+    Fans session events out to every server node over Redis pub/sub.
+
+    Each event is published on session_events:<session_id> with a
+    per-session sequence number taken from Redis. Subscribers drop
+    duplicates and stale events and log gaps, then hand events from other
+    nodes to handler(session_id, event).
+    """
+
+    def __init__(self, redis_client, node_id, handler):
+        self.redis = redis_client
+        self.node_id = node_id
+        self.handler = handler
+        self.publish_script = redis_client.register_script(PUBLISH_SCRIPT)
+        self.lock = threading.Lock()
+        self.last_seq = {}  # session_id -> highest sequence number seen
+        self.stats = {"delivered": 0, "duplicates": 0, "gaps": 0}
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.listen, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def publish(self, session_id, event):
+        payload = json.dumps(dict(event, origin=self.node_id))
+        try:
+            return self.publish_script(
+                keys=[f"session_seq:{session_id}"],
+                args=[CHANNEL_PREFIX + session_id, payload, SEQUENCE_TTL],
+            )
+        except Exception as e:
+            logging.warning(f"Failed to publish event for session {session_id}: {e}")
+            return None
+
+    def forget(self, session_id):
+        with self.lock:
+            self.last_seq.pop(session_id, None)
+
+    def listen(self):
+        while self.running:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                for message in pubsub.listen():
+                    if not self.running:
+                        break
+                    try:
+                        self.receive(message["channel"], message["data"])
+                    except Exception as e:
+                        # One bad event must not cost us the subscription
+                        logging.exception(f"Failed to handle session event: {e}")
+            except Exception as e:
+                logging.warning(f"Session event subscriber error: {e}")
+                time.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def receive(self, channel, data):
+        session_id = channel[len(CHANNEL_PREFIX):]
+        seq_text, _, payload = data.partition("|")
+        if not self.accept(session_id, int(seq_text)):
+            return
+
+        event = json.loads(payload)
+        if event.get("origin") == self.node_id:
+            return
+        self.handler(session_id, event)
+
+    def accept(self, session_id, seq):
+        with self.lock:
+            last = self.last_seq.get(session_id)
+            if last is not None and seq <= last:
+                self.stats["duplicates"] += 1
+                logging.warning(
+                    f"Dropping stale event {seq} for session {session_id} (last {last})"
+                )
+                return False
+            if last is not None and seq > last + 1:
+                self.stats["gaps"] += 1
+                logging.warning(
+                    f"Missed events {last + 1}-{seq - 1} for session {session_id}"
+                )
+            self.last_seq[session_id] = seq
+            self.stats["delivered"] += 1
+            return True
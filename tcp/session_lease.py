@@ -0,0 +1,150 @@
+import logging
+import threading
+import time
+
+# KEYS: owner key, fence counter
+# ARGV: node_id, lease ms
+# Returns {fencing token, owner node}. A new owner gets a fresh token from
+# the counter; the current owner just extends its lease.
+ACQUIRE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner then
+    local node, token = string.match(owner, '^(.*):(%d+)$')
+    if node == ARGV[1] then
+        redis.call('PEXPIRE', KEYS[1], ARGV[2])
+        return {tonumber(token), node}
+    end
+    return {0, node}
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], ARGV[1] .. ':' .. token, 'NX', 'PX', ARGV[2])
+return {token, ARGV[1]}
+"""
+
+# KEYS: owner key
+# ARGV: node_id:token, lease ms
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS: owner key
+# ARGV: node_id:token
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def fence_key(session_id):
+    return f"session_fence:{session_id}"
+
+
+class SessionLeases:
+    """
+    Lease-based session ownership across server nodes.
+
+    session_owner:<id> holds "<node_id>:<token>" and is set with NX-style
+    semantics and a PX expiry. The owner renews it from a heartbeat thread;
+    if a renewal fails the lease is dropped locally and on_lost(session_id)
+    is called, so a paused node stops acting as owner. Every new grant takes
+    a fencing token from session_fence:<id>, which writes and events carry
+    so anything from an older owner can be rejected.
+    """
+
+    def __init__(self, redis_client, node_id, lease_ms=10000, on_lost=None):
+        self.redis = redis_client
+        self.node_id = node_id
+        self.lease_ms = lease_ms
+        self.on_lost = on_lost
+        self.acquire_script = redis_client.register_script(ACQUIRE_SCRIPT)
+        self.renew_script = redis_client.register_script(RENEW_SCRIPT)
+        self.release_script = redis_client.register_script(RELEASE_SCRIPT)
+        self.lock = threading.Lock()
+        self.held = {}  # session_id -> (token, valid_until)
+        self.running = False
+
+    def key(self, session_id):
+        return f"session_owner:{session_id}"
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.heartbeat, daemon=True).start()
+
+    def stop(self):
+        self.running = False
+
+    def acquire(self, session_id):
+        """Take or extend the lease. Returns (token, owner); token is 0 if another node owns it."""
+        started = time.time()
+        token, owner = self.acquire_script(
+            keys=[self.key(session_id), fence_key(session_id)],
+            args=[self.node_id, self.lease_ms],
+        )
+        token = int(token)
+        if token:
+            with self.lock:
+                self.held[session_id] = (token, started + self.lease_ms / 1000)
+        return token, owner
+
+    def owner(self, session_id):
+        """Node id of the current owner, or None if the lease has expired."""
+        value = self.redis.get(self.key(session_id))
+        return value.rpartition(":")[0] if value else None
+
+    def token(self, session_id):
+        with self.lock:
+            held = self.held.get(session_id)
+        return held[0] if held else 0
+
+    def holds(self, session_id):
+        """True while our lease is known to be valid, judged by the local clock only."""
+        with self.lock:
+            held = self.held.get(session_id)
+        return bool(held) and time.time() < held[1]
+
+    def release(self, session_id):
+        with self.lock:
+            held = self.held.pop(session_id, None)
+        if held:
+            try:
+                self.release_script(keys=[self.key(session_id)], args=[f"{self.node_id}:{held[0]}"])
+            except Exception as e:
+                logging.warning(f"Failed to release lease for {session_id}: {e}")
+
+    def renew(self, session_id):
+        with self.lock:
+            held = self.held.get(session_id)
+        if not held:
+            return False
+        started = time.time()
+        try:
+            renewed = self.renew_script(
+                keys=[self.key(session_id)], args=[f"{self.node_id}:{held[0]}", self.lease_ms]
+            )
+        except Exception as e:
+            logging.warning(f"Lease heartbeat for {session_id} failed: {e}")
+            if time.time() < held[1]:
+                return True  # still valid locally, a later beat may get through
+            renewed = 0
+
+        with self.lock:
+            if renewed:
+                self.held[session_id] = (held[0], started + self.lease_ms / 1000)
+                return True
+            self.held.pop(session_id, None)
+        logging.warning(f"Lost ownership of session {session_id}")
+        if self.on_lost:
+            self.on_lost(session_id)
+        return False
+
+    def heartbeat(self):
+        while self.running:
+            time.sleep(self.lease_ms / 3000)
+            with self.lock:
+                session_ids = list(self.held)
+            for session_id in session_ids:
+                self.renew(session_id)
@@ -0,0 +1,129 @@
+import json
+
+# KEYS: session hash, active_sessions set
+# ARGV: session_id, requested player name
+# Returns {player_index, player_name} or {-1, error message}
+JOIN_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[2], ARGV[1]) == 0 then
+    return {-1, 'Session not found or no longer active'}
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+    return {-1, 'Session not found or no longer active'}
+end
+
+local count = tonumber(redis.call('HGET', KEYS[1], 'player_count') or '0')
+if count >= 4 then
+    return {-1, 'Session is full (4 players max)'}
+end
+
+local names = cjson.decode(redis.call('HGET', KEYS[1], 'players_names_json') or '["","","",""]')
+for i = 1, 4 do
+    if names[i] == '' then
+        local name = ARGV[2]
+        if name == '' then
+            name = 'Player ' .. i
+        end
+        names[i] = name
+        redis.call('HSET', KEYS[1], 'player_count', count + 1, 'players_names_json', cjson.encode(names))
+        return {i - 1, name}
+    end
+end
+return {-1, 'No available player slots in session.'}
+"""
+
+# KEYS: session hash, active_sessions set, game state snapshot
+# ARGV: session_id, player_index
+# Returns the remaining player count, 0 once the session has been removed,
+# or -1 if it no longer exists
+LEAVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+
+local names = cjson.decode(redis.call('HGET', KEYS[1], 'players_names_json') or '["","","",""]')
+names[tonumber(ARGV[2]) + 1] = ''
+local count = redis.call('HINCRBY', KEYS[1], 'player_count', -1)
+if count <= 0 then
+    redis.call('DEL', KEYS[1], KEYS[3])
+    redis.call('SREM', KEYS[2], ARGV[1])
+    return 0
+end
+redis.call('HSET', KEYS[1], 'players_names_json', cjson.encode(names))
+return count
+"""
+
+# KEYS: session hash
+# ARGV: game_state_json, current_player_index, then one AI name per seat
+# Fills empty seats with AI names and marks the session as playing.
+# Returns the seat names as JSON, or false if the game already started.
+START_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 or redis.call('HGET', KEYS[1], 'status') == 'playing' then
+    return false
+end
+
+local names = cjson.decode(redis.call('HGET', KEYS[1], 'players_names_json') or '["","","",""]')
+for i = 1, 4 do
+    if names[i] == '' then
+        names[i] = ARGV[i + 2]
+    end
+end
+local names_json = cjson.encode(names)
+redis.call('HSET', KEYS[1],
+    'status', 'playing',
+    'players_names_json', names_json,
+    'game_state_json', ARGV[1],
+    'current_player_index', ARGV[2])
+return names_json
+"""
+
+
+class SessionScripts:
+    """
+    Lobby operations as server-side Lua scripts.
+
+    Each call claims or releases a seat, updates the player count and
+    membership, and cleans up empty sessions in one round trip, so there
+    is no WATCH/MULTI retry when several players hit the same session.
+    Writes still queued on the write-behind writer for the same keys are
+    flushed first so they cannot land on top of a script's result.
+    """
+
+    def __init__(self, redis_client, writer=None):
+        self.writer = writer
+        self.join_script = redis_client.register_script(JOIN_SCRIPT)
+        self.leave_script = redis_client.register_script(LEAVE_SCRIPT)
+        self.start_script = redis_client.register_script(START_SCRIPT)
+
+    def run(self, script, keys, args):
+        if self.writer:
+            self.writer.flush_keys(*keys)
+        return script(keys=keys, args=args)
+
+    def join(self, session_id, player_name):
+        """Claim the first free seat. Returns (player_index, name) or (-1, error)."""
+        player_index, result = self.run(
+            self.join_script,
+            keys=[f"session:{session_id}", "active_sessions"],
+            args=[session_id, player_name],
+        )
+        return int(player_index), result
+
+    def leave(self, session_id, player_index):
+        """Release a seat. Returns the players left, 0 if the session was removed."""
+        return int(self.run(
+            self.leave_script,
+            keys=[f"session:{session_id}", "active_sessions", f"session_state:{session_id}"],
+            args=[session_id, player_index],
+        ))
+
+    def start(self, session_id, game_state_data, current_player_index, ai_names):
+        """Mark a session as playing. Returns the seat names, or None if already started."""
+        names_json = self.run(
+            self.start_script,
+            keys=[f"session:{session_id}"],
+            args=[json.dumps(game_state_data), current_player_index, *ai_names],
+        )
+        if not names_json:
+            return None
+        return json.loads(names_json)
@@ -0,0 +1,187 @@
+import base64
+import struct
+
+from common.server import CapsaGameState
+from common.game import cards_by_number
+
+SNAPSHOT_VERSION = 1
+NO_PLAYER = 255
+
+# version, flags, current_player_index, last_player_to_play, round_passes,
+# players_passed, move counter, four hand bitmasks, played cards bitmask
+HEADER = struct.Struct("<BBBBBBI4QQ")
+HISTORY_COUNT = struct.Struct("<H")
+CARD_MASK = struct.Struct("<Q")
+
+FLAG_GAME_ACTIVE = 1
+FLAG_HAS_WINNER = 2
+
+# KEYS: target key, fence counter
+# ARGV: value, ex seconds, fencing token
+# Writes only if no newer session owner has been granted a token since.
+FENCED_SET_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') > tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+def cards_to_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.number
+    return mask
+
+
+def mask_to_cards(mask):
+    return [cards_by_number[n] for n in range(52) if mask >> n & 1]
+
+
+def indices_to_mask(indices):
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return mask
+
+
+def mask_to_indices(mask):
+    return {i for i in range(4) if mask >> i & 1}
+
+
+def pack_string(text):
+    data = (text or "").encode()[:255]
+    return bytes([len(data)]) + data
+
+
+def encode_game_state(game_state, move=0):
+    """
+    Encode the authoritative CapsaGameState into a compact byte string.
+    Hands and played cards are 52-bit masks, so a full table is ~100 bytes.
+    """
+    flags = 0
+    if game_state.game_active:
+        flags |= FLAG_GAME_ACTIVE
+    if game_state.winner is not None:
+        flags |= FLAG_HAS_WINNER
+
+    last_player = game_state.last_player_to_play
+    parts = [
+        HEADER.pack(
+            SNAPSHOT_VERSION,
+            flags,
+            game_state.current_player_index,
+            NO_PLAYER if last_player is None else last_player,
+            indices_to_mask(game_state.round_passes),
+            indices_to_mask(game_state.players_passed),
+            move,
+            *[cards_to_mask(p.hand) for p in game_state.players],
+            cards_to_mask(game_state.played_cards),
+        ),
+        HISTORY_COUNT.pack(len(game_state.played_cards_history)),
+    ]
+    parts.extend(
+        CARD_MASK.pack(cards_to_mask(hand)) for hand in game_state.played_cards_history
+    )
+    parts.extend(pack_string(p.name) for p in game_state.players)
+    if game_state.winner is not None:
+        parts.append(pack_string(game_state.winner))
+    return b"".join(parts)
+
+
+def decode_game_state(data):
+    """Rebuild a CapsaGameState from encode_game_state() output. Returns (state, move)."""
+    (
+        version,
+        flags,
+        current_player_index,
+        last_player,
+        round_passes,
+        players_passed,
+        move,
+        *masks,
+    ) = HEADER.unpack_from(data)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    game_state = CapsaGameState()
+    game_state.game_active = bool(flags & FLAG_GAME_ACTIVE)
+    game_state.current_player_index = current_player_index
+    game_state.last_player_to_play = None if last_player == NO_PLAYER else last_player
+    game_state.round_passes = mask_to_indices(round_passes)
+    game_state.players_passed = mask_to_indices(players_passed)
+    for player, mask in zip(game_state.players, masks[:4]):
+        player.hand = mask_to_cards(mask)
+    game_state.played_cards = mask_to_cards(masks[4])
+
+    offset = HEADER.size
+    (history_count,) = HISTORY_COUNT.unpack_from(data, offset)
+    offset += HISTORY_COUNT.size
+    for _ in range(history_count):
+        (mask,) = CARD_MASK.unpack_from(data, offset)
+        game_state.played_cards_history.append(mask_to_cards(mask))
+        offset += CARD_MASK.size
+
+    strings = []
+    while offset < len(data):
+        length = data[offset]
+        strings.append(data[offset + 1 : offset + 1 + length].decode())
+        offset += 1 + length
+
+    for i, player in enumerate(game_state.players):
+        player.name = strings[i]
+        game_state.players_names[i] = strings[i]
+    if flags & FLAG_HAS_WINNER:
+        game_state.winner = strings[4]
+    return game_state, move
+
+
+class GameStateStore:
+    """
+    Persists encoded game state snapshots under session_state:<id>.
+
+    Snapshots are base64 text so they fit the decode_responses client, and
+    each one is written with a single SET, so readers never see a partial
+    state. Failover resumes from them, so saves go to Redis right away and
+    never through the write-behind queue.
+    """
+
+    def __init__(self, redis_client, ttl=86400):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.fenced_set = redis_client.register_script(FENCED_SET_SCRIPT)
+        self.moves = {}  # session_id -> move counter of the last save
+
+    def key(self, session_id):
+        return f"session_state:{session_id}"
+
+    def save(self, session_id, game_state, fence=None):
+        """
+        fence=(fence_key, token) makes the write conditional on no newer
+        session owner having been granted a token.
+        """
+        move = self.moves.get(session_id, 0) + 1
+        self.moves[session_id] = move
+        encoded = base64.b64encode(encode_game_state(game_state, move)).decode()
+        if fence:
+            self.fenced_set(keys=[self.key(session_id), fence[0]], args=[encoded, self.ttl, fence[1]])
+        else:
+            self.redis.set(self.key(session_id), encoded, ex=self.ttl)
+        return move
+
+    def load(self, session_id):
+        encoded = self.redis.get(self.key(session_id))
+        if not encoded:
+            return None
+        game_state, move = decode_game_state(base64.b64decode(encoded))
+        self.moves[session_id] = move
+        return game_state
+
+    def delete(self, session_id):
+        self.forget(session_id)
+        self.redis.delete(self.key(session_id))
+
+    def forget(self, session_id):
+        """Drop local bookkeeping for a snapshot that was deleted elsewhere."""
+        self.moves.pop(session_id, None)
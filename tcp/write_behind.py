@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+
+PERSIST = -1  # pending ttl value meaning "remove the expiry"
+
+
+class PendingWrite:
+    """Coalesced writes for one Redis key, applied as HDEL, HSET, SREM, SADD, TTL."""
+
+    def __init__(self):
+        self.since = time.time()
+        self.hset = {}
+        self.hdel = set()
+        self.sadd = set()
+        self.srem = set()
+        self.ttl = None
+        self.callbacks = {}
+
+    def merge_older(self, older):
+        """Fold in writes queued before this one, e.g. a batch that failed to flush."""
+        self.since = min(self.since, older.since)
+        self.callbacks = dict(older.callbacks, **self.callbacks)
+        self.hdel |= older.hdel - set(self.hset)
+        self.hset = dict(
+            {f: v for f, v in older.hset.items() if f not in self.hdel}, **self.hset
+        )
+        sadd = self.sadd | (older.sadd - self.srem)
+        self.srem |= older.srem - self.sadd
+        self.sadd = sadd
+        if self.ttl is None:
+            self.ttl = older.ttl
+
+    def queue_on(self, pipe, key):
+        if self.hdel:
+            pipe.hdel(key, *self.hdel)
+        if self.hset:
+            pipe.hset(key, mapping=self.hset)
+        if self.srem:
+            pipe.srem(key, *self.srem)
+        if self.sadd:
+            pipe.sadd(key, *self.sadd)
+        if self.ttl == PERSIST:
+            pipe.persist(key)
+        elif self.ttl is not None:
+            pipe.expire(key, self.ttl)
+
+
+class WriteBehindQueue:
+    """
+    Write-behind persistence for writes the game does not need to wait on.
+
+    Writes are coalesced per key in memory and a background worker flushes
+    everything pending as one pipelined batch every flush_interval seconds.
+    Callers that are about to touch a key directly (e.g. a Lua script) call
+    flush_keys() first so older queued writes cannot land after theirs.
+    """
+
+    def __init__(self, redis_client, flush_interval=0.05, retry_delay=1.0, lag_warning=1.0):
+        self.redis = redis_client
+        self.flush_interval = flush_interval
+        self.retry_delay = retry_delay
+        self.lag_warning = lag_warning  # log batches that reach Redis later than this
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # held while a batch is written
+        self.wakeup = threading.Event()
+        self.pending = {}  # key -> PendingWrite
+        self.metrics = {
+            "queued": 0,
+            "coalesced": 0,
+            "flushed_keys": 0,
+            "batches": 0,
+            "errors": 0,
+            "last_lag": 0.0,
+            "max_lag": 0.0,
+        }
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self, timeout=5.0):
+        self.flush(timeout)
+        self.running = False
+        self.wakeup.set()
+
+    def entry(self, key, on_flush):
+        """Pending write for key, created if needed. Call with self.lock held."""
+        self.metrics["queued"] += 1
+        pending = self.pending.get(key)
+        if pending is None:
+            pending = self.pending[key] = PendingWrite()
+        else:
+            self.metrics["coalesced"] += 1
+        if on_flush:
+            pending.callbacks[on_flush.__qualname__] = on_flush
+        return pending
+
+    def hset(self, key, mapping, on_flush=None):
+        with self.lock:
+            pending = self.entry(key, on_flush)
+            pending.hdel -= set(mapping)
+            pending.hset.update(mapping)
+
+    def hdel(self, key, *fields, on_flush=None):
+        with self.lock:
+            pending = self.entry(key, on_flush)
+            for field in fields:
+                pending.hset.pop(field, None)
+                pending.hdel.add(field)
+
+    def sadd(self, key, *members, on_flush=None):
+        with self.lock:
+            pending = self.entry(key, on_flush)
+            pending.srem -= set(members)
+            pending.sadd.update(members)
+
+    def srem(self, key, *members, on_flush=None):
+        with self.lock:
+            pending = self.entry(key, on_flush)
+            pending.sadd -= set(members)
+            pending.srem.update(members)
+
+    def expire(self, key, seconds):
+        with self.lock:
+            self.entry(key, None).ttl = seconds
+
+    def persist(self, key):
+        with self.lock:
+            self.entry(key, None).ttl = PERSIST
+
+    def discard(self, key):
+        """Forget queued writes for a key that is being deleted directly."""
+        with self.lock:
+            self.pending.pop(key, None)
+
+    def lag(self):
+        """Age in seconds of the oldest write not yet in Redis."""
+        with self.lock:
+            if not self.pending:
+                return 0.0
+            return time.time() - min(p.since for p in self.pending.values())
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.metrics, pending=len(self.pending))
+        stats["lag"] = self.lag()
+        return stats
+
+    def run(self):
+        while self.running:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            if not self.write_batch():
+                time.sleep(self.retry_delay)
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is in Redis, or timeout."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.lock:
+                if not self.pending:
+                    return True
+            if not self.running:
+                self.write_batch()
+            else:
+                self.wakeup.set()
+                time.sleep(0.01)
+        return False
+
+    def flush_keys(self, *keys):
+        """Synchronously write whatever is queued for these keys."""
+        return self.write_batch(keys)
+
+    def write_batch(self, keys=None):
+        with self.flush_lock:
+            with self.lock:
+                if keys is None:
+                    batch, self.pending = self.pending, {}
+                else:
+                    batch = {k: self.pending.pop(k) for k in keys if k in self.pending}
+            if not batch:
+                return True
+
+            pipe = self.redis.pipeline(transaction=False)
+            for key, pending in batch.items():
+                pending.queue_on(pipe, key)
+            try:
+                pipe.execute()
+            except Exception as e:
+                logging.warning(f"Write-behind flush of {len(batch)} keys failed: {e}")
+                with self.lock:
+                    self.metrics["errors"] += 1
+                    for key, pending in batch.items():
+                        newer = self.pending.get(key)
+                        if newer:
+                            newer.merge_older(pending)
+                        else:
+                            self.pending[key] = pending
+                return False
+
+            now = time.time()
+            lag = max(now - p.since for p in batch.values())
+            with self.lock:
+                self.metrics["batches"] += 1
+                self.metrics["flushed_keys"] += len(batch)
+                self.metrics["last_lag"] = lag
+                self.metrics["max_lag"] = max(self.metrics["max_lag"], lag)
+            if lag > self.lag_warning:
+                logging.warning(f"Write-behind batch of {len(batch)} keys reached Redis {lag:.2f}s late")
+
+        for pending in batch.values():
+            for callback in pending.callbacks.values():
+                try:
+                    callback()
+                except Exception as e:
+                    logging.warning(f"Write-behind callback failed: {e}")
+        return True
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark client frame rendering.
+
+Draws a mid-game table (full hand, five cards on the table, four players)
+with draw_game and reports the time per frame, then the time of an idle
+GameRenderer frame, which should draw nothing. The budget is a quarter
+of a 60 FPS frame so slow laptops keep headroom. Run from the repository root:
+
+    python -m utils.bench_draw_game --frames 2000
+    python -m utils.bench_draw_game --headless   # no window, e.g. over SSH
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+BUDGET_MS = 1000 / 60 / 4
+
+
+def fake_client(deck):
+    def card_data(card):
+        return {"number": card.number, "suit": card.suit, "value": card.value,
+                "pp_value": card.pp_value, "selected": False}
+
+    return SimpleNamespace(
+        connected=True,
+        session_name="bench",
+        player_name="bench",
+        player_index=0,
+        selected_cards=[2, 5],
+        message="Your turn!",
+        message_timer=10 ** 9,
+        game_data={
+            "current_player_index": 0,
+            "current_player_name": "bench",
+            "players_names": ["bench", "AI Bot 2", "AI Bot 3", "AI Bot 4"],
+            "players_card_counts": [13, 13, 8, 11],
+            "players_passed": [2],
+            "played_cards": [card_data(card) for card in deck[20:25]],
+            "my_hand": [card_data(card) for card in deck[:13]],
+            "game_active": True,
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="draw_game frame time benchmark")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--headless", action="store_true", help="Use SDL's dummy video driver")
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+    import pygame
+    from common.game import WINDOW_HEIGHT, WINDOW_WIDTH, GameRenderer, deck, draw_game
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    client = fake_client(deck)
+
+    started = time.perf_counter()
+    draw_game(screen, client, WINDOW_WIDTH, WINDOW_HEIGHT)
+    print(f"First frame (builds the card atlas): {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    timings = []
+    for _ in range(args.frames):
+        started = time.perf_counter()
+        draw_game(screen, client, WINDOW_WIDTH, WINDOW_HEIGHT)
+        timings.append(time.perf_counter() - started)
+
+    renderer = GameRenderer(screen, WINDOW_WIDTH, WINDOW_HEIGHT)
+    renderer.render(client)
+    idle_timings = []
+    for _ in range(args.frames):
+        started = time.perf_counter()
+        renderer.render(client)
+        idle_timings.append(time.perf_counter() - started)
+    pygame.quit()
+
+    ok = report("draw_game", timings)
+    ok = report("renderer idle", idle_timings) and ok
+    if not ok:
+        sys.exit(1)
+
+
+def report(name, timings):
+    timings.sort()
+    mean = sum(timings) / len(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99)] * 1000
+    status = "✅" if p99 < BUDGET_MS else "❌"
+    print(f"{status} {name:<14} mean {mean:.4f} ms   p99 {p99:.4f} ms   (budget {BUDGET_MS:.2f} ms)")
+    return p99 < BUDGET_MS
+
+
+if __name__ == "__main__":
+    main()
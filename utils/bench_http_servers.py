@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Compare the threaded and asyncio custom_http servers.
+
+Starts both servers in-process on local ports, polls game state from
+several client threads and prints requests/sec and latency percentiles.
+The threaded server closes every connection; the async server is driven
+over keep-alive connections like a pooled client would. Run from the
+repository root:
+
+    python -m utils.bench_http_servers --clients 16 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import socket
+import socketserver
+import threading
+import time
+
+from custom_http import server as threaded
+from custom_http.async_server import AsyncHttpServer
+
+
+def read_response(sock):
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("server closed connection")
+        data += chunk
+    head, _, body = data.partition(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    while len(body) < length:
+        body += sock.recv(4096)
+    return head, body
+
+
+def send_request(sock, method, path, body=None, keep_alive=False):
+    payload = json.dumps(body) if body is not None else ""
+    connection = "keep-alive" if keep_alive else "close"
+    sock.sendall(
+        f"{method} {path} HTTP/1.0\r\nConnection: {connection}\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n{payload}".encode()
+    )
+    return read_response(sock)
+
+
+def create_table(port):
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        _, body = send_request(
+            sock, "POST", "/sessions", {"session_name": "bench", "creator_name": "P0"}
+        )
+    return json.loads(body)["session_id"]
+
+
+def run_clients(port, path, clients, requests, keep_alive):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        sock = None
+        for _ in range(requests):
+            started = time.perf_counter()
+            if sock is None:
+                sock = socket.create_connection(("127.0.0.1", port))
+            send_request(sock, "GET", path, keep_alive=keep_alive)
+            if not keep_alive:
+                sock.close()
+                sock = None
+            local.append(time.perf_counter() - started)
+        if sock is not None:
+            sock.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - started, sorted(latencies)
+
+
+def report(name, elapsed, latencies):
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(
+        f"{name:<10} {len(latencies) / elapsed:>9.0f} req/s   "
+        f"p50 {pct(0.50):6.2f} ms   p99 {pct(0.99):6.2f} ms"
+    )
+
+
+def start_threaded():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), threaded.MyTCPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def start_async():
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    ports = []
+
+    async def boot():
+        server = await asyncio.start_server(
+            AsyncHttpServer().handle_connection, "127.0.0.1", 0
+        )
+        ports.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        await server.serve_forever()
+
+    threading.Thread(target=lambda: loop.run_until_complete(boot()), daemon=True).start()
+    ready.wait()
+    return ports[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="custom_http server benchmark")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    for name, port, keep_alive in (
+        ("threaded", start_threaded(), False),
+        ("async", start_async(), True),
+    ):
+        session_id = create_table(port)
+        path = f"/sessions/{session_id}?player_name=P0"
+        elapsed, latencies = run_clients(
+            port, path, args.clients, args.requests, keep_alive
+        )
+        report(name, elapsed, latencies)
+
+
+if __name__ == "__main__":
+    main()
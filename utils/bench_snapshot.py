@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark game state snapshot writes.
+
+Plays random single-card moves on a dealt table and times encoding each
+snapshot and, with --save, the SET that persists it. The per-move budget
+is 1 ms. Run from the repository root:
+
+    python -m utils.bench_snapshot --moves 5000
+    python -m utils.bench_snapshot --save --redis-host localhost --redis-port 6379 --redis-ssl false
+    python -m utils.bench_snapshot --save --redis-backend memory
+"""
+import argparse
+import sys
+import time
+
+from common.game import deal, play
+from common.server import CapsaGameState
+from common.redis_backend import add_redis_arguments, create_redis_client, redis_config
+from tcp.state_snapshot import GameStateStore, decode_game_state, encode_game_state
+
+BUDGET_MS = 1.0
+
+
+def random_moves(count):
+    """Yield game states after each move of repeatedly dealt games."""
+    game_state = CapsaGameState()
+    while count > 0:
+        game_state.reset_game()
+        game_state.game_active = True
+        deal(game_state.players)
+        while count > 0 and all(p.hand for p in game_state.players):
+            player = game_state.players[game_state.current_player_index]
+            for card in player.hand:
+                if play([card], player.hand, game_state.played_cards) == 0:
+                    player.hand.remove(card)
+                    game_state.played_cards = [card]
+                    game_state.played_cards_history.append([card])
+                    game_state.last_player_to_play = game_state.current_player_index
+                    break
+            else:
+                game_state.round_passes.add(game_state.current_player_index)
+                if len(game_state.round_passes) >= 3:
+                    game_state.played_cards = []
+                    game_state.played_cards_history.clear()
+                    game_state.round_passes.clear()
+            game_state.current_player_index = (game_state.current_player_index + 1) % 4
+            count -= 1
+            yield game_state
+
+
+def report(name, timings):
+    timings.sort()
+    mean = sum(timings) / len(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99)] * 1000
+    status = "✅" if p99 < BUDGET_MS else "❌"
+    print(f"{status} {name:<14} mean {mean:.4f} ms   p99 {p99:.4f} ms")
+    return p99 < BUDGET_MS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot write benchmark")
+    parser.add_argument("--moves", type=int, default=5000)
+    parser.add_argument("--save", action="store_true", help="Also time the Redis write")
+    add_redis_arguments(parser)
+    args = parser.parse_args()
+
+    encode_times, decode_times, sizes = [], [], []
+    for game_state in random_moves(args.moves):
+        started = time.perf_counter()
+        data = encode_game_state(game_state)
+        encode_times.append(time.perf_counter() - started)
+        sizes.append(len(data))
+
+        started = time.perf_counter()
+        decode_game_state(data)
+        decode_times.append(time.perf_counter() - started)
+
+    print(f"Snapshot size: {min(sizes)}-{max(sizes)} bytes")
+    ok = report("encode", encode_times)
+    ok = report("decode", decode_times) and ok
+
+    if args.save:
+        store = GameStateStore(create_redis_client(redis_config(args)))
+        save_times = []
+        for game_state in random_moves(args.moves):
+            started = time.perf_counter()
+            store.save("bench", game_state)
+            save_times.append(time.perf_counter() - started)
+        store.delete("bench")
+        ok = report("save (redis)", save_times) and ok
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
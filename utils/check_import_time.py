@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the game module.
+
+Imports common.game in fresh interpreters and fails if it takes longer
+than the budget (pygame itself is timed separately, the clients need it
+anyway) or if it loads pygame_cards, whose graphics are meant to load on
+first render or in preload_assets(). Run from the repository root:
+
+    python -m utils.check_import_time --runs 5 --budget-ms 50
+    python -m utils.check_import_time --assets   # also time the card atlas build
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import pygame
+imported_pygame = time.perf_counter()
+import common.game
+imported_game = time.perf_counter()
+result = {
+    "pygame": imported_pygame - started,
+    "game": imported_game - imported_pygame,
+    "pygame_cards": "pygame_cards.classics" in sys.modules,
+}
+if ASSETS:
+    common.game.preload_assets().join()
+    result["assets"] = time.perf_counter() - imported_game
+print(json.dumps(result))
+"""
+
+
+def probe(assets):
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1", SDL_VIDEODRIVER="dummy")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.replace("ASSETS", str(assets))],
+        capture_output=True, text=True, env=env, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--assets", action="store_true", help="Also time building the card atlas")
+    args = parser.parse_args()
+
+    results = [probe(args.assets) for _ in range(args.runs)]
+    game_ms = statistics.median(r["game"] for r in results) * 1000
+    pygame_ms = statistics.median(r["pygame"] for r in results) * 1000
+    loaded_cards = any(r["pygame_cards"] for r in results)
+
+    print(f"import pygame       {pygame_ms:8.1f} ms (not budgeted)")
+    print(f"import common.game  {game_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if args.assets:
+        assets_ms = statistics.median(r["assets"] for r in results) * 1000
+        print(f"card atlas build    {assets_ms:8.1f} ms (off the main thread in the clients)")
+
+    ok = True
+    if loaded_cards:
+        print("❌ pygame_cards was imported at import time")
+        ok = False
+    if game_ms > args.budget_ms:
+        print("❌ common.game import is over budget")
+        ok = False
+    if ok:
+        print("✅ import time within budget")
+    else:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Headless bot tables against a running TCP or HTTP server.
+
+Each table is created by its first bot, the others join and the first
+bot starts the game. Empty TCP seats are played by the server's AI; the
+HTTP server never plays AI seats, so HTTP tables need 4 bots. With
+--tables-per-connection, TCP bots of that many tables share one
+connection (bot i of each table on connection i). --spectators opens
+that many TCP connections that each watch every table. Run from the
+repository root:
+
+    python -m utils.run_bots --transport tcp --port 55556 --tables 5 --bots-per-table 1
+    python -m utils.run_bots --transport tcp --tables 200 --tables-per-connection 50
+    python -m utils.run_bots --transport tcp --tables 5 --bots-per-table 4 --spectators 8
+    python -m utils.run_bots --transport http --port 8886 --tables 5 --policy random
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from common.bot import POLICIES, RandomPolicy, run_bot
+
+
+def make_client(args, connection=None):
+    if args.transport == "tcp":
+        from tcp.bot import TcpBotClient
+        return TcpBotClient(args.host, args.port, connection=connection)
+    from custom_http.bot import HttpBotClient
+    return HttpBotClient(args.host, args.port)
+
+
+def make_policy(args, bot):
+    if args.policy == "random":
+        return RandomPolicy(seed=None if args.seed is None else args.seed * 1000 + bot)
+    return POLICIES[args.policy]
+
+
+async def run_table(args, table, connections, spectator_connections):
+    clients = [
+        make_client(args, connections[i] if connections else None)
+        for i in range(args.bots_per_table)
+    ]
+    policies = [make_policy(args, table * args.bots_per_table + i) for i in range(len(clients))]
+    watchers = [make_client(args, connection) for connection in spectator_connections]
+    moves = 0
+    for client in clients:
+        await client.connect()
+    try:
+        for game in range(args.games):
+            # HTTP sessions cannot be restarted, so every game gets a new one
+            if game == 0 or args.transport == "http":
+                session_id = await clients[0].create_session(f"bots-{table}-{game}", f"bot{table}-0")
+                for i, client in enumerate(clients[1:], 1):
+                    await client.join_session(session_id, f"bot{table}-{i}")
+                for watcher in watchers:
+                    await watcher.spectate_session(session_id)
+            results = await asyncio.gather(*(
+                run_bot(client, policies[i], games=1,
+                        start=(i == 0), timeout=args.timeout)
+                for i, client in enumerate(clients)
+            ))
+            moves += sum(results)
+    finally:
+        for client in clients + watchers:
+            await client.close()
+    return moves, sum(watcher.version for watcher in watchers)
+
+
+async def open_connections(args):
+    """Shared connections per group of tables, or None for a connection per bot."""
+    if args.transport != "tcp" or args.tables_per_connection <= 1:
+        return [None] * args.tables
+    from tcp.bot import TcpConnection
+
+    groups = []
+    for _ in range(0, args.tables, args.tables_per_connection):
+        group = [TcpConnection(args.host, args.port) for _ in range(args.bots_per_table)]
+        for connection in group:
+            await connection.connect()
+        groups.append(group)
+    return [groups[table // args.tables_per_connection] for table in range(args.tables)]
+
+
+async def open_spectators(args):
+    if args.transport != "tcp" or not args.spectators:
+        return []
+    from tcp.bot import TcpConnection
+
+    spectators = [TcpConnection(args.host, args.port) for _ in range(args.spectators)]
+    for connection in spectators:
+        await connection.connect()
+    return spectators
+
+
+async def run(args):
+    started = time.perf_counter()
+    connections = await open_connections(args)
+    spectators = await open_spectators(args)
+    try:
+        results = await asyncio.gather(
+            *(run_table(args, table, connections[table], spectators) for table in range(args.tables)),
+            return_exceptions=True,
+        )
+    finally:
+        for connection in {c for group in connections if group for c in group}:
+            await connection.close()
+        for connection in spectators:
+            await connection.close()
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if isinstance(r, BaseException)]
+    moves = sum(r[0] for r in results if not isinstance(r, BaseException))
+    views = sum(r[1] for r in results if not isinstance(r, BaseException))
+    for error in failed:
+        print(f"❌ table failed: {error!r}")
+    games = (len(results) - len(failed)) * args.games
+    print(f"{games} games, {moves} bot moves in {elapsed:.2f}s ({moves / elapsed:.1f} moves/s)")
+    if spectators:
+        print(f"{views} views received by {len(spectators)} spectators")
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transport", choices=("tcp", "http"), default="tcp")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--tables", type=int, default=1)
+    parser.add_argument("--bots-per-table", type=int)
+    parser.add_argument("--games", type=int, default=1, help="Games per table")
+    parser.add_argument(
+        "--tables-per-connection", type=int, default=1,
+        help="TCP tables whose bots share connections",
+    )
+    parser.add_argument(
+        "--spectators", type=int, default=0, help="TCP connections watching every table"
+    )
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="lowest")
+    parser.add_argument("--seed", type=int, help="Seed for the random policy")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a state")
+    args = parser.parse_args()
+
+    if args.port is None:
+        args.port = 55556 if args.transport == "tcp" else 8886
+    if args.bots_per_table is None:
+        args.bots_per_table = 1 if args.transport == "tcp" else 4
+
+    logging.basicConfig(level=logging.WARNING)
+    if not asyncio.run(run(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Stress test for custom_http GameSession locking.
+
+Fires concurrent joins, plays and passes at an in-process HttpServer and
+checks that no table ends up corrupted. Run from the repository root:
+
+    python -m utils.stress_http_sessions --tables 20 --threads 8
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from custom_http.http_protocol import HttpServer
+
+counters_lock = threading.Lock()
+
+
+def count(counters, key):
+    with counters_lock:
+        counters[key] += 1
+
+
+def request(server, method, path, body=None):
+    payload = json.dumps(body) if body is not None else ""
+    raw = f"{method} {path} HTTP/1.0\r\nContent-Length: {len(payload)}\r\n\r\n{payload}"
+    response = server.proses(raw)
+    head, _, content = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    try:
+        return status, json.loads(content) if content else {}
+    except json.JSONDecodeError:
+        return status, {}
+
+
+def join_storm(server, session_id, attempts):
+    joined = 0
+    for i in range(attempts):
+        status, _ = request(
+            server, "POST", f"/sessions/{session_id}/join", {"player_name": f"J{i}"}
+        )
+        if status == 200:
+            joined += 1
+    return joined
+
+
+def play_until_over(server, session_id, player_name, deadline, counters):
+    while time.time() < deadline:
+        status, state = request(
+            server, "GET", f"/sessions/{session_id}?player_name={player_name}"
+        )
+        if status != 200 or state.get("game_over"):
+            return
+        if state["current_player_index"] != state["my_player_index"]:
+            # Hammer the table out of turn as well
+            request(
+                server, "POST", f"/sessions/{session_id}/pass", {"player_name": player_name}
+            )
+            count(counters, "out_of_turn")
+            continue
+
+        hand = state["my_hand"]
+        played = False
+        for i in random.sample(range(len(hand)), len(hand)):
+            status, _ = request(
+                server,
+                "POST",
+                f"/sessions/{session_id}/play",
+                {"player_name": player_name, "cards": [i]},
+            )
+            count(counters, "play_attempts")
+            if status == 200:
+                count(counters, "plays")
+                played = True
+                break
+        if not played:
+            request(
+                server, "POST", f"/sessions/{session_id}/pass", {"player_name": player_name}
+            )
+            count(counters, "passes")
+
+
+def check_table(session):
+    problems = []
+    if len(session.players) > 4:
+        problems.append(f"{len(session.players)} players")
+    numbers = [c.number for p in session.players for c in p.hand]
+    if len(numbers) != len(set(numbers)):
+        problems.append("card held twice")
+    if not 0 <= session.current_player_index < len(session.players):
+        problems.append(f"current_player_index={session.current_player_index}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server = HttpServer()
+    session_ids = []
+    for t in range(args.tables):
+        _, session = request(
+            server,
+            "POST",
+            "/sessions",
+            {"session_name": f"table{t}", "creator_name": "P0"},
+        )
+        session_ids.append(session["session_id"])
+
+    print(f"Joining {args.tables} tables from {args.threads} threads...")
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        joined = list(
+            executor.map(lambda sid: join_storm(server, sid, 6), session_ids * 2)
+        )
+    for sid in session_ids:
+        request(server, "POST", f"/sessions/{sid}/start")
+
+    counters = {"play_attempts": 0, "plays": 0, "passes": 0, "out_of_turn": 0}
+    deadline = time.time() + args.seconds
+    started = time.time()
+    print(f"Playing for up to {args.seconds:.0f}s...")
+    with ThreadPoolExecutor(max_workers=args.threads * 4) as executor:
+        for sid in session_ids:
+            session = server.game_sessions[sid]
+            for player in session.players:
+                executor.submit(
+                    play_until_over, server, sid, player.name, deadline, counters
+                )
+    elapsed = time.time() - started
+
+    failures = 0
+    for sid in session_ids:
+        problems = check_table(server.game_sessions[sid])
+        if problems:
+            failures += 1
+            print(f"❌ Table {sid[:8]}: {', '.join(problems)}")
+
+    total = counters["play_attempts"] + counters["passes"] + counters["out_of_turn"]
+    print(f"Joins accepted: {sum(joined)} (max {args.tables * 3})")
+    print(
+        f"Plays: {counters['plays']}  Passes: {counters['passes']}  "
+        f"Out of turn: {counters['out_of_turn']}"
+    )
+    print(f"Throughput: {total / elapsed:.0f} mutating requests/s over {elapsed:.1f}s")
+
+    if failures or sum(joined) > args.tables * 3:
+        print("❌ Stress test failed")
+        sys.exit(1)
+    print("✅ All tables consistent")
+
+
+if __name__ == "__main__":
+    main()